@@ -270,6 +270,72 @@ app.post('/api/constants/:id/calculate', async (req, res) => {
   }
 });
 
+/**
+ * @swagger
+ * /api/calculate/batch/stream:
+ *   post:
+ *     summary: Calculate many constants, streaming each result as it completes
+ *     tags: [Constants]
+ *     parameters:
+ *       - in: query
+ *         name: format
+ *         schema:
+ *           type: string
+ *           enum: [ndjson, sse]
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             properties:
+ *               constantIds:
+ *                 oneOf:
+ *                   - type: array
+ *                     items:
+ *                       type: string
+ *                   - type: string
+ *                     enum: [all]
+ *               forceRecalculate:
+ *                 type: boolean
+ *     responses:
+ *       200:
+ *         description: plan, result, heartbeat and summary records (NDJSON or SSE)
+ *       404:
+ *         description: Constant not found
+ */
+app.post('/api/calculate/batch/stream', async (req, res) => {
+  try {
+    const { constantIds, forceRecalculate } = req.body;
+    const response = await axios.post(`${PYTHON_SERVICE_URL}/calculate/batch/stream`, {
+      constant_ids: constantIds || 'all',
+      force_recalculate: forceRecalculate || false
+    }, {
+      params: { format: req.query.format },
+      headers: { Accept: req.get('Accept') || 'application/x-ndjson' },
+      responseType: 'stream',
+      decompress: true
+    });
+
+    res.set({
+      'Content-Type': response.headers['content-type'],
+      'Cache-Control': 'no-cache',
+      'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+    response.data.pipe(res);
+    // 'close' on res means the client went away (req closes once its body is read)
+    res.on('close', () => response.data.destroy());
+  } catch (error) {
+    if (error.response?.status === 404) {
+      res.status(404).json({ error: 'Constant not found' });
+    } else {
+      console.error('Batch stream error:', error);
+      res.status(500).json({ error: 'Batch calculation failed' });
+    }
+  }
+});
+
 /**
  * @swagger
  * /api/playground/run:
@@ -315,6 +381,62 @@ app.post('/api/playground/run', async (req, res) => {
   }
 });
 
+/**
+ * @swagger
+ * /api/playground/batch:
+ *   post:
+ *     summary: Evaluate a formula over arrays or ranges of parameter values
+ *     tags: [Playground]
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             required:
+ *               - formula
+ *               - parameters
+ *             properties:
+ *               formula:
+ *                 type: string
+ *                 description: Mathematical formula to evaluate
+ *               parameters:
+ *                 type: object
+ *                 description: Number, array or {start, stop, num, scale} per parameter
+ *               grid:
+ *                 type: boolean
+ *                 description: Outer product of the array parameters instead of broadcasting
+ *               format:
+ *                 type: string
+ *                 enum: [json, binary]
+ *     responses:
+ *       200:
+ *         description: Columnar JSON or little-endian float64 result array
+ *       400:
+ *         description: Invalid formula, parameters or too many points
+ */
+app.post('/api/playground/batch', async (req, res) => {
+  try {
+    const response = await axios.post(`${PYTHON_SERVICE_URL}/playground/batch`, req.body, {
+      responseType: 'arraybuffer'
+    });
+    for (const header of ['content-type', 'x-playground-shape', 'x-playground-latex', 'x-playground-timings']) {
+      if (response.headers[header]) {
+        res.set(header, response.headers[header]);
+      }
+    }
+    res.send(Buffer.from(response.data));
+  } catch (error) {
+    if (error.response?.status === 400) {
+      const detail = JSON.parse(Buffer.from(error.response.data).toString()).detail;
+      res.status(400).json({ error: detail });
+    } else {
+      console.error('Playground batch error:', error);
+      res.status(500).json({ error: 'Playground batch execution failed' });
+    }
+  }
+});
+
 /**
  * @swagger
  * /api/dag:
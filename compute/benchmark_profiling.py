@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Overhead of the profilers in profiling.py on a CPU-bound RG workload
+
+Runs the same workload bare, under the stack sampler at several
+intervals, and under cProfile, and reports the slowdown of each.
+
+    python benchmark_profiling.py [--repeat N]
+"""
+
+import argparse
+import cProfile
+import time
+
+import numpy as np
+
+from profiling import StackSampler
+from rg_running import CoupledRGSolver, RGRunning
+
+
+def workload(rounds: int = 10):
+    """Pure-Python-heavy: coupled gauge/Yukawa RGE solves plus table lookups"""
+    rg = RGRunning()
+    for _ in range(rounds):
+        CoupledRGSolver().solve()
+        for mu in np.logspace(0, 19, 200):
+            rg.alpha_s(mu)
+            rg.run_gauge_couplings(rg.M_Z, mu)
+
+
+def best_of(repeat: int, setup=None, teardown=None) -> float:
+    timings = []
+    for _ in range(repeat):
+        context = setup() if setup else None
+        start = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - start)
+        if teardown:
+            teardown(context)
+    return min(timings)
+
+
+def main(repeat: int):
+    workload()
+    bare = best_of(repeat)
+    print(f"{'mode':<18} {'seconds':>9} {'overhead':>9}")
+    print(f"{'bare':<18} {bare:>9.4f} {'':>9}")
+
+    for interval in (0.01, 0.005, 0.001):
+        timed = best_of(repeat, lambda: StackSampler(interval).start(), lambda s: s.stop())
+        print(f"{f'sampler {interval * 1000:g} ms':<18} {timed:>9.4f} {100 * (timed / bare - 1):>8.1f}%")
+
+    def start_profile():
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    timed = best_of(repeat, start_profile, lambda p: p.disable())
+    print(f"{'cProfile':<18} {timed:>9.4f} {100 * (timed / bare - 1):>8.1f}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args().repeat)
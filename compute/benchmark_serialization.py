@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Serialization and compression benchmark for large compute service payloads
+
+Compares the previous path (jsonable_encoder + stdlib json) with the
+orjson-backed encoder for the /dag payload and a full-catalog result
+dump, and reports the wire size with each supported content coding.
+
+    python benchmark_serialization.py [--repeat N]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+import main
+from registry import registry
+from responses import ENCODINGS, HAS_ORJSON, compress, dumps
+
+
+def catalog_results() -> dict:
+    """One completed CalculationResult per constant in the catalog"""
+    results = {}
+    for constant_id, constant in registry.constants.items():
+        results[constant_id] = main.CalculationResult(
+            constant_id=constant_id,
+            calculated_value=1.0 / 137.035999,
+            reference_value=1.0 / 137.035999084,
+            relative_error=6.1e-10,
+            unit=str(constant.get('unit') or 'dimensionless'),
+            formula=str(constant.get('formula') or ''),
+            calculation_steps=[{'step': i, 'description': 'Evaluate formula', 'value': 0.1 * i}
+                               for i in range(8)],
+            timestamp=datetime.now().isoformat(),
+            status='completed'
+        )
+    return results
+
+
+def baseline_dumps(payload) -> bytes:
+    """What FastAPI's default JSONResponse did before"""
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def best_of(func, payload, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payload)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main_benchmark(repeat: int):
+    registry.refresh()
+    results = catalog_results()
+    for constant_id, result in results.items():
+        main.results_cache[constant_id] = result
+
+    payloads = {
+        '/dag': main.build_dependency_graph(),
+        '/results': results,
+    }
+
+    print(f"orjson: {'yes' if HAS_ORJSON else 'no (stdlib fallback)'}, best of {repeat}")
+    print(f"{'payload':<10} {'before ms':>10} {'after ms':>10} {'raw KB':>8} "
+          + ' '.join(f"{enc + ' KB':>8}" for enc in ENCODINGS))
+    for name, payload in payloads.items():
+        before = best_of(baseline_dumps, payload, repeat)
+        after = best_of(dumps, payload, repeat)
+        body = dumps(payload)
+        sizes = ' '.join(f"{len(compress(body, enc)) / 1024:>8.1f}" for enc in ENCODINGS)
+        print(f"{name:<10} {before:>10.3f} {after:>10.3f} {len(body) / 1024:>8.1f} {sizes}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    main_benchmark(parser.parse_args().repeat)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Compiled constants catalog
+
+Build step: reads every constants/data/*.json and the latest
+constants/results/*_result.json once and writes them, with the dependency
+edges and a topological order, to a single memory-mappable bundle:
+
+    python catalog_bundle.py      # writes constants/catalog.bundle
+
+Layout: an 8-byte magic, the bundle version (uint32) and the header length
+(uint64), then a compact JSON header, then one compact JSON record per
+constant and per result. The header holds the edges, the order and where
+each record sits after the header, so a loader maps the file and decodes
+only the records it reads.
+
+The header also records the (name, mtime, size) of every source file.
+load_catalog() uses the bundle while those still match and otherwise falls
+back to parsing the JSON files, so a stale or missing bundle is only ever
+slower, never wrong.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dependency_index import DependencyIndex
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_VERSION = 1
+BUNDLE_NAME = 'catalog.bundle'
+MAGIC = b'TFPTCAT\x00'
+PREFIX = struct.Struct('<8sIQ')
+
+# File name -> (mtime_ns, size)
+Signatures = Dict[str, Tuple[int, int]]
+
+
+def default_data_dir() -> Path:
+    """constants/data next to the service (in the container) or one level up (repository)"""
+    here = Path(__file__).resolve().parent
+    return next((d / 'constants' / 'data' for d in (here, here.parent) if (d / 'constants' / 'data').exists()),
+                here.parent / 'constants' / 'data')
+
+
+def bundle_path(data_dir: Path) -> Path:
+    return Path(data_dir).parent / BUNDLE_NAME
+
+
+def results_dir(data_dir: Path) -> Path:
+    return Path(data_dir).parent / 'results'
+
+
+def file_signatures(directory: Path, pattern: str) -> Signatures:
+    signatures = {}
+    for path in Path(directory).glob(pattern):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signatures[path.name] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def fingerprint(signatures: Signatures) -> str:
+    encoded = repr((BUNDLE_VERSION, sorted(signatures.items()))).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def dependency_edges(constants: Dict[str, dict]) -> List[Tuple[str, str]]:
+    """(dependency, dependent) pairs, in catalog order"""
+    return [(dep, constant_id)
+            for constant_id, constant in sorted(constants.items())
+            for dep in constant.get('dependencies', [])
+            if dep != constant_id]
+
+
+class Catalog:
+    """Constant definitions, dependency structure and latest results"""
+
+    def __init__(self, constants: Mapping, results: Mapping, files: Dict[str, str],
+                 edges: List[Tuple[str, str]], order: List[str], source: str):
+        self.constants = constants
+        self.results = results
+        # File name -> constant id
+        self.files = files
+        self.edges = edges
+        self.topological_order = order
+        # 'bundle' or 'json'
+        self.source = source
+        self._index: Optional[DependencyIndex] = None
+
+    def __contains__(self, constant_id: str) -> bool:
+        return constant_id in self.constants
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.constants)
+
+    def __len__(self) -> int:
+        return len(self.constants)
+
+    def get(self, constant_id: str) -> Optional[dict]:
+        return self.constants.get(constant_id)
+
+    def result(self, constant_id: str) -> Optional[dict]:
+        return self.results.get(constant_id)
+
+    def dependencies(self, constant_id: str) -> List[str]:
+        constant = self.constants.get(constant_id) or {}
+        return [d for d in constant.get('dependencies', []) if d != constant_id]
+
+    @property
+    def index(self) -> DependencyIndex:
+        """Dependency index, built from the edges without decoding any definition"""
+        if self._index is None:
+            dependencies: Dict[str, List[str]] = {c: [] for c in self.constants}
+            for dep, constant_id in self.edges:
+                dependencies[constant_id].append(dep)
+            self._index = DependencyIndex({c: {'dependencies': deps} for c, deps in dependencies.items()})
+        return self._index
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Skipping unreadable file {path}: {e}")
+        return None
+
+
+def read_json_catalog(data_dir: Path) -> Catalog:
+    """Parse the JSON sources directly"""
+    data_dir = Path(data_dir)
+    constants, files = {}, {}
+    for path in sorted(data_dir.glob('*.json')):
+        constant = _read_json(path)
+        if constant is not None:
+            constants[constant['id']] = constant
+            files[path.name] = constant['id']
+
+    index = DependencyIndex(constants)
+    catalog = Catalog(constants, read_json_results(data_dir), files, dependency_edges(constants),
+                      index.topological_order, source='json')
+    catalog._index = index
+    return catalog
+
+
+def read_json_results(data_dir: Path) -> Dict[str, dict]:
+    """Latest result of every constant that has one, keyed by constant id"""
+    results = {}
+    for path in sorted(results_dir(data_dir).glob('*_result.json')):
+        result = _read_json(path)
+        if result is not None:
+            results[path.name[:-len('_result.json')]] = result
+    return results
+
+
+class _Records(Mapping):
+    """Records of a mapped bundle, each decoded on first access"""
+
+    def __init__(self, buffer, base: int, index: Dict[str, List[int]]):
+        self._buffer = buffer
+        self._base = base
+        self._index = index
+        self._decoded: Dict[str, dict] = {}
+
+    def __getitem__(self, key: str) -> dict:
+        if key not in self._decoded:
+            offset, length = self._index[key]
+            start = self._base + offset
+            self._decoded[key] = json.loads(self._buffer[start:start + length])
+        return self._decoded[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+
+def build_bundle(data_dir: Optional[Path] = None, path: Optional[Path] = None) -> Path:
+    """Compile the JSON sources into a bundle, replacing it atomically"""
+    data_dir = Path(data_dir) if data_dir else default_data_dir()
+    path = Path(path) if path else bundle_path(data_dir)
+    # Signatures first: a file changing while we read makes the bundle stale, not wrong
+    data_signatures = file_signatures(data_dir, '*.json')
+    result_signatures = file_signatures(results_dir(data_dir), '*_result.json')
+    catalog = read_json_catalog(data_dir)
+
+    records = []
+    position = 0
+
+    def add(record: dict) -> List[int]:
+        nonlocal position
+        encoded = json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode()
+        records.append(encoded)
+        position += len(encoded)
+        return [position - len(encoded), len(encoded)]
+
+    constants_index = {c: add(catalog.constants[c]) for c in catalog.constants}
+    results_index = {c: add(catalog.results[c]) for c in catalog.results}
+    header = {
+        'version': BUNDLE_VERSION,
+        'data_fingerprint': fingerprint(data_signatures),
+        'results_fingerprint': fingerprint(result_signatures),
+        'files': catalog.files,
+        'edges': catalog.edges,
+        'topological_order': catalog.topological_order,
+        'constants': constants_index,
+        'results': results_index,
+    }
+    encoded_header = json.dumps(header, separators=(',', ':'), ensure_ascii=False).encode()
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, BUNDLE_VERSION, len(encoded_header)))
+        f.write(encoded_header)
+        for record in records:
+            f.write(record)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote catalog bundle with {len(constants_index)} constants and "
+                f"{len(results_index)} results to {path}")
+    return path
+
+
+def open_bundle(path: Path) -> Optional[Tuple[dict, mmap.mmap, int]]:
+    """
+    Header, mapping and position of the first record of a bundle, or None
+    if it is missing or unreadable
+    """
+    try:
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, header_length = PREFIX.unpack_from(buffer, 0)
+        if magic != MAGIC or version != BUNDLE_VERSION:
+            raise ValueError(f"not a version {BUNDLE_VERSION} catalog bundle")
+        header = json.loads(buffer[PREFIX.size:PREFIX.size + header_length])
+    except (struct.error, ValueError) as e:
+        logger.warning(f"Ignoring catalog bundle {path}: {e}")
+        buffer.close()
+        return None
+    return header, buffer, PREFIX.size + header_length
+
+
+def load_catalog(data_dir: Optional[Path] = None, path: Optional[Path] = None) -> Catalog:
+    """
+    The catalog from the bundle when it matches the JSON sources, otherwise
+    parsed from the JSON files. Results are checked separately, so new
+    results alone do not cost a re-parse of the definitions.
+    """
+    data_dir = Path(data_dir) if data_dir else default_data_dir()
+    path = Path(path) if path else bundle_path(data_dir)
+    opened = open_bundle(path)
+    if opened is None:
+        return read_json_catalog(data_dir)
+
+    header, buffer, base = opened
+    if header['data_fingerprint'] != fingerprint(file_signatures(data_dir, '*.json')):
+        logger.info(f"Catalog bundle {path} is stale, reading {data_dir}")
+        buffer.close()
+        return read_json_catalog(data_dir)
+
+    results = _Records(buffer, base, header['results'])
+    if header['results_fingerprint'] != fingerprint(file_signatures(results_dir(data_dir), '*_result.json')):
+        results = read_json_results(data_dir)
+    return Catalog(_Records(buffer, base, header['constants']), results, header['files'],
+                   [tuple(edge) for edge in header['edges']], header['topological_order'],
+                   source='bundle')
+
+
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    build_bundle(Path(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Indexed CODATA reference values
+
+Parses the fixed-width NIST listing in constants/codata/<release>.txt
+(quantity, value, uncertainty, unit; digits in groups of three separated
+by spaces, '...' marking truncated exact values, exponents as a separate
+'e-27' group) into a binary table: a memory-mappable .npy of values and
+uncertainties next to a JSON header with the quantity names, units and
+the SHA-256 of the listing it was parsed from.
+
+    python codata.py              # parses 2022.txt and writes the cache
+
+load_codata() reuses the cached table while the listing's hash matches
+and re-parses it otherwise. Lookups are a dictionary hit by exact name or
+a binary search by name prefix (case-insensitive).
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# constants/ sits next to the service in the container and one level up in the repository
+_HERE = Path(__file__).resolve().parent
+CODATA_DIR = next((d / 'constants' / 'codata' for d in (_HERE, _HERE.parent) if (d / 'constants' / 'codata').exists()),
+                  _HERE.parent / 'constants' / 'codata')
+CACHE_DIR = Path(os.environ.get('COMPUTE_CODATA_CACHE', _HERE))
+DEFAULT_RELEASE = '2022'
+
+# Column boundaries of the listing
+NAME_END, VALUE_END, UNCERTAINTY_END = 60, 85, 110
+EXACT = '(exact)'
+
+ROW_DTYPE = np.dtype([('value', 'f8'), ('uncertainty', 'f8'), ('exact', '?')])
+
+# Catalog constants measured by CODATA: id -> (quantity, factor to the catalog's unit)
+REFERENCES = {
+    'alpha': ('fine-structure constant', 1.0),
+    'g_f': ('Fermi coupling constant', 1.0),
+    'm_e': ('electron mass energy equivalent in MeV', 1.0),
+    'm_mu': ('muon mass energy equivalent in MeV', 1.0),
+    'm_p': ('proton mass energy equivalent in MeV', 1.0),
+    'm_planck': ('Planck mass energy equivalent in GeV', 1.0),
+    'm_tau': ('tau energy equivalent', 1e-3),
+    'sin2_theta_w': ('weak mixing angle', 1.0),
+}
+
+# Tables already loaded in this process, by release
+_loaded: Dict[str, 'CodataTable'] = {}
+
+
+class CodataEntry(NamedTuple):
+    name: str
+    value: float
+    uncertainty: float
+    unit: str
+    exact: bool
+
+    @property
+    def relative_uncertainty(self) -> float:
+        return self.uncertainty / abs(self.value) if self.value else 0.0
+
+
+def parse_number(text: str) -> float:
+    """'6.644 657 3450 e-27' -> 6.6446573450e-27; '1.054 571 817... e-34' -> 1.054571817e-34"""
+    mantissa, _, exponent = text.replace('...', '').strip().partition(' e')
+    number = mantissa.replace(' ', '')
+    if exponent:
+        number += 'e' + exponent.strip()
+    return float(number)
+
+
+def parse_listing(text: str) -> List[CodataEntry]:
+    """All entries below the dashed line of a CODATA listing, in file order"""
+    lines = text.splitlines()
+    start = next((i + 1 for i, line in enumerate(lines) if line.startswith('-----')), None)
+    if start is None:
+        raise ValueError("Not a CODATA listing: no dashed line above the table")
+
+    entries = []
+    for number, line in enumerate(lines[start:], start=start + 1):
+        if not line.strip():
+            continue
+        name = line[:NAME_END].strip()
+        value = line[NAME_END:VALUE_END].strip()
+        uncertainty = line[VALUE_END:UNCERTAINTY_END].strip()
+        if not name or not value or not uncertainty:
+            raise ValueError(f"Malformed CODATA line {number}: {line!r}")
+        exact = uncertainty == EXACT
+        entries.append(CodataEntry(
+            name=name,
+            value=parse_number(value),
+            uncertainty=0.0 if exact else parse_number(uncertainty),
+            unit=line[UNCERTAINTY_END:].strip(),
+            exact=exact
+        ))
+    return entries
+
+
+class CodataTable:
+    """Reference values of one release, indexed by quantity name"""
+
+    def __init__(self, release: str, names: List[str], units: List[str], rows: np.ndarray,
+                 source_hash: str):
+        self.release = release
+        self.names = names
+        self.units = units
+        self.rows = rows
+        self.source_hash = source_hash
+        self._index = {name: i for i, name in enumerate(names)}
+        # Names sorted case-insensitively, for prefix searches
+        self._sorted = sorted((name.lower(), i) for i, name in enumerate(names))
+        self._sorted_keys = [key for key, _ in self._sorted]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __getitem__(self, name: str) -> CodataEntry:
+        return self._entry(self._index[name])
+
+    def get(self, name: str) -> Optional[CodataEntry]:
+        i = self._index.get(name)
+        return None if i is None else self._entry(i)
+
+    def value(self, name: str) -> float:
+        return float(self.rows['value'][self._index[name]])
+
+    def lookup(self, prefix: str) -> List[CodataEntry]:
+        """Entries whose name starts with prefix, ignoring case, in name order"""
+        key = prefix.lower()
+        start = bisect.bisect_left(self._sorted_keys, key)
+        matches = []
+        for name, i in self._sorted[start:]:
+            if not name.startswith(key):
+                break
+            matches.append(self._entry(i))
+        return matches
+
+    def _entry(self, i: int) -> CodataEntry:
+        row = self.rows[i]
+        return CodataEntry(self.names[i], float(row['value']), float(row['uncertainty']),
+                           self.units[i], bool(row['exact']))
+
+
+def scaled(value: float, scale: float) -> float:
+    """value * scale without the last-digit noise of a decimal unit factor"""
+    return float(f"{value * scale:.15g}")
+
+
+def reference_value(table: CodataTable, constant_id: str) -> Optional[float]:
+    """CODATA value of a catalog constant in the catalog's unit, if CODATA lists it"""
+    if constant_id not in REFERENCES:
+        return None
+    quantity, scale = REFERENCES[constant_id]
+    return scaled(table.value(quantity), scale)
+
+
+def listing_path(release: str) -> Path:
+    return CODATA_DIR / f"{release}.txt"
+
+
+def cache_path(release: str) -> Path:
+    return CACHE_DIR / f"codata_{release}.npy"
+
+
+def parse_table(release: str, text: str, source_hash: str) -> CodataTable:
+    entries = parse_listing(text)
+    rows = np.array([(e.value, e.uncertainty, e.exact) for e in entries], dtype=ROW_DTYPE)
+    return CodataTable(release, [e.name for e in entries], [e.unit for e in entries], rows, source_hash)
+
+
+def write_cache(table: CodataTable, path: Path):
+    np.save(path, table.rows)
+    header = {'release': table.release, 'source_hash': table.source_hash,
+              'names': table.names, 'units': table.units}
+    path.with_suffix('.json').write_text(json.dumps(header, ensure_ascii=False))
+
+
+def read_cache(path: Path, source_hash: str) -> Optional[CodataTable]:
+    """The cached table, or None if it is missing or was parsed from other content"""
+    try:
+        header = json.loads(path.with_suffix('.json').read_text())
+        if header['source_hash'] != source_hash:
+            return None
+        rows = np.load(path, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    if rows.dtype != ROW_DTYPE or len(rows) != len(header['names']):
+        return None
+    return CodataTable(header['release'], header['names'], header['units'], rows, source_hash)
+
+
+def load_codata(release: str = DEFAULT_RELEASE, path: Optional[Path] = None,
+                cache: Optional[Path] = None) -> CodataTable:
+    """Table of a release, from the process, the binary cache or a fresh parse"""
+    path = Path(path) if path else listing_path(release)
+    cache = Path(cache) if cache else cache_path(release)
+    data = path.read_bytes()
+    source_hash = hashlib.sha256(data).hexdigest()
+
+    table = _loaded.get(release)
+    if table is not None and table.source_hash == source_hash:
+        return table
+
+    table = read_cache(cache, source_hash)
+    if table is None:
+        table = parse_table(release, data.decode('utf-8'), source_hash)
+        try:
+            write_cache(table, cache)
+        except OSError as e:
+            # Read-only deployments still work, they just parse once per process
+            logger.warning(f"Could not write CODATA cache {cache}: {e}")
+    _loaded[release] = table
+    return table
+
+
+if __name__ == '__main__':
+    import sys
+    release = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RELEASE
+    table = load_codata(release)
+    print(f"CODATA {release}: {len(table)} quantities cached in {cache_path(release)}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Transitive dependency index of the constants catalog
+
+Built once per catalog version from the definitions' dependency lists:
+ancestor and descendant sets for every constant, one global topological
+order and the exact path of every dependency cycle. Notebook generation,
+batch planning and the service query it instead of walking definitions
+per constant.
+
+Dependencies on ids that are not in the catalog, and on the constant
+itself, are ignored.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Set
+
+
+class DependencyCycleError(ValueError):
+    """Raised when an order is requested for constants on a dependency cycle"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Dependency cycle: {' -> '.join(cycle)}")
+
+
+class DependencyIndex:
+    """Ancestors, descendants and topological order of a catalog"""
+
+    def __init__(self, constants: Mapping[str, dict]):
+        self.dependencies: Dict[str, List[str]] = {
+            constant_id: [d for d in dict.fromkeys(constant.get('dependencies', []))
+                          if d in constants and d != constant_id]
+            for constant_id, constant in constants.items()
+        }
+        self.dependents: Dict[str, List[str]] = {c: [] for c in self.dependencies}
+        for constant_id in sorted(self.dependencies):
+            for dep in self.dependencies[constant_id]:
+                self.dependents[dep].append(constant_id)
+
+        self.cycles = self._find_cycles()
+        self.topological_order = self._order()
+        self.position = {c: i for i, c in enumerate(self.topological_order)}
+
+        self.ancestors: Dict[str, FrozenSet[str]] = {}
+        self.descendants: Dict[str, FrozenSet[str]] = {}
+        for constant_id in self.dependencies:
+            self.ancestors[constant_id] = frozenset(self._reach(constant_id, self.dependencies))
+            self.descendants[constant_id] = frozenset(self._reach(constant_id, self.dependents))
+
+    def __contains__(self, constant_id: str) -> bool:
+        return constant_id in self.dependencies
+
+    def __len__(self) -> int:
+        return len(self.dependencies)
+
+    @property
+    def is_acyclic(self) -> bool:
+        return not self.cycles
+
+    @staticmethod
+    def _reach(start: str, edges: Dict[str, List[str]]) -> Set[str]:
+        seen, stack = set(), list(edges[start])
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(edges[node])
+        seen.discard(start)
+        return seen
+
+    def _find_cycles(self) -> List[List[str]]:
+        """One path per cycle found by depth-first search, first node repeated at the end"""
+        cycles = []
+        state: Dict[str, int] = {}  # 1 on the current path, 2 finished
+        for root in sorted(self.dependencies):
+            if root in state:
+                continue
+            path = [root]
+            state[root] = 1
+            stack = [iter(self.dependencies[root])]
+            while stack:
+                node = next(stack[-1], None)
+                if node is None:
+                    stack.pop()
+                    state[path.pop()] = 2
+                elif state.get(node) == 1:
+                    cycles.append(path[path.index(node):] + [node])
+                elif node not in state:
+                    state[node] = 1
+                    path.append(node)
+                    stack.append(iter(self.dependencies[node]))
+        return cycles
+
+    def _order(self) -> List[str]:
+        """
+        Dependencies first, ties broken by id. Constants on or behind a
+        cycle cannot be ordered and follow in id order.
+        """
+        remaining = {c: len(deps) for c, deps in self.dependencies.items()}
+        ready = sorted(c for c, n in remaining.items() if n == 0)
+        order = []
+        while ready:
+            constant_id = ready.pop(0)
+            order.append(constant_id)
+            released = []
+            for dependent in self.dependents[constant_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    released.append(dependent)
+            if released:
+                ready = sorted(ready + released)
+        ordered = set(order)
+        return order + sorted(c for c in self.dependencies if c not in ordered)
+
+    def cycle_through(self, constant_ids: Iterable[str]) -> List[str]:
+        """Path of a cycle touching the given constants, or [] if there is none"""
+        constant_ids = set(constant_ids)
+        for cycle in self.cycles:
+            if constant_ids.intersection(cycle):
+                return cycle
+        return []
+
+    def closure(self, constant_ids: Iterable[str]) -> Set[str]:
+        """The given constants and all their transitive dependencies in the catalog"""
+        result = set()
+        for constant_id in constant_ids:
+            if constant_id in self.dependencies:
+                result.add(constant_id)
+                result.update(self.ancestors[constant_id])
+        return result
+
+    def order(self, constant_ids: Iterable[str]) -> List[str]:
+        """
+        The given constants in global topological order; raises
+        DependencyCycleError naming the path if any of them is on a cycle
+        """
+        constant_ids = [c for c in set(constant_ids) if c in self.dependencies]
+        cycle = self.cycle_through(constant_ids)
+        if cycle:
+            raise DependencyCycleError(cycle)
+        return sorted(constant_ids, key=self.position.__getitem__)
+
+    def levels(self, constant_ids: Iterable[str]) -> List[List[str]]:
+        """
+        The given constants grouped so that every dependency among them is
+        in an earlier level; raises DependencyCycleError on a cycle
+        """
+        depth: Dict[str, int] = {}
+        for constant_id in self.order(constant_ids):
+            depth[constant_id] = 1 + max((depth[d] for d in self.dependencies[constant_id] if d in depth),
+                                         default=-1)
+        levels: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for constant_id in sorted(depth):
+            levels[depth[constant_id]].append(constant_id)
+        return levels
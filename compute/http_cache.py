@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Conditional GET helpers for the compute service
+
+Read endpoints stamp their responses with a strong ETag derived from the
+versions their payload depends on (catalog fingerprint, results
+generation, theory code hash). A matching If-None-Match is answered with
+304 before the payload is built. Compressed representations carry the
+coding as an ETag suffix, as they are different bytes.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+
+from responses import ENCODINGS, body_cache, negotiate_encoding
+
+# Default Cache-Control for versioned JSON responses; no-cache lets clients
+# keep the body but revalidate with If-None-Match on every poll
+CACHE_CONTROL = os.environ.get('COMPUTE_CACHE_CONTROL', 'no-cache')
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the version components of a response"""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def source_hash(*paths: Path) -> str:
+    """Hash of source files, for payloads that depend only on code"""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            digest.update(Path(path).read_bytes())
+        except OSError:
+            digest.update(str(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match matches etag"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or any(
+        representation_etag(etag, encoding) in candidates for encoding in ENCODINGS
+    )
+
+
+def representation_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of the content-coded representation, e.g. "abc-gzip" for "abc"."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def cache_headers(etag: str, cache_control: Optional[str] = None) -> dict:
+    return {'ETag': etag, 'Cache-Control': cache_control or CACHE_CONTROL}
+
+
+def conditional_json(request: Request, etag: str, build: Callable[[], Any],
+                     cache_control: Optional[str] = None) -> Response:
+    """
+    304 if the client holds etag, else the JSON payload from build(),
+    serialized and compressed once per ETag
+    """
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    if not_modified(request, etag):
+        held = representation_etag(etag, encoding)
+        if held not in request.headers.get('if-none-match', ''):
+            held = etag
+        return Response(status_code=304, headers=cache_headers(held, cache_control))
+
+    body, encoding = body_cache.get(etag, build, encoding)
+
+    headers = cache_headers(representation_etag(etag, encoding), cache_control)
+    headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type='application/json', headers=headers)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Deferred imports of heavy dependencies
+
+papermill (with nbformat and jsonschema), sympy and scipy (through the
+theory modules) take seconds to import, most of a cold start. The service
+refers to them through LazyModule proxies, which import the module on
+first attribute access, so each endpoint pays only for what it uses.
+
+Every import done here is timed; import_times feeds the startup report and
+the compute_module_import_seconds metric.
+"""
+
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Module name -> seconds spent importing it
+import_times: Dict[str, float] = {}
+
+_lock = threading.RLock()
+
+
+def timed_import(name: str):
+    """Import a module, recording how long it took if it was not loaded yet"""
+    with _lock:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed = time.perf_counter() - start
+        if name not in import_times:
+            import_times[name] = elapsed
+            logger.info(f"Imported {name} in {elapsed * 1000:.0f} ms")
+    return module
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is used"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    @property
+    def available(self) -> bool:
+        """Whether the module can be found, without importing it"""
+        return self._module is not None or importlib.util.find_spec(self._name) is not None
+
+    def load(self):
+        if self._module is None:
+            self._module = timed_import(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def report(total: Optional[float] = None) -> str:
+    """One-line summary of the timed imports, slowest first"""
+    parts = [f"{name} {seconds * 1000:.0f} ms"
+             for name, seconds in sorted(import_times.items(), key=lambda item: -item[1])]
+    prefix = f"{total * 1000:.0f} ms total; " if total is not None else ''
+    return prefix + (', '.join(parts) if parts else 'no deferred modules loaded')
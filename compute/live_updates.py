@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+WebSocket fan-out of live calculation updates
+
+Every client gets a bounded send queue drained by its own writer task, so
+a slow client only ever delays itself. When a queue is full the oldest
+frame is dropped, or the client is disconnected, depending on the overflow
+policy. Bursts of calculation_complete events are coalesced into a single
+batch frame per window. Publishing only appends to the pending burst and
+is O(1) for the producer.
+"""
+
+import asyncio
+import logging
+import os
+from typing import List, Optional, Set
+
+from fastapi import WebSocket
+
+from responses import dumps
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.environ.get('COMPUTE_WS_QUEUE_SIZE', 256))
+# 'drop_oldest' or 'disconnect'
+OVERFLOW_POLICY = os.environ.get('COMPUTE_WS_OVERFLOW_POLICY', 'drop_oldest')
+COALESCE_WINDOW = float(os.environ.get('COMPUTE_WS_COALESCE_WINDOW', 0.05))
+
+# Event types merged into one {'type': 'batch', 'events': [...]} frame
+COALESCED_TYPES = {'calculation_complete', 'calculation_error'}
+
+# WebSocket close code for clients that cannot keep up
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class ClientConnection:
+    """One WebSocket client with its bounded queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, queue_size: int = QUEUE_SIZE,
+                 policy: str = OVERFLOW_POLICY):
+        if policy not in ('drop_oldest', 'disconnect'):
+            raise ValueError(f"Unknown overflow policy '{policy}'")
+        self.websocket = websocket
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+        self._writer = asyncio.get_event_loop().create_task(self._write())
+
+    def offer(self, frame: str):
+        """Enqueue a serialized frame without waiting"""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if self.policy == 'disconnect':
+                logger.warning("WebSocket client too slow, disconnecting")
+                self.close(CLOSE_TRY_AGAIN_LATER)
+                return
+            self.queue.get_nowait()
+            self.queue.put_nowait(frame)
+            self.dropped += 1
+
+    async def _write(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                await self.websocket.send_text(frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.info(f"WebSocket send failed: {e}")
+            self.closed = True
+
+    def close(self, code: Optional[int] = None):
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.cancel()
+        if code is not None:
+            asyncio.get_event_loop().create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class Broadcaster:
+    """Publishes updates to every connected client"""
+
+    def __init__(self, window: float = COALESCE_WINDOW, queue_size: int = QUEUE_SIZE,
+                 policy: str = OVERFLOW_POLICY):
+        self.window = window
+        self.queue_size = queue_size
+        self.policy = policy
+        self.connections: Set[ClientConnection] = set()
+        self._pending: List[dict] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Frames dropped by clients that have since disconnected
+        self._retired_dropped = 0
+
+    def __len__(self):
+        return len(self.connections)
+
+    @property
+    def dropped(self) -> int:
+        """Frames dropped from full send queues since startup"""
+        return self._retired_dropped + sum(c.dropped for c in self.connections)
+
+    def connect(self, websocket: WebSocket) -> ClientConnection:
+        connection = ClientConnection(websocket, self.queue_size, self.policy)
+        self.connections.add(connection)
+        return connection
+
+    def disconnect(self, connection: ClientConnection):
+        connection.close()
+        self._retire(connection)
+
+    def _retire(self, connection: ClientConnection):
+        if connection in self.connections:
+            self.connections.discard(connection)
+            self._retired_dropped += connection.dropped
+
+    def publish(self, message: dict):
+        """Queue a message for every client; coalesced types wait for the window"""
+        if message.get('type') in COALESCED_TYPES:
+            self._pending.append(message)
+            if self._flush_handle is None:
+                self._flush_handle = asyncio.get_event_loop().call_later(self.window, self.flush)
+            return
+        # Keep ordering: a pending burst goes out before anything published after it
+        self.flush()
+        self._fan_out(message)
+
+    def flush(self):
+        """Send the pending burst now, as one batch frame if it has several events"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        self._fan_out(events[0] if len(events) == 1 else {'type': 'batch', 'events': events})
+
+    def _fan_out(self, message: dict):
+        # Serialized once, shared by every client queue
+        frame = dumps(message).decode('utf-8')
+        for connection in list(self.connections):
+            if connection.closed:
+                self._retire(connection)
+            else:
+                connection.offer(frame)
+
+
+broadcaster = Broadcaster()
@@ -1,25 +1,54 @@
-from fastapi import FastAPI, HTTPException, WebSocket, BackgroundTasks
+import time
+
+# Start of the service's own import, for the cold-start report
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, WebSocket, BackgroundTasks, Request, Response
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any, Union
 import json
 import asyncio
 from pathlib import Path
 import os
-import papermill as pm
-import networkx as nx
 from datetime import datetime
 import logging
 import sys
+import uuid
+
+import anyio
+import numpy as np
+
+from registry import registry
+from http_cache import cache_headers, conditional_json, make_etag, not_modified, source_hash
+from responses import CompressionMiddleware, FastJSONResponse, body_cache, dumps
+from live_updates import broadcaster
+from playground import evaluate, evaluate_batch, expand_range, expression_cache
+from lazy_imports import LazyModule, import_times, report as import_report
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
+import profiling
+from shared_state import SHARED_STATE_PATH, SYNC_INTERVAL, SharedState
+from scheduler import BACKGROUND, BACKGROUND_SLOTS, INTERACTIVE, scheduler
+from reference_store import ReferenceStore, load_reference_store
+
+# Heavy dependencies are imported on first use (see lazy_imports.py):
+# papermill by the first notebook run, scipy by the first theory request
+pm = LazyModule('papermill')
+topological_constants = LazyModule('topological_constants')
+rg_running = LazyModule('rg_running')
 
 # Import topological theory modules
 try:
-    from topological_constants import TopologicalConstants
-    from rg_running import RGRunning
-    HAS_THEORY = True
+    from rg_plots import FORMATS as PLOT_FORMATS, get_running_plot, plot_cache
+    HAS_THEORY = all(module.available for module in
+                     (topological_constants, rg_running, LazyModule('scipy')))
 except ImportError:
     HAS_THEORY = False
 
+SERVICE_IMPORT_SECONDS = time.perf_counter() - _import_start
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,7 +59,16 @@ logger = logging.getLogger(__name__)
 if not HAS_THEORY:
     logger.warning("Topological theory modules not available")
 
-app = FastAPI(title="Topological Constants Compute Service")
+# Theory endpoints depend only on code; their ETags change when it does
+THEORY_VERSION = source_hash(
+    Path(__file__).parent / 'topological_constants.py',
+    Path(__file__).parent / 'rg_running.py'
+)
+
+# Distinguishes results generations of different processes in ETags
+SERVICE_INSTANCE = uuid.uuid4().hex[:12]
+
+app = FastAPI(title="Topological Constants Compute Service", default_response_class=FastJSONResponse)
 
 # CORS configuration
 app.add_middleware(
@@ -40,6 +78,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Data models
 class CalculationRequest(BaseModel):
@@ -59,98 +100,238 @@ class CalculationResult(BaseModel):
     status: str
     error: Optional[str] = None
 
+class BatchCalculationRequest(BaseModel):
+    # Constant ids, or "all" for the whole catalog
+    constant_ids: Union[Literal['all'], List[str]] = 'all'
+    force_recalculate: bool = False
+    max_parallel: Optional[int] = None
+    # Batch sweeps yield to interactive calculations unless asked otherwise
+    priority: Literal['interactive', 'background'] = 'background'
+
 class PlaygroundRequest(BaseModel):
     formula: str
     parameters: Dict[str, float]
     output_unit: Optional[str] = None
 
+class PlaygroundRange(BaseModel):
+    start: float
+    stop: float
+    num: int = 100
+    scale: Literal['linear', 'log'] = 'linear'
+
+class PlaygroundBatchRequest(BaseModel):
+    formula: str
+    # Scalar, array or range per parameter; broadcast NumPy-style
+    parameters: Dict[str, Union[float, List[float], PlaygroundRange]]
+    output_unit: Optional[str] = None
+    # Give every array parameter its own axis instead of broadcasting
+    grid: bool = False
+    # 'json' (columnar) or 'binary' (little-endian float64 result array)
+    format: Literal['json', 'binary'] = 'json'
+
 # Global cache for results
 results_cache: Dict[str, CalculationResult] = {}
 
-# WebSocket connections for live updates
-active_connections: List[WebSocket] = []
+results_cache_hits = metrics.counter('compute_results_cache_hits_total', 'Results cache lookups that hit')
+results_cache_misses = metrics.counter('compute_results_cache_misses_total', 'Results cache lookups that missed')
+# The results cache is unbounded; an eviction is an entry replaced by a newer result
+results_cache_evictions = metrics.counter('compute_results_cache_evictions_total',
+                                          'Results cache entries replaced by a newer result')
+
+# Bumped on every results_cache write, so derived payloads know when to rebuild
+results_generation = 0
+
+# Results, events and work claims shared with the other uvicorn workers,
+# when COMPUTE_SHARED_STATE is set
+shared_state: Optional[SharedState] = SharedState(SHARED_STATE_PATH) if SHARED_STATE_PATH else None
+
+def store_result(constant_id: str, result: CalculationResult):
+    """Cache a calculation result and invalidate payloads derived from results"""
+    global results_generation
+    if constant_id in results_cache:
+        results_cache_evictions.inc()
+    results_cache[constant_id] = result
+    results_generation += 1
+
+async def save_result(constant_id: str, result: CalculationResult):
+    """Cache a new result here and, with shared state, for the other workers"""
+    store_result(constant_id, result)
+    if shared_state is not None:
+        # SQLite may wait on another worker's write; keep that off the event loop
+        await run_in_threadpool(shared_state.put_result, constant_id, result.model_dump())
+
+def cached_result(constant_id: str) -> Optional[CalculationResult]:
+    """Cached result of a constant, counted as a results cache hit or miss"""
+    result = results_cache.get(constant_id)
+    (results_cache_hits if result is not None else results_cache_misses).inc()
+    return result
+
+# /dag payload, keyed by (registry generation, results generation)
+_dag_payload: Dict[str, Any] = {'key': None, 'payload': None}
+
+# Process-wide sampler, when COMPUTE_PROFILE_SAMPLING=1
+stack_dumper: Optional[profiling.PeriodicStackDumper] = None
+
+# Pulls other workers' results and events, when shared state is enabled
+shared_sync_task: Optional[asyncio.Task] = None
+
+async def apply_shared_updates():
+    """Copy results and events published by other workers into this one"""
+    for constant_id, payload in await run_in_threadpool(shared_state.changed_results):
+        local = results_cache.get(constant_id)
+        # Our own writes come back too; they are already cached
+        if local is None or local.timestamp != payload.get('timestamp'):
+            store_result(constant_id, CalculationResult(**payload))
+    for event in await run_in_threadpool(shared_state.other_events):
+        broadcaster.publish(event)
+
+async def sync_shared_state():
+    last_prune = time.monotonic()
+    while True:
+        try:
+            await apply_shared_updates()
+            if time.monotonic() - last_prune > 60:
+                await run_in_threadpool(shared_state.prune_events)
+                last_prune = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Shared state sync failed: {e}")
+        await asyncio.sleep(SYNC_INTERVAL)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the compute service"""
     logger.info("Starting Topological Constants Compute Service")
+    logger.info(f"Service modules imported in {SERVICE_IMPORT_SECONDS * 1000:.0f} ms; "
+                f"deferred imports so far: {import_report()}")
     # Ensure directories exist
     Path("notebooks").mkdir(exist_ok=True)
     Path("results").mkdir(exist_ok=True)
     
-    # Skip pre-calculation for now to avoid startup crashes
-    logger.info("Skipping pre-calculation to avoid startup issues")
-    return
-    
-    # Pre-calculate all constants for caching
-    logger.info("Pre-calculating all constants...")
-    # In local mode, constants are in parent directory
-    constants_dir = Path("../constants/data") if not Path("constants/data").exists() else Path("constants/data")
-    if constants_dir.exists():
-        constant_files = list(constants_dir.glob("*.json"))
-        logger.info(f"Found {len(constant_files)} constants to pre-calculate")
-        
-        # Calculate constants in dependency order
-        calculated = set()
-        max_iterations = 10
-        iteration = 0
-        
-        while len(calculated) < len(constant_files) and iteration < max_iterations:
-            iteration += 1
-            for const_file in constant_files:
-                const_id = const_file.stem
-                if const_id in calculated:
-                    continue
-                
-                # Check if all dependencies are calculated
-                with open(const_file, 'r') as f:
-                    const_data = json.load(f)
-                
-                deps = const_data.get('dependencies', [])
-                if all(dep in calculated or not Path(f"constants/data/{dep}.json").exists() for dep in deps):
-                    # Calculate this constant
-                    try:
-                        logger.info(f"Pre-calculating {const_id}...")
-                        result = await calculate_notebook(const_id, Path(f"constants/notebooks/{const_id}.ipynb"))
-                        if result and result.status == 'completed':
-                            calculated.add(const_id)
-                    except Exception as e:
-                        logger.warning(f"Failed to pre-calculate {const_id}: {e}")
-                        # Mark as calculated to avoid infinite loops
-                        calculated.add(const_id)
-        
-        logger.info(f"Pre-calculation complete. Calculated {len(calculated)} constants.")
+    # Load the constants catalog once and watch it for changes
+    registry.refresh()
+    registry.start_watching()
+    logger.info(f"Loaded {len(registry)} constants from {registry.data_dir}")
+    
+    if profiling.GLOBAL_SAMPLING:
+        global stack_dumper
+        stack_dumper = profiling.PeriodicStackDumper()
+        stack_dumper.start()
+        logger.info(f"Writing sampled stack dumps to {profiling.PROFILE_DIR}")
+    
+    if shared_state is not None:
+        global shared_sync_task
+        shared_sync_task = asyncio.get_event_loop().create_task(sync_shared_state())
+        logger.info(f"Sharing results with other workers through {shared_state.path}")
+    
+    # Fill the results cache in the background; requests are served meanwhile
+    if WARMUP_ENABLED:
+        global warmup_task
+        warmup_task = asyncio.get_event_loop().create_task(run_warmup())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if stack_dumper is not None:
+        stack_dumper.stop()
+    if shared_sync_task is not None:
+        shared_sync_task.cancel()
+    if warmup_task is not None:
+        warmup_task.cancel()
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"status": "healthy", "service": "compute"}
 
+@app.get("/ready")
+async def readiness(require_warm: bool = False):
+    """
+    Readiness for load balancers: ready once the catalog is loaded, while
+    the warm-up keeps filling the cache. With require_warm=true, ready only
+    after the warm-up has finished.
+    """
+    ready = registry.generation > 0 and (not require_warm or warmup.state in ('complete', 'disabled'))
+    return FastJSONResponse(
+        {'ready': ready, 'constants': len(registry.constants), 'warmup': warmup.dict()},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics of this process"""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+def _cache_stats(stat: str) -> Dict[tuple, float]:
+    caches = {'body': body_cache, 'expression': expression_cache}
+    if HAS_THEORY:
+        caches['plot'] = plot_cache
+    return {(name,): len(cache) if stat == 'entries' else getattr(cache, stat)
+            for name, cache in caches.items()}
+
+def _thread_pool_stats() -> Dict[tuple, float]:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {('busy',): limiter.borrowed_tokens, ('capacity',): limiter.total_tokens}
+
+def _websocket_queue_stats() -> Dict[tuple, float]:
+    lengths = [connection.queue.qsize() for connection in broadcaster.connections]
+    return {('max',): max(lengths, default=0), ('total',): sum(lengths)}
+
+metrics.gauge('compute_results_cache_entries', 'Cached calculation results',
+              callback=lambda: {(): len(results_cache)})
+metrics.gauge('compute_notebook_slots', 'Notebooks allowed to execute concurrently per batch',
+              callback=lambda: {(): BATCH_PARALLELISM})
+metrics.gauge('compute_thread_pool_threads', 'Worker thread pool usage', ('state',),
+              callback=_thread_pool_stats)
+metrics.counter('compute_cache_hits_total', 'In-process cache hits', ('cache',),
+                callback=lambda: _cache_stats('hits'))
+metrics.counter('compute_cache_misses_total', 'In-process cache misses', ('cache',),
+                callback=lambda: _cache_stats('misses'))
+metrics.counter('compute_cache_evictions_total', 'In-process cache evictions', ('cache',),
+                callback=lambda: _cache_stats('evictions'))
+metrics.gauge('compute_cache_entries', 'In-process cache entries', ('cache',),
+              callback=lambda: _cache_stats('entries'))
+metrics.gauge('compute_websocket_connections', 'Connected WebSocket clients',
+              callback=lambda: {(): len(broadcaster)})
+metrics.gauge('compute_websocket_send_queue_frames', 'Frames waiting in WebSocket send queues', ('stat',),
+              callback=_websocket_queue_stats)
+metrics.counter('compute_websocket_dropped_frames_total', 'Frames dropped from full WebSocket send queues',
+                callback=lambda: {(): broadcaster.dropped})
+metrics.gauge('compute_module_import_seconds', 'Import time of the service and of each deferred module',
+              ('module',), callback=lambda: {('main',): SERVICE_IMPORT_SECONDS,
+                                             **{(name,): t for name, t in import_times.items()}})
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: Literal['summary', 'pstats', 'folded'] = 'summary'):
+    """Artifact of a profiled request (see profiling.py)"""
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    suffix = {'summary': 'txt', 'pstats': 'pstats', 'folded': 'folded'}[format]
+    path = profiling.profile_path(profile_id, suffix)
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    if format == 'pstats':
+        return Response(path.read_bytes(), media_type='application/octet-stream')
+    return Response(path.read_text(), media_type='text/plain')
+
 @app.get("/dag")
-async def get_dependency_graph():
+async def get_dependency_graph(request: Request):
     """Get the dependency graph of all constants"""
-    # In local mode, constants are in parent directory
-    constants_dir = Path("../constants/data") if not Path("constants/data").exists() else Path("constants/data")
-    graph = nx.DiGraph()
-    
-    # Load all constants and build graph
-    for json_file in constants_dir.glob("*.json"):
-        with open(json_file, 'r') as f:
-            constant = json.load(f)
-            
-        const_id = constant['id']
-        graph.add_node(const_id, **constant)
-        
-        # Add edges for dependencies
-        for dep in constant.get('dependencies', []):
-            graph.add_edge(dep, const_id)
+    etag = make_etag('dag', registry.fingerprint, SERVICE_INSTANCE, results_generation)
+    return conditional_json(request, etag, build_dependency_graph)
+
+def build_dependency_graph() -> Dict[str, Any]:
+    """DAG payload, rebuilt only when the catalog or the results change"""
+    key = (registry.generation, results_generation)
+    if _dag_payload['key'] == key:
+        return _dag_payload['payload']
+    
+    graph = registry.graph
     
     # Convert to JSON-serializable format
     nodes = []
     edges = []
     
     for node_id in graph.nodes():
-        node_data = graph.nodes[node_id]
+        node_data = registry.get(node_id) or {}
         
         # Get calculated value from cache if available
         theory_value = None
@@ -193,12 +374,248 @@ async def get_dependency_graph():
     for source, target in graph.edges():
         edges.append({'source': source, 'target': target})
     
-    return {
+    payload = {
         'nodes': nodes,
         'edges': edges,
-        'is_acyclic': nx.is_directed_acyclic_graph(graph)
+        'is_acyclic': registry.is_acyclic
+    }
+    _dag_payload['key'] = key
+    _dag_payload['payload'] = payload
+    return payload
+
+# Notebooks executed concurrently within one topological level
+BATCH_PARALLELISM = int(os.environ.get('COMPUTE_BATCH_PARALLELISM', 4))
+
+notebook_duration = metrics.histogram('compute_notebook_duration_seconds',
+                                      'Notebook execution time per constant', ('constant_id',))
+notebooks_in_flight = metrics.gauge('compute_notebooks_in_flight', 'Notebooks currently executing')
+calculations_queued = metrics.gauge('compute_calculations_queued',
+                                    'Batch calculations waiting for a free execution slot')
+
+def plan_batch(constant_ids: Union[str, List[str]]) -> List[List[str]]:
+    """Topological levels of the requested constants and their dependency closure"""
+    if constant_ids == 'all':
+        constant_ids = list(registry)
+    unknown = [c for c in constant_ids if c not in registry]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Constants not found: {', '.join(unknown)}")
+    try:
+        return registry.topological_levels(registry.closure(constant_ids))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def run_batch(levels: List[List[str]], force_recalculate: bool = False,
+                    max_parallel: Optional[int] = None, priority: str = BACKGROUND):
+    """
+    Execute levels in order, up to max_parallel notebooks at a time within
+    a level. Every constant is computed at most once; yields one entry per
+    constant as soon as it finishes.
+    
+    Notebooks run exactly as POST /calculate/{id} runs them, so a batch and
+    a single calculation give the same value. Dependency results are not
+    injected: the inline dependency code in the generated notebooks uses
+    reference inputs (v_h = 246.22 GeV, ...), not the standalone predictions.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_parallel or BATCH_PARALLELISM))
+    
+    async def run_one(level: int, constant_id: str) -> Dict[str, Any]:
+        calculations_queued.inc()
+        async with semaphore:
+            calculations_queued.dec()
+            start = time.perf_counter()
+            result = None if force_recalculate else cached_result(constant_id)
+            cached = result is not None
+            error = None
+            if not cached:
+                notebook_path = Path(f"constants/notebooks/{constant_id}.ipynb")
+                if not notebook_path.exists():
+                    error = 'Notebook not found. Run generate_notebooks.py first.'
+                else:
+                    # One failing constant must not abort the rest of the batch
+                    try:
+                        result = await calculate_shared(constant_id, notebook_path, priority=priority)
+                    except Exception as e:
+                        logger.error(f"Batch calculation of {constant_id} failed: {e}")
+                        error = str(e)
+            entry = {
+                'constant_id': constant_id,
+                'level': level,
+                'cached': cached,
+                'elapsed_ms': (time.perf_counter() - start) * 1000,
+                'status': result.status if result else 'error',
+                'result': result
+            }
+            if error is not None:
+                entry['error'] = error
+            return entry
+    
+    for level, constant_ids in enumerate(levels):
+        tasks = [asyncio.ensure_future(run_one(level, c)) for c in constant_ids]
+        for task in asyncio.as_completed(tasks):
+            yield await task
+
+class BatchSummary:
+    """Running totals of a batch, so streaming never holds all results"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = self.cached = self.computed = self.errors = 0
+    
+    def add(self, entry: Dict[str, Any]):
+        self.total += 1
+        self.cached += entry['cached']
+        self.computed += not entry['cached'] and entry['result'] is not None
+        self.errors += entry['status'] != 'completed'
+    
+    def dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'cached': self.cached,
+            'computed': self.computed,
+            'errors': self.errors,
+            'elapsed_ms': (time.perf_counter() - self.start) * 1000
+        }
+
+# Background warm-up of the whole catalog after startup
+WARMUP_ENABLED = os.environ.get('COMPUTE_WARMUP', '1') == '1'
+WARMUP_PARALLELISM = int(os.environ.get('COMPUTE_WARMUP_PARALLELISM', BACKGROUND_SLOTS))
+
+class WarmupProgress:
+    """State of the warm-up, reported by /ready"""
+    
+    def __init__(self):
+        self.state = 'pending' if WARMUP_ENABLED else 'disabled'
+        self.planned = 0
+        self.summary: Optional[BatchSummary] = None
+        self.error: Optional[str] = None
+    
+    def dict(self) -> Dict[str, Any]:
+        progress = {'state': self.state, 'planned': self.planned}
+        if self.summary is not None:
+            progress.update(self.summary.dict())
+        if self.error is not None:
+            progress['error'] = self.error
+        return progress
+
+warmup = WarmupProgress()
+warmup_task: Optional[asyncio.Task] = None
+
+async def run_warmup():
+    """Calculate every constant in topological order at background priority"""
+    warmup.state = 'running'
+    warmup.summary = BatchSummary()
+    try:
+        levels = registry.topological_levels(list(registry))
+        warmup.planned = sum(len(level) for level in levels)
+        logger.info(f"Warm-up of {warmup.planned} constants started")
+        async for entry in run_batch(levels, max_parallel=WARMUP_PARALLELISM, priority=BACKGROUND):
+            warmup.summary.add(entry)
+    except asyncio.CancelledError:
+        warmup.state = 'cancelled'
+        raise
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        warmup.state = 'failed'
+        warmup.error = str(e)
+        return
+    warmup.state = 'complete'
+    logger.info(f"Warm-up complete: {warmup.dict()}")
+
+@app.post("/calculate/batch")
+async def calculate_batch(request: BatchCalculationRequest):
+    """
+    Calculate many constants (and their dependencies) in dependency order
+
+    Levels only order the execution and bound its parallelism. Each
+    notebook still computes its own dependency chain inline, with the
+    reference inputs it was generated with; the only reuse is that
+    constants already in the results cache are not run again. Injecting
+    dependency results would change the values (see run_batch).
+    """
+    summary = BatchSummary()
+    levels = plan_batch(request.constant_ids)
+    
+    entries = {}
+    async for entry in run_batch(levels, request.force_recalculate, request.max_parallel,
+                                 priority=request.priority):
+        entries[entry['constant_id']] = entry
+        summary.add(entry)
+    
+    return {
+        'levels': levels,
+        'results': {c: entries[c] for level in levels for c in level},
+        'summary': summary.dict()
     }
 
+# Seconds without a result before a batch stream sends a heartbeat frame
+STREAM_HEARTBEAT = float(os.environ.get('COMPUTE_STREAM_HEARTBEAT', 15))
+
+STREAM_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+def stream_frame(record: Dict[str, Any], fmt: str) -> bytes:
+    """One NDJSON line or one SSE event (named after the record type)"""
+    body = dumps(record)
+    if fmt == 'sse':
+        return b'event: ' + record['type'].encode() + b'\ndata: ' + body + b'\n\n'
+    return body + b'\n'
+
+async def stream_batch(levels: List[List[str]], request: BatchCalculationRequest, fmt: str,
+                       heartbeat: Optional[float] = None):
+    """
+    Emit a plan record, one result record per constant as soon as it
+    completes, heartbeats while waiting, and a final summary record
+    """
+    heartbeat = heartbeat or STREAM_HEARTBEAT
+    summary = BatchSummary()
+    yield stream_frame({'type': 'plan', 'levels': levels,
+                        'total': sum(len(level) for level in levels)}, fmt)
+    
+    entries = run_batch(levels, request.force_recalculate, request.max_parallel, priority=request.priority)
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(entries.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+            if not done:
+                yield stream_frame({'type': 'heartbeat', 'completed': summary.total,
+                                    'elapsed_ms': summary.dict()['elapsed_ms']}, fmt)
+                continue
+            try:
+                entry = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+            summary.add(entry)
+            yield stream_frame({'type': 'result', **entry}, fmt)
+    finally:
+        if pending is not None:
+            pending.cancel()
+        await entries.aclose()
+    
+    yield stream_frame({'type': 'summary', **summary.dict()}, fmt)
+
+@app.post("/calculate/batch/stream")
+async def calculate_batch_stream(request: BatchCalculationRequest, http_request: Request,
+                                 format: Optional[Literal['ndjson', 'sse']] = None):
+    """
+    Streaming variant of /calculate/batch: NDJSON by default, Server-Sent
+    Events with format=sse or Accept: text/event-stream
+    """
+    if format is None:
+        format = 'sse' if 'text/event-stream' in http_request.headers.get('accept', '') else 'ndjson'
+    levels = plan_batch(request.constant_ids)
+    return StreamingResponse(
+        stream_batch(levels, request, format),
+        media_type=STREAM_MEDIA_TYPES[format],
+        # Stop reverse proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.post("/calculate/{constant_id}")
 async def calculate_constant(
     constant_id: str,
@@ -210,19 +627,15 @@ async def calculate_constant(
     parameters = request.parameters if request else None
     
     # Check cache first
-    if not force_recalculate and constant_id in results_cache:
+    cached = None if force_recalculate else cached_result(constant_id)
+    if cached is not None:
         logger.info(f"Returning cached result for {constant_id}")
-        return results_cache[constant_id].dict()
+        return cached.dict()
     
     # Check if constant exists
-    const_path = Path(f"constants/data/{constant_id}.json")
-    if not const_path.exists():
+    if registry.get(constant_id) is None:
         raise HTTPException(status_code=404, detail=f"Constant {constant_id} not found")
     
-    # Load constant metadata
-    with open(const_path, 'r') as f:
-        constant = json.load(f)
-    
     # Check if notebook exists
     notebook_path = Path(f"constants/notebooks/{constant_id}.ipynb")
     if not notebook_path.exists():
@@ -231,35 +644,88 @@ async def calculate_constant(
             detail=f"Notebook for {constant_id} not found. Run generate_notebooks.py first."
         )
     
-    # Run calculation immediately and return result
-    result = await calculate_notebook(constant_id, notebook_path, parameters)
+    # Run calculation immediately and return result; runs with default
+    # parameters are shared with concurrent requests and other workers
+    if parameters:
+        result = await calculate_notebook(constant_id, notebook_path, parameters)
+    else:
+        result = await calculate_shared(constant_id, notebook_path)
     return result.dict()
 
-async def calculate_notebook(constant_id: str, notebook_path: Path, parameters: Optional[Dict] = None) -> CalculationResult:
+# Calculations running in this worker, joined by concurrent requests
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def calculate_shared(constant_id: str, notebook_path: Path, parameters: Optional[Dict] = None,
+                           priority: str = INTERACTIVE) -> CalculationResult:
+    """
+    Calculate a constant, or wait for the calculation already running for
+    it in this worker or (with shared state) in another worker
+    """
+    running = _inflight.get(constant_id)
+    if running is None:
+        running = asyncio.ensure_future(calculate_claimed(constant_id, notebook_path, parameters, priority))
+        _inflight[constant_id] = running
+        running.add_done_callback(lambda _: _inflight.pop(constant_id, None))
+    # A disconnecting client must not cancel the calculation for the others
+    return await asyncio.shield(running)
+
+async def calculate_claimed(constant_id: str, notebook_path: Path, parameters: Optional[Dict] = None,
+                            priority: str = INTERACTIVE) -> CalculationResult:
+    """Run the notebook unless another worker holds the claim on the constant"""
+    if shared_state is None:
+        return await calculate_notebook(constant_id, notebook_path, parameters, priority)
+    while True:
+        version = await run_in_threadpool(shared_state.result_version, constant_id)
+        if await run_in_threadpool(shared_state.claim, constant_id):
+            heartbeat = asyncio.ensure_future(renew_claim(constant_id))
+            try:
+                return await calculate_notebook(constant_id, notebook_path, parameters, priority)
+            finally:
+                heartbeat.cancel()
+                await run_in_threadpool(shared_state.release, constant_id)
+        logger.info(f"Waiting for another worker to calculate {constant_id}")
+        while await run_in_threadpool(shared_state.is_claimed, constant_id):
+            await asyncio.sleep(SYNC_INTERVAL)
+        if await run_in_threadpool(shared_state.result_version, constant_id) > version:
+            result = CalculationResult(**await run_in_threadpool(shared_state.get_result, constant_id))
+            store_result(constant_id, result)
+            return result
+        # The holder died or hung without a result; take the claim over
+
+async def renew_claim(constant_id: str):
+    """Renew a claim until cancelled, so long notebooks are not taken over"""
+    while True:
+        await asyncio.sleep(shared_state.claim_timeout / 3)
+        try:
+            await run_in_threadpool(shared_state.renew, constant_id)
+        except Exception as e:
+            logger.warning(f"Could not renew the claim on {constant_id}: {e}")
+
+async def calculate_notebook(constant_id: str, notebook_path: Path, parameters: Optional[Dict] = None,
+                             priority: str = INTERACTIVE) -> CalculationResult:
     """Run notebook calculation and return result"""
     try:
-        logger.info(f"Starting calculation for {constant_id}")
-        
-        # Save current directory
-        original_cwd = os.getcwd()
-        
-        try:
-            # Change to notebooks directory for execution
-            os.chdir('constants/notebooks')
-            
-            # Prepare output path (relative to notebooks directory)
-            output_path = Path(f"../../results/{constant_id}_executed.ipynb")
-            
-            # Execute notebook
-            pm.execute_notebook(
-                constant_id + '.ipynb',  # Notebook is in current directory
-                str(output_path),
-                parameters=parameters or {},
-                kernel_name='python3'
-            )
-        finally:
-            # Always restore original directory
-            os.chdir(original_cwd)
+        # Execute in a worker thread with the kernel started in the notebooks
+        # directory; the service's own cwd is left alone so that several
+        # notebooks can run concurrently
+        output_path = Path(f"results/{constant_id}_executed.ipynb").resolve()
+        async with scheduler.slot(priority):
+            logger.info(f"Starting calculation for {constant_id} ({priority})")
+            notebooks_in_flight.inc()
+            try:
+                with notebook_duration.time(constant_id=constant_id):
+                    await run_in_threadpool(
+                        pm.execute_notebook,
+                        str(notebook_path.resolve()),
+                        str(output_path),
+                        parameters=parameters or {},
+                        kernel_name='python3',
+                        language='python',
+                        cwd=str(notebook_path.parent.resolve()),
+                        progress_bar=False
+                    )
+            finally:
+                notebooks_in_flight.dec()
         
         # Read result file (from original working directory)
         result_path = Path(f"constants/results/{constant_id}_result.json")
@@ -268,9 +734,7 @@ async def calculate_notebook(constant_id: str, notebook_path: Path, parameters:
                 result_data = json.load(f)
         else:
             # Try to get basic info from constant metadata
-            const_path = Path(f"constants/data/{constant_id}.json")
-            with open(const_path, 'r') as f:
-                const_data = json.load(f)
+            const_data = registry.get(constant_id) or {}
             
             result_data = {
                 'calculated_value': None,
@@ -302,13 +766,13 @@ async def calculate_notebook(constant_id: str, notebook_path: Path, parameters:
         )
         
         # Cache result
-        results_cache[constant_id] = result
+        await save_result(constant_id, result)
         
         # Notify WebSocket clients
         await broadcast_update({
             'type': 'calculation_complete',
             'constant_id': constant_id,
-            'result': result.dict()
+            'result': result
         })
         
         logger.info(f"Calculation completed for {constant_id}")
@@ -318,18 +782,10 @@ async def calculate_notebook(constant_id: str, notebook_path: Path, parameters:
         logger.error(f"Error calculating {constant_id}: {e}")
         
         # Get basic info from metadata
-        try:
-            const_path = Path(f"constants/data/{constant_id}.json")
-            with open(const_path, 'r') as f:
-                const_data = json.load(f)
-            
-            unit = const_data.get('unit', 'dimensionless')
-            formula = const_data.get('formula', '')
-            ref_value = const_data.get('sources', [{}])[0].get('value')
-        except:
-            unit = 'dimensionless'
-            formula = ''
-            ref_value = None
+        const_data = registry.get(constant_id) or {}
+        unit = const_data.get('unit', 'dimensionless')
+        formula = const_data.get('formula', '')
+        ref_value = (const_data.get('sources') or [{}])[0].get('value')
         
         # Create error result
         result = CalculationResult(
@@ -346,7 +802,7 @@ async def calculate_notebook(constant_id: str, notebook_path: Path, parameters:
         )
         
         # Cache error result
-        results_cache[constant_id] = result
+        await save_result(constant_id, result)
         
         await broadcast_update({
             'type': 'calculation_error',
@@ -358,54 +814,145 @@ async def calculate_notebook(constant_id: str, notebook_path: Path, parameters:
 
 # Add GET endpoint for cached results
 @app.get("/calculate/{constant_id}")
-async def get_calculation(constant_id: str, from_cache: bool = True):
+async def get_calculation(request: Request, constant_id: str, from_cache: bool = True):
     """Get calculation result from cache"""
-    if from_cache and constant_id in results_cache:
-        return results_cache[constant_id].dict()
+    result = cached_result(constant_id) if from_cache else None
+    if result is not None:
+        etag = make_etag('calculate', constant_id, result.timestamp, result.status)
+        return conditional_json(request, etag, result.model_dump)
     else:
         # Return None to indicate no cached result
         return None
 
+@app.get("/results")
+async def get_all_results(request: Request):
+    """All cached calculation results, keyed by constant id"""
+    etag = make_etag('results', SERVICE_INSTANCE, results_generation)
+    return conditional_json(request, etag, lambda: dict(results_cache))
+
+# Reference releases, re-imported only when the catalog changes
+_reference_store: Dict[str, Any] = {'generation': None, 'store': None}
+
+def reference_store() -> ReferenceStore:
+    if _reference_store['generation'] != registry.generation or _reference_store['store'] is None:
+        _reference_store['store'] = load_reference_store({c: registry.get(c) for c in registry})
+        _reference_store['generation'] = registry.generation
+    return _reference_store['store']
+
+@app.get("/references")
+async def get_reference_releases():
+    """Reference releases available for comparison, with their constant counts"""
+    return {'releases': (await run_in_threadpool(reference_store)).summary()}
+
+@app.get("/references/diff")
+async def diff_references(old: str, new: str, status_changes_only: bool = False):
+    """
+    Constants whose reference value differs between two releases, with the
+    relative error and accuracy status of the cached prediction under each.
+    Nothing is recalculated.
+    """
+    store = await run_in_threadpool(reference_store)
+    unknown = [release for release in (old, new) if release not in store]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Reference releases not found: {', '.join(unknown)}")
+    
+    predictions = {constant_id: result.calculated_value for constant_id, result in results_cache.items()
+                   if isinstance(result.calculated_value, (int, float))}
+    changes = store.diff(old, new, predictions)
+    status_changes = [change for change in changes if change.status_changed]
+    return FastJSONResponse({
+        'old': old,
+        'new': new,
+        'changed': len(changes),
+        'status_changes': len(status_changes),
+        'changes': [{**change._asdict(), 'status_changed': change.status_changed}
+                    for change in (status_changes if status_changes_only else changes)]
+    })
+
 @app.post("/playground/run")
 async def run_playground(request: PlaygroundRequest):
     """Execute arbitrary formula with given parameters"""
     try:
-        import sympy as sp
-        from sympy import symbols, pi, sqrt, sin, cos, tan, asin, acos, atan, exp, log
-        
-        # Create symbols from parameters
-        symbol_dict = {}
-        for param_name, param_value in request.parameters.items():
-            symbol_dict[param_name] = param_value
-        
-        # Parse and evaluate formula
-        # Safety: Use sympy's parsing which is safer than eval
-        expr = sp.sympify(request.formula, locals=symbol_dict)
-        
-        # Substitute values
-        for symbol_name, value in request.parameters.items():
-            symbol = sp.Symbol(symbol_name)
-            expr = expr.subs(symbol, value)
+        # Parsed, rendered and compiled once per formula; sympy parsing is
+        # safer than eval
+        lookup_start = time.perf_counter()
+        compiled, cached = expression_cache.get(request.formula, request.parameters)
+        lookup_ms = (time.perf_counter() - lookup_start) * 1000
         
         # Evaluate
-        result = float(expr.evalf())
+        evaluate_start = time.perf_counter()
+        result = evaluate(compiled, request.parameters)
+        evaluate_ms = (time.perf_counter() - evaluate_start) * 1000
         
         return {
             'formula': request.formula,
             'parameters': request.parameters,
             'result': result,
             'unit': request.output_unit or 'dimensionless',
-            'latex': sp.latex(sp.sympify(request.formula))
+            'latex': compiled.latex,
+            'timings': {
+                'cached': cached,
+                'compile_ms': compiled.compile_ms,
+                'lookup_ms': lookup_ms,
+                'evaluate_ms': evaluate_ms
+            }
         }
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error evaluating formula: {str(e)}")
 
+@app.post("/playground/batch")
+async def run_playground_batch(request: PlaygroundBatchRequest):
+    """Evaluate a formula over arrays or ranges of parameter values in one call"""
+    try:
+        lookup_start = time.perf_counter()
+        compiled, cached = expression_cache.get(request.formula, request.parameters)
+        lookup_ms = (time.perf_counter() - lookup_start) * 1000
+        
+        parameters = {
+            name: expand_range(**value.model_dump()) if isinstance(value, PlaygroundRange) else value
+            for name, value in request.parameters.items()
+        }
+        evaluate_start = time.perf_counter()
+        columns, result = evaluate_batch(compiled, parameters, grid=request.grid)
+        evaluate_ms = (time.perf_counter() - evaluate_start) * 1000
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error evaluating formula: {str(e)}")
+    
+    timings = {
+        'cached': cached,
+        'compile_ms': compiled.compile_ms,
+        'lookup_ms': lookup_ms,
+        'evaluate_ms': evaluate_ms
+    }
+    
+    if request.format == 'binary':
+        return Response(
+            np.ascontiguousarray(result, dtype='<f8').tobytes(),
+            media_type='application/octet-stream',
+            headers={
+                'X-Playground-Shape': ','.join(str(n) for n in result.shape),
+                'X-Playground-Latex': compiled.latex.encode('unicode_escape').decode('ascii'),
+                'X-Playground-Timings': json.dumps(timings)
+            }
+        )
+    
+    # Columnar: one flat list per broadcast input plus the result (NaN -> null)
+    return FastJSONResponse({
+        'formula': request.formula,
+        'unit': request.output_unit or 'dimensionless',
+        'latex': compiled.latex,
+        'shape': list(result.shape),
+        'columns': {name: column.ravel() for name, column in columns.items()},
+        'result': result.ravel(),
+        'timings': timings
+    })
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for live updates"""
     await websocket.accept()
-    active_connections.append(websocket)
+    connection = broadcaster.connect(websocket)
     
     try:
         while True:
@@ -415,29 +962,30 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.info(f"WebSocket disconnected: {e}")
     finally:
-        active_connections.remove(websocket)
+        broadcaster.disconnect(connection)
 
 async def broadcast_update(message: dict):
-    """Broadcast update to all connected WebSocket clients"""
-    for connection in active_connections:
-        try:
-            await connection.send_json(message)
-        except:
-            # Remove dead connections
-            active_connections.remove(connection)
+    """Broadcast update to all connected WebSocket clients (never blocks on a client)"""
+    broadcaster.publish(message)
+    if shared_state is not None:
+        await run_in_threadpool(shared_state.publish, message)
 
 # ===========================
 # TOPOLOGICAL THEORY ENDPOINTS
 # ===========================
 
 @app.get("/api/theory/calculate")
-async def calculate_theory_values():
+async def calculate_theory_values(request: Request):
     """Calculate all constants using Topological Fixed Point Theory"""
     if not HAS_THEORY:
         raise HTTPException(status_code=503, detail="Theory modules not available")
     
+    etag = make_etag('theory/calculate', THEORY_VERSION)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    
     try:
-        tc = TopologicalConstants()
+        tc = topological_constants.TopologicalConstants()
         # Calculate all major constants
         results = {
             # Fundamental inputs
@@ -472,42 +1020,93 @@ async def calculate_theory_values():
             }
         }
         
-        return results
+        return FastJSONResponse(results, headers=cache_headers(etag))
     except Exception as e:
         logger.error(f"Theory calculation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# One RG model per process: its coupled Yukawa solution and QCD segments
+# are solved on first use and then shared by every theory request
+_rg_model: Dict[str, Any] = {'model': None}
+
+def rg_model():
+    if _rg_model['model'] is None:
+        _rg_model['model'] = rg_running.RGRunning()
+    return _rg_model['model']
+
 @app.get("/api/theory/rg-running/{scale}")
-async def get_rg_running(scale: float):
-    """Get gauge couplings at a specific energy scale"""
+async def get_rg_running(
+    scale: float,
+    preset: Optional[str] = None,
+    method: Optional[str] = None,
+    rtol: Optional[float] = None,
+    atol: Optional[float] = None
+):
+    """
+    Get gauge couplings at a specific energy scale
+    Any of preset (fast/default/precise), method (LSODA/RK45/DOP853), rtol
+    or atol integrates the RGEs instead of using the lookup table and
+    reports step counts and function evaluations under 'solver'
+    """
     if not HAS_THEORY:
         raise HTTPException(status_code=503, detail="RG running not available")
     
+    solver = {k: v for k, v in
+              {'preset': preset, 'method': method, 'rtol': rtol, 'atol': atol}.items()
+              if v is not None}
     try:
-        rg = RGRunning()
-        couplings = rg.get_couplings_at_scale(scale)
+        rg = rg_model()
+        couplings = rg.get_couplings_at_scale(scale, **solver)
         return couplings
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"RG running calculation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/theory/rg-plot")
+async def get_rg_plot(request: Request, mu_min: float = 100, mu_max: float = 1e16, format: str = 'png'):
+    """Rendered RG running plot (PNG or SVG), cached and served with an ETag"""
+    if not HAS_THEORY:
+        raise HTTPException(status_code=503, detail="RG running not available")
+    if format not in PLOT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}', use one of {sorted(PLOT_FORMATS)}")
+    if not 0 < mu_min < mu_max:
+        raise HTTPException(status_code=400, detail="Require 0 < mu_min < mu_max")
+    
+    try:
+        rg = rg_model()
+        plot = await run_in_threadpool(get_running_plot, rg, mu_min, mu_max, format)
+    except Exception as e:
+        logger.error(f"RG plot rendering failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    headers = cache_headers(plot.etag, 'public, max-age=3600')
+    if not_modified(request, plot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=plot.content, media_type=plot.media_type, headers=headers)
+
 @app.get("/api/theory/cascade/{n}")
-async def get_cascade_vev(n: int):
+async def get_cascade_vev(request: Request, n: int):
     """Get cascade VEV φₙ for level n"""
     if not HAS_THEORY:
         raise HTTPException(status_code=503, detail="Theory modules not available")
     
+    etag = make_etag('theory/cascade', n, THEORY_VERSION)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    
     try:
-        tc = TopologicalConstants()
+        tc = topological_constants.TopologicalConstants()
         phi_n = tc.phi_n(n)
         gamma_n = tc.gamma(n)
         
-        return {
+        return FastJSONResponse({
             'n': n,
             'phi_n': phi_n,
             'gamma_n': gamma_n,
             'energy_scale_GeV': phi_n * tc.M_Pl
-        }
+        }, headers=cache_headers(etag))
     except Exception as e:
         logger.error(f"Cascade calculation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -519,8 +1118,8 @@ async def get_special_scales():
         raise HTTPException(status_code=503, detail="Theory modules not available")
     
     try:
-        rg = RGRunning()
-        tc = TopologicalConstants()
+        rg = rg_model()
+        tc = topological_constants.TopologicalConstants()
         
         special_scales = rg.find_special_scales()
         
@@ -534,13 +1133,17 @@ async def get_special_scales():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/theory/correction-factors")
-async def get_correction_factors():
+async def get_correction_factors(request: Request):
     """Get universal correction factors"""
     if not HAS_THEORY:
         raise HTTPException(status_code=503, detail="Theory modules not available")
     
+    etag = make_etag('theory/correction-factors', THEORY_VERSION)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    
     try:
-        tc = TopologicalConstants()
+        tc = topological_constants.TopologicalConstants()
         
         # Calculate correction factors for a test value
         test_value = 1.0
@@ -578,7 +1181,7 @@ async def get_correction_factors():
             }
         }
         
-        return factors
+        return FastJSONResponse(factors, headers=cache_headers(etag))
     except Exception as e:
         logger.error(f"Correction factors calculation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
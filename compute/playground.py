@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Compiled formulas for the playground
+
+A formula is parsed with sympy once, rendered to LaTeX once and compiled
+with lambdify to a NumPy/SciPy function; the result is kept in an LRU cache
+keyed by the formula text and the parameter names (which shadow sympy
+names such as E or beta while parsing). Evaluating is then a cache lookup
+plus a native function call. Expressions the translation cannot handle
+(symbolic sums, functions SciPy lacks such as polylog) fall back to sympy's
+evalf, point by point.
+
+Batch evaluation takes an array or a range per parameter, broadcasts them
+NumPy-style and evaluates the whole grid in one vectorized call.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Tuple
+
+import numpy as np
+
+from lazy_imports import LazyModule
+
+# sympy takes a third of a second to import; only the playground needs it
+sp = LazyModule('sympy')
+
+# Upper bound on the number of points in one batch evaluation
+MAX_POINTS = int(os.environ.get('COMPUTE_PLAYGROUND_MAX_POINTS', 100_000))
+
+
+class CompiledExpression(NamedTuple):
+    # sympy expression
+    expr: Any
+    latex: str
+    func: Callable
+    # Argument order of func
+    symbols: Tuple[str, ...]
+    compile_ms: float
+
+
+def compile_expression(formula: str, parameter_names: Iterable[str]) -> CompiledExpression:
+    """Parse, render and lambdify a formula; raises on invalid input"""
+    start = time.perf_counter()
+    names = sorted(parameter_names)
+    local_symbols = {name: sp.Symbol(name) for name in names}
+    expr = sp.sympify(formula, locals=local_symbols)
+
+    unbound = sorted(str(s) for s in expr.free_symbols if str(s) not in local_symbols)
+    if unbound:
+        raise ValueError(f"Missing values for {', '.join(unbound)}")
+
+    symbols = tuple(name for name in names if local_symbols[name] in expr.free_symbols)
+    # SciPy first, for special functions (zeta, besselj, ...)
+    func = sp.lambdify([local_symbols[name] for name in symbols], expr, modules=['scipy', 'numpy'])
+    latex = sp.latex(expr)
+    return CompiledExpression(expr, latex, func, symbols, (time.perf_counter() - start) * 1000)
+
+
+class ExpressionCache:
+    """LRU cache of compiled formulas keyed by (formula, parameter names)"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Tuple, CompiledExpression]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, formula: str, parameter_names: Iterable[str]) -> Tuple[CompiledExpression, bool]:
+        """Compiled formula and whether it came from the cache"""
+        key = (formula, tuple(sorted(parameter_names)))
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled, True
+            self.misses += 1
+
+        compiled = compile_expression(formula, key[1])
+        with self._lock:
+            self._entries[key] = compiled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return compiled, False
+
+
+expression_cache = ExpressionCache()
+
+
+def _evalf(compiled: CompiledExpression, values: Tuple[float, ...]) -> float:
+    subs = {sp.Symbol(name): value for name, value in zip(compiled.symbols, values)}
+    return float(compiled.expr.evalf(subs=subs))
+
+
+def evaluate(compiled: CompiledExpression, parameters: Dict[str, float]) -> float:
+    values = tuple(parameters[name] for name in compiled.symbols)
+    try:
+        return float(compiled.func(*values))
+    except (NameError, TypeError, AttributeError):
+        return _evalf(compiled, values)
+
+
+def expand_range(start: float, stop: float, num: int, scale: str = 'linear') -> np.ndarray:
+    """Values of a range specification (stop inclusive)"""
+    if num < 1:
+        raise ValueError("Range needs at least one point")
+    if num > MAX_POINTS:
+        raise ValueError(f"Range of {num} points exceeds the limit of {MAX_POINTS}")
+    if scale == 'linear':
+        return np.linspace(start, stop, num)
+    if scale == 'log':
+        if start <= 0 or stop <= 0:
+            raise ValueError("Log ranges need positive bounds")
+        return np.geomspace(start, stop, num)
+    raise ValueError(f"Unknown range scale '{scale}', expected 'linear' or 'log'")
+
+
+def evaluate_batch(compiled: CompiledExpression, parameters: Dict[str, np.ndarray],
+                   max_points: int = MAX_POINTS,
+                   grid: bool = False) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Broadcast the parameter arrays against each other and evaluate in one
+    call; with grid=True every 1-D parameter gets its own axis (outer
+    product) instead. Returns the broadcast inputs of the non-scalar
+    parameters and the result array, both with the broadcast shape.
+    """
+    arrays = {name: np.asarray(values, dtype=float) for name, values in parameters.items()}
+    if grid:
+        axes = [name for name, a in arrays.items() if a.ndim == 1]
+        for axis, name in enumerate(axes):
+            shape = [1] * len(axes)
+            shape[axis] = -1
+            arrays[name] = arrays[name].reshape(shape)
+    try:
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values()))
+    except ValueError:
+        shapes = ', '.join(f"{name}{a.shape}" for name, a in arrays.items())
+        raise ValueError(f"Parameter shapes do not broadcast: {shapes}")
+    size = int(np.prod(shape))
+    if size > max_points:
+        raise ValueError(f"Batch of {size} points exceeds the limit of {max_points}")
+
+    args = [arrays[name] for name in compiled.symbols]
+    with np.errstate(all='ignore'):
+        try:
+            result = compiled.func(*args)
+        except (NameError, TypeError, AttributeError):
+            if not args:
+                result = _evalf(compiled, ())
+            else:
+                result = np.vectorize(lambda *values: _evalf(compiled, values), otypes=[float])(*args)
+    result = np.broadcast_to(np.asarray(result, dtype=float), shape)
+
+    columns = {name: np.broadcast_to(a, shape) for name, a in arrays.items() if a.ndim > 0}
+    return columns, result
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Reference values of several releases side by side
+
+Each release (a CODATA adjustment, a PDG edition, the values currently in
+the catalog's JSON sources) maps constant ids to a reference value. They
+are imported from local files:
+
+- constants/codata/<year>.txt, through codata.REFERENCES, as 'CODATA <year>'
+- constants/references/*.json, for editions without a CODATA-style
+  listing: {"name": "PDG 2024", "values": {"m_w": {"value": 80.369,
+  "uncertainty": 0.013}, ...}}
+- the catalog itself, as 'catalog': the first source with a value, the
+  same reference the status categorization uses
+
+diff() compares two releases against existing predictions. Only constants
+whose reference changed get their relative error and accuracy status
+recomputed; no calculation is re-run.
+"""
+
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+import codata
+
+logger = logging.getLogger(__name__)
+
+REFERENCES_DIR = codata.CODATA_DIR.parent / 'references'
+CATALOG_RELEASE = 'catalog'
+
+# Constants whose status does not depend on a measurement
+CORE_CONSTANTS = ('c_3', 'phi_0', 'alpha')
+# Largest relative deviation of a validated prediction
+VALIDATED_DEVIATION = 0.10
+
+
+class ReferenceValue(NamedTuple):
+    value: float
+    uncertainty: Optional[float]
+    source: str
+
+
+class ReferenceChange(NamedTuple):
+    constant_id: str
+    old_reference: Optional[float]
+    new_reference: Optional[float]
+    calculated: Optional[float]
+    old_relative_error: Optional[float]
+    new_relative_error: Optional[float]
+    old_status: str
+    new_status: str
+
+    @property
+    def status_changed(self) -> bool:
+        return self.old_status != self.new_status
+
+
+def relative_error(calculated: Optional[float], reference: Optional[float]) -> Optional[float]:
+    if calculated is None or reference is None:
+        return None
+    if reference == 0:
+        return math.inf if calculated != 0 else 0.0
+    return abs((calculated - reference) / reference)
+
+
+def accuracy_status(constant_id: str, calculated: Optional[float], reference: Optional[float]) -> str:
+    """core, validated (within VALIDATED_DEVIATION) or speculative"""
+    if constant_id in CORE_CONSTANTS:
+        return 'core'
+    error = relative_error(calculated, reference)
+    if error is None or error > VALIDATED_DEVIATION:
+        return 'speculative'
+    return 'validated'
+
+
+class ReferenceStore:
+    """Releases indexed by name, each indexed by constant id"""
+
+    def __init__(self):
+        self.releases: Dict[str, Dict[str, ReferenceValue]] = {}
+
+    def __contains__(self, release: str) -> bool:
+        return release in self.releases
+
+    def add(self, release: str, values: Dict[str, ReferenceValue]):
+        self.releases[release] = values
+
+    def get(self, release: str, constant_id: str) -> Optional[ReferenceValue]:
+        return self.releases[release].get(constant_id)
+
+    def summary(self) -> Dict[str, int]:
+        """Number of constants per release"""
+        return {release: len(values) for release, values in sorted(self.releases.items())}
+
+    def import_codata(self, path: Path) -> str:
+        table = codata.load_codata(path.stem, path=path)
+        release = f"CODATA {table.release}"
+        values = {}
+        for constant_id, (quantity, scale) in codata.REFERENCES.items():
+            entry = table.get(quantity)
+            if entry is not None:
+                values[constant_id] = ReferenceValue(codata.scaled(entry.value, scale),
+                                                     codata.scaled(entry.uncertainty, scale), release)
+        self.add(release, values)
+        return release
+
+    def import_json(self, path: Path) -> str:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        release = data.get('name', path.stem)
+        self.add(release, {
+            constant_id: ReferenceValue(float(entry['value']), entry.get('uncertainty'), release)
+            for constant_id, entry in data['values'].items()
+        })
+        return release
+
+    def import_catalog(self, constants: Mapping[str, dict], release: str = CATALOG_RELEASE) -> str:
+        values = {}
+        for constant_id, constant in constants.items():
+            source = next((s for s in constant.get('sources', []) if 'value' in s), None)
+            if source is not None and source['value'] is not None:
+                values[constant_id] = ReferenceValue(float(source['value']), source.get('uncertainty'),
+                                                     source.get('name', release))
+        self.add(release, values)
+        return release
+
+    def diff(self, old: str, new: str, predictions: Mapping[str, float],
+             constant_ids: Optional[Iterable[str]] = None) -> List[ReferenceChange]:
+        """
+        Constants whose reference differs between two releases, with their
+        relative errors and statuses under each; raises KeyError for an
+        unknown release
+        """
+        before, after = self.releases[old], self.releases[new]
+        candidates = set(before) | set(after)
+        if constant_ids is not None:
+            candidates &= set(constant_ids)
+
+        changes = []
+        for constant_id in sorted(candidates):
+            old_ref, new_ref = before.get(constant_id), after.get(constant_id)
+            old_value = old_ref.value if old_ref else None
+            new_value = new_ref.value if new_ref else None
+            if old_value == new_value:
+                continue
+            calculated = predictions.get(constant_id)
+            changes.append(ReferenceChange(
+                constant_id=constant_id,
+                old_reference=old_value,
+                new_reference=new_value,
+                calculated=calculated,
+                old_relative_error=relative_error(calculated, old_value),
+                new_relative_error=relative_error(calculated, new_value),
+                old_status=accuracy_status(constant_id, calculated, old_value),
+                new_status=accuracy_status(constant_id, calculated, new_value)
+            ))
+        return changes
+
+
+def load_reference_store(constants: Optional[Mapping[str, dict]] = None,
+                         codata_dir: Path = codata.CODATA_DIR,
+                         references_dir: Path = REFERENCES_DIR) -> ReferenceStore:
+    """Every release found in the local files, plus the catalog's own references"""
+    store = ReferenceStore()
+    for path in sorted(Path(codata_dir).glob('*.txt')):
+        try:
+            store.import_codata(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping CODATA listing {path}: {e}")
+    for path in sorted(Path(references_dir).glob('*.json')):
+        try:
+            store.import_json(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping reference release {path}: {e}")
+    if constants is not None:
+        store.import_catalog(constants)
+    return store
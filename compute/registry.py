@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Process-wide registry of the constants catalog
+
+Loads every constants/data/*.json once, keeps the parsed definitions, the
+dependency graph and its dependency index in memory, and refreshes only
+the files whose mtime changed (polled from a background task). The first
+load comes from the compiled catalog bundle when it is up to date.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from catalog_bundle import load_catalog
+from dependency_index import DependencyIndex
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_data_dir() -> Path:
+    """constants/data relative to the service root, or to compute/ in local mode"""
+    return Path("../constants/data") if not Path("constants/data").exists() else Path("constants/data")
+
+
+class ConstantsRegistry:
+    """In-memory constants catalog with mtime-based invalidation"""
+
+    def __init__(self, data_dir: Optional[Path] = None, poll_interval: float = 2.0):
+        # Absolute, so notebook execution changing the cwd does not affect lookups
+        self.data_dir = (Path(data_dir) if data_dir else resolve_data_dir()).resolve()
+        self.poll_interval = poll_interval
+
+        # Bumped whenever any definition is added, changed or removed
+        self.generation = 0
+        # Hash of (file, mtime, size) for every loaded file; unlike the
+        # generation it is the same in every process reading the same files
+        self._fingerprint = ''
+
+        self.constants: Dict[str, dict] = {}
+        self.graph = nx.DiGraph()
+        self.index = DependencyIndex({})
+        self.topological_order: List[str] = []
+        self.is_acyclic = True
+
+        self._mtimes: Dict[Path, Tuple[float, int]] = {}
+        self._ids: Dict[Path, str] = {}
+        self._lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def __contains__(self, constant_id: str) -> bool:
+        self._ensure_loaded()
+        return constant_id in self.constants
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return iter(list(self.constants))
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.constants)
+
+    @property
+    def fingerprint(self) -> str:
+        self._ensure_loaded()
+        return self._fingerprint
+
+    def get(self, constant_id: str) -> Optional[dict]:
+        """Parsed definition of a constant, or None if it does not exist"""
+        self._ensure_loaded()
+        return self.constants.get(constant_id)
+
+    def dependencies(self, constant_id: str) -> List[str]:
+        """Direct dependencies of a constant in the catalog"""
+        self._ensure_loaded()
+        return list(self.index.dependencies.get(constant_id, []))
+
+    def closure(self, constant_ids: Iterable[str]) -> Set[str]:
+        """The given constants and all their transitive dependencies in the catalog"""
+        self._ensure_loaded()
+        return self.index.closure(constant_ids)
+
+    def topological_levels(self, constant_ids: Iterable[str]) -> List[List[str]]:
+        """
+        Constants grouped so that every dependency is in an earlier level;
+        raises DependencyCycleError (a ValueError) naming the cycle
+        """
+        self._ensure_loaded()
+        return self.index.levels(constant_ids)
+
+    def _ensure_loaded(self):
+        if self.generation == 0:
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Re-read only added, modified or deleted files and rebuild the graph
+        if anything changed. Returns True when the catalog changed.
+        """
+        with self._lock:
+            current = {}
+            for json_file in self.data_dir.glob("*.json"):
+                try:
+                    stat = json_file.stat()
+                except OSError:
+                    continue
+                current[json_file] = (stat.st_mtime_ns, stat.st_size)
+
+            if self.generation == 0:
+                self._load_catalog(current)
+
+            changed = [p for p, sig in current.items() if self._mtimes.get(p) != sig]
+            removed = [p for p in self._mtimes if p not in current]
+            if not changed and not removed and self.generation > 0:
+                return False
+
+            for path in removed:
+                self.constants.pop(self._ids.pop(path, path.stem), None)
+                del self._mtimes[path]
+
+            for path in changed:
+                try:
+                    with open(path, 'r') as f:
+                        constant = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Keep the last good version while a file is mid-write
+                    logger.warning(f"Skipping unreadable constant file {path}: {e}")
+                    continue
+                old_id = self._ids.get(path)
+                if old_id is not None and old_id != constant['id']:
+                    self.constants.pop(old_id, None)
+                self.constants[constant['id']] = constant
+                self._ids[path] = constant['id']
+                self._mtimes[path] = current[path]
+
+            self._rebuild_graph()
+            self._fingerprint = hashlib.sha256(repr(sorted(
+                (p.name, sig) for p, sig in self._mtimes.items()
+            )).encode()).hexdigest()[:16]
+            self.generation += 1
+            if self.generation > 1:
+                logger.info(f"Constants registry refreshed ({len(changed)} changed, {len(removed)} removed)")
+            return True
+
+    def _load_catalog(self, current: Dict[Path, Tuple[float, int]]):
+        """Initial definitions from the bundle (or one pass over the JSON files)"""
+        catalog = load_catalog(self.data_dir)
+        for name, constant_id in catalog.files.items():
+            path = self.data_dir / name
+            if path in current:
+                self.constants[constant_id] = catalog.constants[constant_id]
+                self._ids[path] = constant_id
+                self._mtimes[path] = current[path]
+        logger.info(f"Constants catalog loaded from {catalog.source}")
+
+    def _rebuild_graph(self):
+        graph = nx.DiGraph()
+        for const_id, constant in self.constants.items():
+            graph.add_node(const_id)
+            for dep in constant.get('dependencies', []):
+                graph.add_edge(dep, const_id)
+
+        self.graph = graph
+        self.index = DependencyIndex(self.constants)
+        self.is_acyclic = self.index.is_acyclic
+        # Constants on a cycle come last, in id order, so callers can still iterate
+        self.topological_order = self.index.topological_order
+        for cycle in self.index.cycles:
+            logger.warning(f"Dependency cycle in the catalog: {' -> '.join(cycle)}")
+
+    async def watch(self):
+        """Poll the data directory for changes until cancelled"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Constants registry refresh failed: {e}")
+
+    def start_watching(self):
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_event_loop().create_task(self.watch())
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+
+registry = ConstantsRegistry()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+JSON serialization and response compression for the compute service
+
+Responses are encoded with orjson when it is installed (falling back to
+compact stdlib json) and compressed with brotli or gzip, whichever the
+client accepts, once they exceed COMPRESSION_MIN_SIZE. Hot payloads are
+serialized and compressed once per ETag and served from BodyCache.
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Responses below this size are not worth compressing
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPUTE_COMPRESSION_MIN_SIZE', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+ENCODINGS = ('br', 'gzip') if HAS_BROTLI else ('gzip',)
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f':
+            # Same as orjson: non-finite values become null
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred supported content coding from an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content coding '{encoding}'")
+
+
+class BodyCache:
+    """
+    Serialized (and lazily compressed) response bodies keyed by ETag,
+    bounded by entry count with least-recently-used eviction
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, Dict[str, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, etag: str, build: Callable[[], Any],
+            encoding: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        """
+        Body for etag, building it on first use, and the content coding
+        applied (None when the body is below COMPRESSION_MIN_SIZE)
+        """
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            entry = {'identity': dumps(build())}
+            with self._lock:
+                self._entries[etag] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        if encoding is None or len(entry['identity']) < COMPRESSION_MIN_SIZE:
+            return entry['identity'], None
+        if encoding not in entry:
+            entry[encoding] = compress(entry['identity'], encoding)
+        return entry[encoding], encoding
+
+
+body_cache = BodyCache()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses above minimum_size with the client's preferred coding.
+    Streaming bodies are compressed chunk by chunk with a sync flush, so
+    every chunk reaches the client as soon as it is produced.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _compressor(self):
+        if self.encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return (compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+                lambda: compressor.flush(zlib.Z_FINISH))
+
+    async def send_compressed(self, message):
+        if message['type'] == 'http.response.start':
+            headers = Headers(raw=message['headers'])
+            # Already encoded (pre-compressed cache entries, images)
+            self.passthrough = ('content-encoding' in headers
+                                or not headers.get('content-type', '').startswith(
+                                    ('application/json', 'application/x-ndjson', 'text/')))
+            self.start_message = message
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start['headers'])
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            if more_body:
+                del headers['Content-Length']
+            else:
+                body = compress(body, self.encoding)
+                headers['Content-Length'] = str(len(body))
+                await self.send(start)
+                await self.send({'type': 'http.response.body', 'body': body})
+                return
+            self.compressor = self._compressor()
+            await self.send(start)
+
+        process, flush, finish = self.compressor
+        chunk = process(body) + (flush() if more_body else finish())
+        await self.send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
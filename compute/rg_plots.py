@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Server-side rendering of RG running plots
+
+Plots are drawn with the headless Agg/SVG canvases (no pyplot state, no
+display) from the RG lookup table and cached as encoded bytes keyed by
+(mu_min, mu_max, RG inputs hash, format), with least-recently-used
+eviction once the cache exceeds its byte budget.
+"""
+
+import hashlib
+import io
+import math
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from rg_table import rg_inputs_hash
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+class RenderedPlot(NamedTuple):
+    content: bytes
+    media_type: str
+    etag: str
+
+
+def running_curves(rg, mu_min: float, mu_max: float, n_points: int = 200):
+    """Inverse couplings α_i⁻¹ (GUT-normalized α₁) on a log-spaced grid"""
+    mu_values = np.logspace(math.log10(mu_min), math.log10(mu_max), n_points)
+    g = np.array([rg.run_gauge_couplings(rg.M_Z, mu) for mu in mu_values])
+
+    alpha1_inv = 4*math.pi/g[:, 0]**2 * 3/5
+    alpha2_inv = 4*math.pi/g[:, 1]**2
+    alpha3_inv = 4*math.pi/g[:, 2]**2
+    return mu_values, alpha1_inv, alpha2_inv, alpha3_inv
+
+
+def render_running_plot(rg, mu_min: float = 100, mu_max: float = 1e16, fmt: str = 'png',
+                        M_GUT: Optional[float] = None) -> bytes:
+    """Render the gauge coupling running to PNG or SVG bytes"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported plot format '{fmt}', expected one of {sorted(FORMATS)}")
+
+    from matplotlib import rc_context
+    from matplotlib.figure import Figure
+
+    mu_values, alpha1_inv, alpha2_inv, alpha3_inv = running_curves(rg, mu_min, mu_max)
+    if M_GUT is None:
+        M_GUT, _ = rg.find_unification_scale()
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    ax.semilogx(mu_values, alpha1_inv, 'b-', label=r'$\alpha_1^{-1}$ (U(1))')
+    ax.semilogx(mu_values, alpha2_inv, 'r-', label=r'$\alpha_2^{-1}$ (SU(2))')
+    ax.semilogx(mu_values, alpha3_inv, 'g-', label=r'$\alpha_3^{-1}$ (SU(3))')
+
+    ax.set_xlabel(r'Energy Scale $\mu$ [GeV]')
+    ax.set_ylabel(r'$\alpha_i^{-1}$')
+    ax.set_title('2-Loop RG Running of Gauge Couplings')
+    ax.grid(True, alpha=0.3)
+    ax.set_xlim(mu_min, mu_max)
+    ax.set_ylim(0, 60)
+
+    # Mark special scales
+    ax.axvline(rg.M_Z, color='gray', linestyle='--', alpha=0.5, label='M_Z')
+    ax.axvline(173, color='orange', linestyle='--', alpha=0.5, label='m_t')
+    ax.axvline(M_GUT, color='purple', linestyle='--', alpha=0.5, label=f'M_GUT = {M_GUT:.2e} GeV')
+
+    ax.legend()
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    # Fixed metadata and SVG id salt keep the output byte-identical for identical inputs
+    metadata = {'Software': None} if fmt == 'png' else {'Date': None, 'Creator': None}
+    with rc_context({'svg.hashsalt': 'rg-running'}):
+        fig.savefig(buffer, format=fmt, dpi=150, metadata=metadata)
+    return buffer.getvalue()
+
+
+class PlotCache:
+    """LRU cache of rendered plots bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Tuple, RenderedPlot]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[RenderedPlot]:
+        with self._lock:
+            plot = self._entries.get(key)
+            if plot is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return plot
+
+    def put(self, key: Tuple, plot: RenderedPlot):
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key).content)
+            self._entries[key] = plot
+            self.size += len(plot.content)
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+                self.evictions += 1
+
+
+plot_cache = PlotCache()
+
+# M_GUT per RG inputs hash, so cached renders do not repeat the minimization
+_unification_scales = {}
+
+
+def plot_key(rg, mu_min: float, mu_max: float, fmt: str) -> Tuple:
+    return (float(mu_min), float(mu_max), rg_inputs_hash(rg), fmt)
+
+
+def get_running_plot(rg, mu_min: float = 100, mu_max: float = 1e16, fmt: str = 'png',
+                     cache: PlotCache = plot_cache) -> RenderedPlot:
+    """Cached rendering; the ETag is the content hash of the encoded image"""
+    key = plot_key(rg, mu_min, mu_max, fmt)
+    plot = cache.get(key)
+    if plot is not None:
+        return plot
+
+    inputs_hash = key[2]
+    if inputs_hash not in _unification_scales:
+        _unification_scales[inputs_hash] = rg.find_unification_scale()[0]
+
+    content = render_running_plot(rg, mu_min, mu_max, fmt, M_GUT=_unification_scales[inputs_hash])
+    plot = RenderedPlot(content, FORMATS[fmt], '"' + hashlib.sha256(content).hexdigest()[:32] + '"')
+    cache.put(key, plot)
+    return plot
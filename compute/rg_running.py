@@ -6,9 +6,85 @@ Based on PyR@TE-style beta functions for Standard Model and beyond
 
 import math
 import numpy as np
-from typing import Dict, Tuple, Optional, List
-from scipy.integrate import odeint
+from functools import lru_cache
+import time
+from typing import Dict, NamedTuple, Tuple, Optional, List
+from scipy.integrate import solve_ivp
 from scipy.optimize import brentq
+from rg_table import load_table
+
+# Integrator settings for RG solves: 'fast' for interactive endpoints,
+# 'precise' for validation runs, 'default' matches scipy's odeint tolerances
+SOLVER_METHODS = ('LSODA', 'RK45', 'DOP853')
+SOLVER_PRESETS = {
+    'fast': {'method': 'RK45', 'rtol': 1e-5, 'atol': 1e-8},
+    'default': {'method': 'LSODA', 'rtol': 1.49012e-8, 'atol': 1.49012e-8},
+    'precise': {'method': 'DOP853', 'rtol': 1e-11, 'atol': 1e-13},
+}
+
+
+def solver_settings(preset: Optional[str] = None, method: Optional[str] = None,
+                    rtol: Optional[float] = None, atol: Optional[float] = None) -> Dict:
+    """Resolve a preset plus explicit overrides into solve_ivp settings"""
+    preset = preset or 'default'
+    if preset not in SOLVER_PRESETS:
+        raise ValueError(f"Unknown solver preset '{preset}', expected one of {sorted(SOLVER_PRESETS)}")
+
+    settings = dict(SOLVER_PRESETS[preset])
+    if method is not None:
+        if method.upper() not in SOLVER_METHODS:
+            raise ValueError(f"Unknown solver method '{method}', expected one of {SOLVER_METHODS}")
+        settings['method'] = method.upper()
+    if rtol is not None:
+        settings['rtol'] = rtol
+    if atol is not None:
+        settings['atol'] = atol
+    if settings['rtol'] <= 0 or settings['atol'] <= 0:
+        raise ValueError("rtol and atol must be positive")
+    return settings
+
+
+def integrate_rge(beta, t_span: Tuple[float, float], y0: np.ndarray, settings: Dict,
+                  dense_output: bool = False):
+    """
+    solve_ivp with the given settings, returning (solution, stats) where stats
+    reports accepted steps, function/Jacobian evaluations and wall time
+    """
+    start = time.perf_counter()
+    sol = solve_ivp(beta, t_span, y0, dense_output=dense_output, **settings)
+    elapsed = time.perf_counter() - start
+    if not sol.success:
+        raise RuntimeError(f"RG integration failed ({settings['method']}): {sol.message}")
+
+    stats = {
+        'method': settings['method'],
+        'rtol': settings['rtol'],
+        'atol': settings['atol'],
+        'n_steps': len(sol.t) - 1,
+        'nfev': int(sol.nfev),
+        'njev': int(sol.njev),
+        'nlu': int(sol.nlu),
+        'elapsed_ms': elapsed * 1000,
+    }
+    return sol, stats
+
+
+# Range and loop order of the coupled gauge + Yukawa solution behind yukawa_top
+COUPLED_MU_MIN = 1.0
+COUPLED_LOOPS = 2
+
+# 2-loop Yukawa-trace contributions to the gauge betas, rows g1, g2, g3,
+# columns Tr(Yu†Yu), Tr(Yd†Yd), Tr(Ye†Ye) (GUT-normalized g1)
+C_YUKAWA_GAUGE = np.array([
+    [17/10, 1/2, 3/2],
+    [3/2, 3/2, 1/2],
+    [2, 2, 0]
+])
+
+
+class RGSolveResult(NamedTuple):
+    g: np.ndarray
+    stats: Dict
 
 class RGRunning:
     """
@@ -16,7 +92,7 @@ class RGRunning:
     Following the structure of PyR@TE for systematic calculation
     """
     
-    def __init__(self):
+    def __init__(self, use_table: bool = True):
         # Standard Model gauge groups
         self.gauge_groups = ['U1', 'SU2', 'SU3']
         
@@ -37,9 +113,18 @@ class RGRunning:
         self.g2_MZ = math.sqrt(4*math.pi*self.alpha_em_MZ / self.sin2_theta_W_MZ)
         self.g3_MZ = math.sqrt(4*math.pi*self.alpha_s_MZ)
         
+        # Flavour-threshold matched QCD running (segments built on first use)
+        self.qcd = ThresholdRunning(alpha_s_MZ=self.alpha_s_MZ, M_Z=self.M_Z)
+        
+        # Coupled gauge + Yukawa solution (integrated on first use)
+        self._coupled: Optional['CoupledRGSolver'] = None
+        
         # Beta function coefficients (2-loop)
         self._compute_beta_coefficients()
         
+        # Precomputed coupling table (None if missing or built from other inputs)
+        self.table = load_table(self) if use_table else None
+        
     def _compute_beta_coefficients(self):
         """
         Compute 1-loop and 2-loop beta function coefficients
@@ -58,13 +143,6 @@ class RGRunning:
             [11/10, 9/2, -26]          # SU(3)_C row
         ])
         
-        # Yukawa contributions to beta functions
-        self.b_yukawa_1loop = {
-            'top': -17/20,     # Top Yukawa contribution to g1
-            'bottom': -1/4,    # Bottom Yukawa contribution
-            'tau': -3/4        # Tau Yukawa contribution
-        }
-        
     def beta_gauge_1loop(self, g: np.ndarray, t: float) -> np.ndarray:
         """
         1-loop beta functions for gauge couplings
@@ -84,8 +162,6 @@ class RGRunning:
         2-loop beta functions for gauge couplings
         Including both gauge and Yukawa contributions
         """
-        g1, g2, g3 = g
-        
         # 1-loop contribution
         beta_1loop = self.beta_gauge_1loop(g, t)
         
@@ -96,76 +172,102 @@ class RGRunning:
                 beta_2loop_gauge[i] += self.b_2loop[i,j] * g[i]**3 * g[j]**2
         beta_2loop_gauge /= (16 * math.pi**2)**2
         
-        # Top Yukawa contribution (dominant)
+        # Top Yukawa contribution (dominant). Never solves: LSODA is not
+        # re-entrant, so the coupled solution must exist before integrating
         mu = self.M_Z * math.exp(t)
-        y_t = self.yukawa_top(mu)
+        if self.table is not None and self.table.covers(mu):
+            y_t = self.table.value(mu, 'y_top')
+        elif self._coupled is not None:
+            y_t = self._coupled_top(mu)
+        else:
+            raise RuntimeError("Coupled Yukawa solution not prepared; call prepare_yukawa() first")
         
-        # Yukawa contributions to gauge beta functions
-        beta_2loop_yukawa = np.array([
-            self.b_yukawa_1loop['top'] * g1**3 * y_t**2,
-            -3 * g2**3 * y_t**2,
-            -8 * g3**3 * y_t**2
-        ]) / (16 * math.pi**2)**2
+        # Yukawa contributions to gauge beta functions, the same coefficients
+        # as the coupled solver with Tr(Yu†Yu) ≈ y_t² (the d and e traces
+        # are below 1e-3 of it and not tracked here)
+        beta_2loop_yukawa = -C_YUKAWA_GAUGE[:, 0] * g**3 * y_t**2 / (16 * math.pi**2)**2
         
         return beta_1loop + beta_2loop_gauge + beta_2loop_yukawa
     
+    @property
+    def coupled(self) -> 'CoupledRGSolver':
+        """Gauge couplings and Yukawa matrices integrated together from M_Z"""
+        if self._coupled is None:
+            self._coupled = CoupledRGSolver(self, loops=COUPLED_LOOPS).solve(
+                mu_min=COUPLED_MU_MIN, mu_max=self.M_Pl)
+        return self._coupled
+    
+    def prepare_yukawa(self, mu_initial: float, mu_final: float):
+        """
+        Solve the coupled running now if y_t between the two scales is not
+        covered by the table, so beta functions only ever look it up
+        """
+        if self.table is None or not (self.table.covers(mu_initial) and self.table.covers(mu_final)):
+            self.coupled  # solved on first access
+    
+    def _coupled_top(self, mu: float) -> float:
+        mu = min(max(mu, COUPLED_MU_MIN), self.M_Pl)
+        return float(np.linalg.norm(self._coupled.couplings_at(mu)['y_u'], 2))
+    
     def yukawa_top(self, mu: float) -> float:
         """
-        Top Yukawa coupling at scale mu
-        Using approximate solution including QCD corrections
+        Top Yukawa coupling at scale mu: the largest singular value of Y_u
+        in the coupled gauge + Yukawa solution. Scales outside the solved
+        range [COUPLED_MU_MIN, M_Pl] are clamped to its edges.
         """
-        # Tree-level relation: y_t = m_t * sqrt(2) / v
-        m_t = 173.0  # GeV
-        v = 246.22   # GeV
-        y_t_0 = m_t * math.sqrt(2) / v
-        
-        # QCD correction factor
-        alpha_s = self.alpha_s(mu)
-        K_QCD = 1 - 4*alpha_s/(3*math.pi)
-        
-        return y_t_0 * K_QCD
+        if self.table is not None and self.table.covers(mu):
+            return self.table.value(mu, 'y_top')
+        self.prepare_yukawa(mu, mu)
+        return self._coupled_top(mu)
     
     def alpha_s(self, mu: float) -> float:
         """
-        Strong coupling at scale mu using 2-loop RGE
+        Strong coupling at scale mu, running with n_f = 3...6 active flavours
         """
-        if mu <= self.M_Z:
-            return self.alpha_s_MZ
-        
-        # 2-loop running
-        t = math.log(mu / self.M_Z)
-        b0 = -self.b3_1loop
-        b1 = -self.b_2loop[2,2]
-        
-        # Solve 2-loop RGE analytically
-        L = b0 * t / (4 * math.pi)
-        alpha_s = self.alpha_s_MZ / (1 + self.alpha_s_MZ * L / (4*math.pi))
-        
-        # 2-loop correction
-        alpha_s *= 1 - (b1/b0) * alpha_s * math.log(1 + self.alpha_s_MZ * L / (4*math.pi)) / (4*math.pi)
-        
-        return alpha_s
+        if self.table is not None and self.table.covers(mu):
+            return self.table.value(mu, 'alpha_s')
+        return self.qcd.alpha_s(mu)
     
     def run_gauge_couplings(self, mu_initial: float, mu_final: float, 
-                           g_initial: Optional[np.ndarray] = None) -> np.ndarray:
+                           g_initial: Optional[np.ndarray] = None, **solver) -> np.ndarray:
         """
         Run gauge couplings from mu_initial to mu_final using 2-loop RGE
         Returns [g1, g2, g3] at mu_final
-        """
-        if g_initial is None:
-            if abs(mu_initial - self.M_Z) < 1e-6:
-                g_initial = np.array([self.g1_MZ, self.g2_MZ, self.g3_MZ])
-            else:
-                # First run from M_Z to mu_initial
-                g_initial = self.run_gauge_couplings(self.M_Z, mu_initial)
         
-        # Set up ODE
-        t_span = [0, math.log(mu_final / mu_initial)]
+        Without solver options (preset, method, rtol, atol) the precomputed
+        table is used when it covers both scales
+        """
+        if g_initial is None and not solver:
+            if self.table is not None and self.table.covers(mu_initial) and self.table.covers(mu_final):
+                return self.table.gauge(mu_final)
         
-        # Solve RGE
-        solution = odeint(self.beta_gauge_2loop, g_initial, t_span)
+        return self.integrate_gauge_couplings(mu_initial, mu_final, g_initial, **solver).g
+    
+    def integrate_gauge_couplings(self, mu_initial: float, mu_final: float,
+                                  g_initial: Optional[np.ndarray] = None,
+                                  preset: Optional[str] = None, method: Optional[str] = None,
+                                  rtol: Optional[float] = None, atol: Optional[float] = None) -> RGSolveResult:
+        """
+        Integrate the 2-loop gauge RGEs with a chosen solver and tolerances
+        Returns [g1, g2, g3] at mu_final together with solver statistics
+        """
+        settings = solver_settings(preset, method, rtol, atol)
         
-        return solution[-1]
+        if g_initial is None:
+            g_initial = np.array([self.g1_MZ, self.g2_MZ, self.g3_MZ])
+            if abs(mu_initial - self.M_Z) >= 1e-6:
+                # Start the integration at M_Z where the boundary conditions live
+                mu_initial = self.M_Z
+        
+        t_span = (0.0, math.log(mu_final / mu_initial))
+        if t_span[1] == 0.0:
+            stats = {**settings, 'n_steps': 0, 'nfev': 0, 'njev': 0, 'nlu': 0, 'elapsed_ms': 0.0}
+            return RGSolveResult(np.array(g_initial, dtype=float), stats)
+        
+        self.prepare_yukawa(mu_initial, mu_final)
+        sol, stats = integrate_rge(lambda t, g: self.beta_gauge_2loop(g, t), t_span,
+                                   np.asarray(g_initial, dtype=float), settings)
+        return RGSolveResult(sol.y[:, -1], stats)
     
     def find_unification_scale(self, threshold: float = 0.01) -> Tuple[float, np.ndarray]:
         """
@@ -195,7 +297,10 @@ class RGRunning:
         """
         Electromagnetic coupling at scale mu
         """
-        g = self.run_gauge_couplings(self.M_Z, mu)
+        return self._alpha_em_from_gauge(self.run_gauge_couplings(self.M_Z, mu))
+    
+    @staticmethod
+    def _alpha_em_from_gauge(g: np.ndarray) -> float:
         g1, g2 = g[0], g[1]
         
         # Relation: 1/alpha_em = 5/(3*g1^2) + 1/g2^2
@@ -206,88 +311,61 @@ class RGRunning:
         """
         Weinberg angle at scale mu
         """
-        g = self.run_gauge_couplings(self.M_Z, mu)
+        return self._sin2_theta_W_from_gauge(self.run_gauge_couplings(self.M_Z, mu))
+    
+    @staticmethod
+    def _sin2_theta_W_from_gauge(g: np.ndarray) -> float:
         g1, g2 = g[0], g[1]
         
         # Definition: sin^2(theta_W) = g1^2 / (g1^2 + g2^2) with GUT normalization
         return (3/5) * g1**2 / (g1**2 + g2**2)
     
-    def plot_running(self, mu_min: float = 100, mu_max: float = 1e16):
+    def plot_running(self, mu_min: float = 100, mu_max: float = 1e16,
+                     output: Optional[str] = None):
         """
         Plot the running of gauge couplings from mu_min to mu_max
+        Renders headlessly and writes the image only when an output path is
+        given (the format follows its suffix); returns the curves
         """
-        import matplotlib.pyplot as plt
-        
-        # Generate scale points (logarithmic)
-        n_points = 100
-        mu_values = np.logspace(math.log10(mu_min), math.log10(mu_max), n_points)
+        from rg_plots import running_curves, render_running_plot
         
-        # Calculate couplings at each scale
-        g1_values = []
-        g2_values = []
-        g3_values = []
-        alpha_values = []
+        if output:
+            fmt = output.rsplit('.', 1)[-1].lower()
+            with open(output, 'wb') as f:
+                f.write(render_running_plot(self, mu_min, mu_max, fmt))
         
-        for mu in mu_values:
-            g = self.run_gauge_couplings(self.M_Z, mu)
-            g1_values.append(g[0])
-            g2_values.append(g[1])
-            g3_values.append(g[2])
-            alpha_values.append(4*math.pi/g[0]**2 * 3/5)  # 1/alpha_1 with GUT normalization
-        
-        # Convert to inverse couplings for better visualization
-        alpha1_inv = [4*math.pi/g**2 * 3/5 for g in g1_values]
-        alpha2_inv = [4*math.pi/g**2 for g in g2_values]
-        alpha3_inv = [4*math.pi/g**2 for g in g3_values]
-        
-        # Plot
-        plt.figure(figsize=(10, 6))
-        plt.semilogx(mu_values, alpha1_inv, 'b-', label=r'$\alpha_1^{-1}$ (U(1))')
-        plt.semilogx(mu_values, alpha2_inv, 'r-', label=r'$\alpha_2^{-1}$ (SU(2))')
-        plt.semilogx(mu_values, alpha3_inv, 'g-', label=r'$\alpha_3^{-1}$ (SU(3))')
-        
-        plt.xlabel(r'Energy Scale $\mu$ [GeV]')
-        plt.ylabel(r'$\alpha_i^{-1}$')
-        plt.title('2-Loop RG Running of Gauge Couplings')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.xlim(mu_min, mu_max)
-        plt.ylim(0, 60)
-        
-        # Mark special scales
-        plt.axvline(self.M_Z, color='gray', linestyle='--', alpha=0.5, label='M_Z')
-        plt.axvline(173, color='orange', linestyle='--', alpha=0.5, label='m_t')
-        
-        # Find and mark unification scale
-        M_GUT, g_GUT = self.find_unification_scale()
-        plt.axvline(M_GUT, color='purple', linestyle='--', alpha=0.5, label=f'M_GUT = {M_GUT:.2e} GeV')
-        
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig('rg_running_2loop.png', dpi=150)
-        plt.show()
-        
-        return mu_values, alpha1_inv, alpha2_inv, alpha3_inv
+        return running_curves(self, mu_min, mu_max, n_points=100)
     
-    def get_couplings_at_scale(self, mu: float) -> Dict[str, float]:
+    def get_couplings_at_scale(self, mu: float, **solver) -> Dict[str, float]:
         """
         Get all relevant couplings at a given scale
+        With solver options the RGEs are integrated and the solver
+        statistics are reported under 'solver'
         """
-        g = self.run_gauge_couplings(self.M_Z, mu)
+        # Fails early with a clear message at non-perturbative scales
+        alpha_s = self.alpha_s(mu)
+        stats = None
+        if solver:
+            g, stats = self.integrate_gauge_couplings(self.M_Z, mu, **solver)
+        else:
+            g = self.run_gauge_couplings(self.M_Z, mu)
         
-        return {
+        couplings = {
             'scale': mu,
             'g1': g[0],
             'g2': g[1],
             'g3': g[2],
-            'alpha_em': self.alpha_em(mu),
-            'alpha_s': self.alpha_s(mu),
-            'sin2_theta_W': self.sin2_theta_W(mu),
+            'alpha_em': self._alpha_em_from_gauge(g),
+            'alpha_s': alpha_s,
+            'sin2_theta_W': self._sin2_theta_W_from_gauge(g),
             'alpha_1_inv': 4*math.pi/(g[0]**2) * 3/5,
             'alpha_2_inv': 4*math.pi/(g[1]**2),
             'alpha_3_inv': 4*math.pi/(g[2]**2),
             'y_top': self.yukawa_top(mu)
         }
+        if stats is not None:
+            couplings['solver'] = stats
+        return couplings
     
     def find_special_scales(self) -> Dict[str, float]:
         """
@@ -368,6 +446,402 @@ class YukawaRunning:
         return beta_yu/(16*math.pi**2), beta_yd/(16*math.pi**2), beta_ye/(16*math.pi**2)
 
 
+class CoupledRGSolver:
+    """
+    Coupled RG running of gauge couplings and Yukawa matrices
+
+    The state vector is [g1, g2, g3, vec(Y_u), vec(Y_d), vec(Y_e)] (30 reals),
+    integrated once with dense output so that couplings and running fermion
+    masses can be looked up at any scale inside the solved range.
+
+    loops=2 is partial: the gauge betas are complete at two loops (gauge
+    and Yukawa-trace terms), but the Yukawa betas only add the pure-gauge
+    g^4 terms. The Yukawa^4 and g^2 Yukawa^2 terms need the Higgs quartic,
+    which is not tracked.
+    """
+
+    N_GAUGE = 3
+
+    # Pure-gauge 2-loop contributions to the Yukawa betas,
+    # coefficients of g1^4, g1^2 g2^2, g1^2 g3^2, g2^4, g2^2 g3^2, g3^4
+    C_GAUGE_YUKAWA_2LOOP = {
+        'u': np.array([1187/600, -9/20, 19/15, -23/4, 9, -108]),
+        'd': np.array([-127/600, -27/20, 31/15, -23/4, 9, -108]),
+        'e': np.array([1371/200, 27/20, 0, -23/4, 0, 0])
+    }
+
+    FERMIONS = {
+        'u': ('m_u', 'm_c', 'm_t'),
+        'd': ('m_d', 'm_s', 'm_b'),
+        'e': ('m_e', 'm_mu', 'm_tau')
+    }
+
+    def __init__(self, rg: Optional[RGRunning] = None,
+                 yukawa: Optional[YukawaRunning] = None, loops: int = 2):
+        if loops not in (1, 2):
+            raise ValueError(f"loops must be 1 or 2, got {loops}")
+
+        self.rg = rg or RGRunning()
+        self.yukawa = yukawa or YukawaRunning(self.rg)
+        self.loops = loops
+        self.v = 246.22  # Higgs VEV in GeV
+
+        self.b_1loop = np.array([self.rg.b1_1loop, self.rg.b2_1loop, self.rg.b3_1loop])
+        self._solutions = []
+        self._t_range = (0.0, 0.0)
+        self.stats = []
+
+    def initial_state(self) -> np.ndarray:
+        """Boundary conditions at M_Z as a flat state vector"""
+        g = np.array([self.rg.g1_MZ, self.rg.g2_MZ, self.rg.g3_MZ])
+        return self.pack(g, self.yukawa.y_u, self.yukawa.y_d, self.yukawa.y_e)
+
+    @staticmethod
+    def pack(g, y_u, y_d, y_e) -> np.ndarray:
+        """Flatten gauge couplings and Yukawa matrices into one state vector"""
+        return np.concatenate([np.asarray(g, dtype=float), np.ravel(y_u), np.ravel(y_d), np.ravel(y_e)])
+
+    @staticmethod
+    def unpack(state: np.ndarray):
+        """Split a state vector into (g, Y_u, Y_d, Y_e)"""
+        g = state[:3]
+        y_u = state[3:12].reshape(3, 3)
+        y_d = state[12:21].reshape(3, 3)
+        y_e = state[21:30].reshape(3, 3)
+        return g, y_u, y_d, y_e
+
+    def beta(self, t: float, state: np.ndarray) -> np.ndarray:
+        """
+        Beta functions for the full state, d(state)/dt with t = log(μ/M_Z)
+        """
+        g, y_u, y_d, y_e = self.unpack(state)
+        g2 = g**2
+        k = 1 / (16 * math.pi**2)
+
+        # Hermitian squares and traces, shared by all beta functions
+        h_u = y_u.T @ y_u
+        h_d = y_d.T @ y_d
+        h_e = y_e.T @ y_e
+        traces = np.array([np.trace(h_u), np.trace(h_d), np.trace(h_e)])
+        Y2 = 3 * traces[0] + 3 * traces[1] + traces[2]
+
+        # Gauge couplings
+        beta_g = k * self.b_1loop * g**3
+        if self.loops == 2:
+            beta_g += k**2 * g**3 * (self.rg.b_2loop @ g2 - C_YUKAWA_GAUGE @ traces)
+
+        # Yukawa matrices (1-loop)
+        gauge_u = 17/20 * g2[0] + 9/4 * g2[1] + 8 * g2[2]
+        gauge_d = 1/4 * g2[0] + 9/4 * g2[1] + 8 * g2[2]
+        gauge_e = 9/4 * g2[0] + 9/4 * g2[1]
+        identity = np.eye(3)
+
+        beta_yu = k * y_u @ (1.5 * (h_u - h_d) + (Y2 - gauge_u) * identity)
+        beta_yd = k * y_d @ (1.5 * (h_d - h_u) + (Y2 - gauge_d) * identity)
+        beta_ye = k * y_e @ (1.5 * h_e + (Y2 - gauge_e) * identity)
+
+        if self.loops == 2:
+            # Pure-gauge 2-loop terms only; see the class docstring
+            monomials = np.array([
+                g2[0]**2, g2[0] * g2[1], g2[0] * g2[2],
+                g2[1]**2, g2[1] * g2[2], g2[2]**2
+            ])
+            beta_yu += k**2 * (self.C_GAUGE_YUKAWA_2LOOP['u'] @ monomials) * y_u
+            beta_yd += k**2 * (self.C_GAUGE_YUKAWA_2LOOP['d'] @ monomials) * y_d
+            beta_ye += k**2 * (self.C_GAUGE_YUKAWA_2LOOP['e'] @ monomials) * y_e
+
+        return self.pack(beta_g, beta_yu, beta_yd, beta_ye)
+
+    def solve(self, mu_min: float = 1.0, mu_max: Optional[float] = None,
+              preset: Optional[str] = None, method: Optional[str] = None,
+              rtol: Optional[float] = None, atol: Optional[float] = None) -> 'CoupledRGSolver':
+        """
+        Integrate from M_Z up to mu_max and down to mu_min with dense output
+        Solver statistics for each direction are kept in self.stats
+        """
+        settings = solver_settings(preset, method, rtol, atol)
+        mu_max = mu_max or self.rg.M_Pl
+        t_min = min(0.0, math.log(mu_min / self.rg.M_Z))
+        t_max = max(0.0, math.log(mu_max / self.rg.M_Z))
+        y0 = self.initial_state()
+
+        self._solutions = []
+        self.stats = []
+        for t_end in (t_max, t_min):
+            if t_end == 0.0:
+                continue
+            sol, stats = integrate_rge(self.beta, (0.0, t_end), y0, settings, dense_output=True)
+            self._solutions.append((min(0.0, t_end), max(0.0, t_end), sol.sol))
+            self.stats.append(stats)
+
+        self._t_range = (t_min, t_max)
+        return self
+
+    def state_at(self, mu: float) -> np.ndarray:
+        """Interpolated state vector at scale mu (solves on first use)"""
+        if not self._solutions:
+            self.solve()
+
+        t = math.log(mu / self.rg.M_Z)
+        if t == 0.0:
+            return self.initial_state()
+        if not self._t_range[0] <= t <= self._t_range[1]:
+            raise ValueError(f"Scale {mu:.3e} GeV outside solved range")
+
+        for t_lo, t_hi, dense in self._solutions:
+            if t_lo <= t <= t_hi:
+                return dense(t)
+        raise ValueError(f"Scale {mu:.3e} GeV outside solved range")
+
+    def couplings_at(self, mu: float) -> Dict[str, np.ndarray]:
+        """Gauge couplings and Yukawa matrices at scale mu"""
+        g, y_u, y_d, y_e = self.unpack(self.state_at(mu))
+        return {'g': g, 'y_u': y_u, 'y_d': y_d, 'y_e': y_e}
+
+    def running_masses(self, mu: float) -> Dict[str, float]:
+        """
+        Running fermion masses in GeV at scale mu,
+        m_f = v/√2 × singular values of the Yukawa matrix
+        """
+        couplings = self.couplings_at(mu)
+        masses = {}
+        for sector, names in self.FERMIONS.items():
+            singular = np.sort(np.linalg.svd(couplings[f'y_{sector}'], compute_uv=False))
+            for name, y in zip(names, singular):
+                masses[name] = self.v / math.sqrt(2) * y
+        return masses
+
+
+# MS-bar quark masses in GeV at which heavy flavours decouple
+QUARK_THRESHOLDS = {'c': 1.27, 'b': 4.18, 't': 172.76}
+
+# Above this α_s the perturbative series is meaningless (reached near 0.6 GeV)
+ALPHA_S_MAX = 1.0
+
+
+def qcd_beta_coefficients(n_f: int) -> Tuple[float, float, float]:
+    """
+    QCD beta coefficients for a = α_s/(4π), da/d ln μ² = -β₀a² - β₁a³ - β₂a⁴
+    """
+    beta0 = 11 - 2/3 * n_f
+    beta1 = 102 - 38/3 * n_f
+    beta2 = 2857/2 - 5033/18 * n_f + 325/54 * n_f**2
+    return beta0, beta1, beta2
+
+
+class _DenseSegment:
+    """
+    Cubic Hermite interpolant of α_s on a uniform ln μ grid for one n_f,
+    so a lookup is an index computation plus one polynomial evaluation
+    """
+
+    def __init__(self, t_lo: float, t_hi: float, n_f: int, values: np.ndarray, slopes: np.ndarray):
+        self.t_lo = t_lo
+        self.t_hi = t_hi
+        self.n_f = n_f
+        self.values = values
+        self.slopes = slopes
+        self.dt = (t_hi - t_lo) / (len(values) - 1)
+
+    def __call__(self, t: float) -> float:
+        i = min(max(int((t - self.t_lo) / self.dt), 0), len(self.values) - 2)
+        h = self.dt
+        s = (t - self.t_lo) / h - i
+        s2, s3 = s * s, s * s * s
+        return ((2*s3 - 3*s2 + 1) * self.values[i] + (s3 - 2*s2 + s) * h * self.slopes[i]
+                + (-2*s3 + 3*s2) * self.values[i + 1] + (s3 - s2) * h * self.slopes[i + 1])
+
+
+def _alpha_s_derivative(alpha_s, n_f: int, loops: int):
+    """dα_s/d ln μ for n_f active flavours"""
+    a = alpha_s / (4 * math.pi)
+    beta = qcd_beta_coefficients(n_f)
+    da = -2 * sum(beta[k] * a**(k + 2) for k in range(loops))
+    return 4 * math.pi * da
+
+
+def _match_alpha_s(alpha_s: float, upward: bool, loops: int) -> float:
+    """
+    Decoupling relation at μ = m_q(m_q); the first non-trivial term is
+    O(α_s³) and only enters consistently with 3-loop running
+    """
+    if loops < 3:
+        return alpha_s
+    c2 = 11/72 * (alpha_s / math.pi)**2
+    return alpha_s * (1 - c2) if upward else alpha_s * (1 + c2)
+
+
+@lru_cache(maxsize=16)
+def _threshold_segments(alpha_s_MZ: float, M_Z: float, thresholds: Tuple[Tuple[str, float], ...],
+                        loops: int, mu_min: float, mu_max: float,
+                        spacing: float = 0.05) -> Tuple[_DenseSegment, ...]:
+    """
+    Integrate α_s once per flavour segment, outward from M_Z, applying the
+    matching condition at each threshold. Cached on all inputs, so segments
+    are rebuilt only when a threshold, the boundary value or the range changes.
+    """
+    t_min = math.log(mu_min / M_Z)
+    t_max = math.log(mu_max / M_Z)
+    t_thresholds = sorted(math.log(m / M_Z) for _, m in thresholds)
+    t_inner = [t for t in t_thresholds if t_min < t < t_max]
+    edges = [t_min] + t_inner + [t_max]
+
+    # Flavours active at M_Z: the light three plus every threshold below it
+    n_f_MZ = 3 + sum(1 for t in t_thresholds if t <= 0)
+    n_f_min = n_f_MZ - sum(1 for t in t_thresholds if t_min < t <= 0)
+    start = next(i for i in range(len(edges) - 1) if edges[i] <= 0 <= edges[i + 1])
+
+    def integrate(t_lo, t_hi, t_anchor, alpha_anchor, n_f):
+        """Solve outward from the anchor and sample onto a uniform grid"""
+        n = max(int(math.ceil((t_hi - t_lo) / spacing)), 8) + 1
+        grid = np.linspace(t_lo, t_hi, n)
+        values = np.empty(n)
+        for t_end, mask in ((t_hi, grid >= t_anchor), (t_lo, grid < t_anchor)):
+            if not mask.any():
+                continue
+            sol = solve_ivp(lambda t, y: [_alpha_s_derivative(y[0], n_f, loops)],
+                            (t_anchor, t_end), [alpha_anchor], method='DOP853',
+                            rtol=1e-10, atol=1e-12, dense_output=True)
+            if not sol.success:
+                raise RuntimeError(f"α_s integration failed for n_f={n_f}: {sol.message}")
+            values[mask] = sol.sol(grid[mask])[0]
+        slopes = np.array([_alpha_s_derivative(v, n_f, loops) for v in values])
+        return _DenseSegment(t_lo, t_hi, n_f, values, slopes)
+
+    segments = [None] * (len(edges) - 1)
+    segments[start] = integrate(edges[start], edges[start + 1], 0.0, alpha_s_MZ, n_f_min + start)
+
+    # Upward from the M_Z segment
+    for i in range(start + 1, len(edges) - 1):
+        alpha = _match_alpha_s(segments[i - 1](edges[i]), upward=True, loops=loops)
+        segments[i] = integrate(edges[i], edges[i + 1], edges[i], alpha, n_f_min + i)
+
+    # Downward from the M_Z segment
+    for i in range(start - 1, -1, -1):
+        alpha = _match_alpha_s(segments[i + 1](edges[i + 1]), upward=False, loops=loops)
+        segments[i] = integrate(edges[i], edges[i + 1], edges[i + 1], alpha, n_f_min + i)
+
+    return tuple(segments)
+
+
+@lru_cache(maxsize=16)
+def _perturbative_continuation(alpha_edge: float, t_edge: float, n_f: int, loops: int,
+                               spacing: float = 0.005) -> _DenseSegment:
+    """
+    α_s below the lowest segment, integrated once from its edge down to
+    where it reaches ALPHA_S_MAX; the segment's t_lo is that limit
+    """
+    too_strong = lambda t, y: y[0] - ALPHA_S_MAX
+    too_strong.terminal = True
+    # α_s reaches ALPHA_S_MAX well within a factor e^10 below the edge
+    sol = solve_ivp(lambda t, y: [_alpha_s_derivative(y[0], n_f, loops)],
+                    (t_edge, t_edge - 10.0), [alpha_edge], method='DOP853',
+                    rtol=1e-10, atol=1e-12, events=too_strong, dense_output=True)
+    if not sol.success:
+        raise RuntimeError(f"α_s continuation failed for n_f={n_f}: {sol.message}")
+
+    t_limit = sol.t[-1]
+    n = max(int(math.ceil((t_edge - t_limit) / spacing)), 8) + 1
+    grid = np.linspace(t_limit, t_edge, n)
+    values = sol.sol(grid)[0]
+    slopes = np.array([_alpha_s_derivative(v, n_f, loops) for v in values])
+    return _DenseSegment(t_limit, t_edge, n_f, values, slopes)
+
+
+class ThresholdRunning:
+    """
+    Piecewise QCD running of α_s with heavy-flavour thresholds at the
+    charm, bottom and top masses. Each n_f segment is integrated once and
+    cached as a dense interpolant, so lookups take constant time.
+    """
+
+    def __init__(self, alpha_s_MZ: float = 0.1181, M_Z: float = 91.1876,
+                 thresholds: Optional[Dict[str, float]] = None, loops: int = 3,
+                 mu_min: float = 1.0, mu_max: float = 1.2209e19):
+        if loops not in (1, 2, 3):
+            raise ValueError(f"loops must be 1, 2 or 3, got {loops}")
+
+        self.alpha_s_MZ = alpha_s_MZ
+        self.M_Z = M_Z
+        self.thresholds = dict(thresholds or QUARK_THRESHOLDS)
+        self.loops = loops
+        self.mu_min = mu_min
+        self.mu_max = mu_max
+
+    @property
+    def segments(self) -> Tuple[_DenseSegment, ...]:
+        """Cached segments for the current boundary value and thresholds"""
+        key = tuple(sorted(self.thresholds.items(), key=lambda item: item[1]))
+        return _threshold_segments(self.alpha_s_MZ, self.M_Z, key, self.loops,
+                                   self.mu_min, self.mu_max)
+
+    def _segment(self, t: float) -> _DenseSegment:
+        segments = self.segments
+        for segment in segments:
+            if t <= segment.t_hi:
+                return segment
+        return segments[-1]
+
+    def n_f(self, mu: float) -> int:
+        """Number of active quark flavours at scale mu"""
+        return 3 + sum(1 for m in self.thresholds.values() if mu > m)
+
+    @property
+    def continuation(self) -> _DenseSegment:
+        """Cached running below mu_min, down to the perturbative limit"""
+        lowest = self.segments[0]
+        return _perturbative_continuation(float(lowest(lowest.t_lo)), lowest.t_lo,
+                                          lowest.n_f, self.loops)
+
+    def alpha_s(self, mu: float) -> float:
+        """
+        Strong coupling at scale mu. Below mu_min the cached continuation
+        is used; above mu_max the last segment is continued by direct
+        integration. Raises ValueError at scales where α_s exceeds
+        ALPHA_S_MAX (QCD is non-perturbative there).
+        """
+        if mu <= 0:
+            raise ValueError(f"Scale must be positive, got {mu}")
+        t = math.log(mu / self.M_Z)
+        segment = self._segment(t)
+        if segment.t_lo <= t <= segment.t_hi:
+            return float(segment(t))
+
+        if t < segment.t_lo:
+            continuation = self.continuation
+            if t >= continuation.t_lo:
+                return float(continuation(t))
+            raise ValueError(
+                f"α_s is non-perturbative at {mu:.3g} GeV (it exceeds {ALPHA_S_MAX} below about "
+                f"{self.M_Z * math.exp(continuation.t_lo):.2g} GeV); perturbative running is not defined there"
+            )
+
+        # Above mu_max α_s only decreases; continue the last segment directly
+        sol = solve_ivp(lambda t_, y: [_alpha_s_derivative(y[0], segment.n_f, self.loops)],
+                        (segment.t_hi, t), [segment(segment.t_hi)], method='DOP853',
+                        rtol=1e-10, atol=1e-12)
+        if not sol.success:
+            raise RuntimeError(f"α_s integration failed above {self.mu_max:.3g} GeV: {sol.message}")
+        return float(sol.y[0, -1])
+
+    def lambda_msbar(self, n_f: int) -> float:
+        """
+        Λ_MS-bar in GeV for n_f flavours from the asymptotic 2-loop relation
+        ln(μ²/Λ²) = 1/(β₀a) + (β₁/β₀²) ln(β₀a), evaluated inside the n_f segment
+        """
+        segment = next((s for s in self.segments if s.n_f == n_f), None)
+        if segment is None:
+            raise ValueError(f"No running segment with n_f={n_f}")
+
+        t = 0.5 * (segment.t_lo + segment.t_hi)
+        a = segment(t) / (4 * math.pi)
+        beta0, beta1, _ = qcd_beta_coefficients(n_f)
+        log_ratio = 1 / (beta0 * a)
+        if self.loops > 1:
+            log_ratio += beta1 / beta0**2 * math.log(beta0 * a)
+        return self.M_Z * math.exp(t) * math.exp(-0.5 * log_ratio)
+
+
 def test_rg_running():
     """
     Test the RG running implementation
@@ -406,7 +880,7 @@ def test_rg_running():
     
     # Generate plot
     print("\nGenerating RG flow plot...")
-    rg.plot_running()
+    rg.plot_running(output='rg_running_2loop.png')
     print("Plot saved as 'rg_running_2loop.png'")
     
     return rg
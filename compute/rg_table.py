@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Precomputed RG lookup table
+
+Build step: integrates the 2-loop gauge running once from M_Z to M_Pl and
+writes a dense log-spaced table of all couplings to a memory-mappable .npy
+file, next to a small JSON header carrying the hash of the boundary
+conditions and beta coefficients it was built from.
+
+    python rg_table.py            # writes rg_running_table.npy / .json
+
+RGRunning memory-maps the table at startup and interpolates; when the hash
+does not match its current inputs it falls back to integrating the RGEs.
+"""
+
+import hashlib
+import json
+import math
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+
+TABLE_VERSION = 3
+TABLE_PATH = Path(__file__).parent / 'rg_running_table.npy'
+COLUMNS = ['log10_mu', 'g1', 'g2', 'g3', 'alpha_s', 'y_top']
+N_POINTS = 4096
+
+# Loaded tables shared by every RGRunning instance in the process
+_loaded: Dict[str, Optional['RGTable']] = {}
+
+
+def header_path(path: Path) -> Path:
+    return path.with_suffix('.json')
+
+
+def rg_inputs_hash(rg) -> str:
+    """
+    Hash of everything the table depends on: boundary conditions at M_Z,
+    flavour thresholds, beta coefficients and the table layout
+    """
+    from rg_running import C_YUKAWA_GAUGE, COUPLED_LOOPS, YukawaRunning
+
+    yukawa = YukawaRunning(rg)
+    inputs = {
+        'version': TABLE_VERSION,
+        'columns': COLUMNS,
+        'n_points': N_POINTS,
+        'M_Z': rg.M_Z,
+        'M_Pl': rg.M_Pl,
+        'g_MZ': [rg.g1_MZ, rg.g2_MZ, rg.g3_MZ],
+        'alpha_s_MZ': rg.alpha_s_MZ,
+        'thresholds': sorted(rg.qcd.thresholds.items()),
+        'qcd_loops': rg.qcd.loops,
+        'b_1loop': [rg.b1_1loop, rg.b2_1loop, rg.b3_1loop],
+        'b_2loop': np.asarray(rg.b_2loop).tolist(),
+        'c_yukawa_gauge': C_YUKAWA_GAUGE.tolist(),
+        'yukawa_MZ': [np.asarray(y).tolist() for y in (yukawa.y_u, yukawa.y_d, yukawa.y_e)],
+        'yukawa_loops': COUPLED_LOOPS,
+    }
+    encoded = json.dumps(inputs, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class RGTable:
+    """Read-only view of a (possibly memory-mapped) coupling table"""
+
+    def __init__(self, data: np.ndarray, inputs_hash: str):
+        self.data = data
+        self.inputs_hash = inputs_hash
+        self.log10_mu = data[:, 0]
+        self.log10_min = float(self.log10_mu[0])
+        self.log10_max = float(self.log10_mu[-1])
+        self.step = (self.log10_max - self.log10_min) / (len(self.log10_mu) - 1)
+
+    def covers(self, mu: float) -> bool:
+        return mu > 0 and self.log10_min <= math.log10(mu) <= self.log10_max
+
+    def row(self, mu: float) -> np.ndarray:
+        """Linearly interpolated table row at scale mu (uniform grid, O(1))"""
+        x = (math.log10(mu) - self.log10_min) / self.step
+        i = min(max(int(x), 0), len(self.log10_mu) - 2)
+        w = x - i
+        return (1 - w) * self.data[i] + w * self.data[i + 1]
+
+    def value(self, mu: float, column: str) -> float:
+        return float(self.row(mu)[COLUMNS.index(column)])
+
+    def gauge(self, mu: float) -> np.ndarray:
+        return np.array(self.row(mu)[1:4])
+
+
+def build_table(rg, path: Path = TABLE_PATH, n_points: int = N_POINTS) -> Path:
+    """Integrate once from M_Z to M_Pl and write the table and its header"""
+    from rg_running import integrate_rge, solver_settings
+
+    t_max = math.log(rg.M_Pl / rg.M_Z)
+    g0 = np.array([rg.g1_MZ, rg.g2_MZ, rg.g3_MZ])
+    rg.prepare_yukawa(rg.M_Z, rg.M_Pl)
+    sol, _ = integrate_rge(lambda t, g: rg.beta_gauge_2loop(g, t), (0.0, t_max), g0,
+                           solver_settings('precise'), dense_output=True)
+
+    log10_mu = np.linspace(math.log10(rg.M_Z), math.log10(rg.M_Pl), n_points)
+    mu = 10**log10_mu
+    t = np.clip(np.log(mu / rg.M_Z), 0.0, t_max)
+    g = sol.sol(t)
+
+    data = np.empty((n_points, len(COLUMNS)))
+    data[:, 0] = log10_mu
+    data[:, 1:4] = g.T
+    data[:, 4] = [rg.alpha_s(m) for m in mu]
+    data[:, 5] = [rg.yukawa_top(m) for m in mu]
+
+    path = Path(path)
+    np.save(path, data)
+    header = {
+        'inputs_hash': rg_inputs_hash(rg),
+        'version': TABLE_VERSION,
+        'columns': COLUMNS,
+        'n_points': n_points,
+        'mu_min': float(mu[0]),
+        'mu_max': float(mu[-1]),
+    }
+    with open(header_path(path), 'w') as f:
+        json.dump(header, f, indent=2)
+
+    _loaded.pop(str(path), None)
+    return path
+
+
+def load_table(rg, path: Path = TABLE_PATH) -> Optional[RGTable]:
+    """
+    Memory-map the table if its hash matches the inputs of rg, else None.
+    The mapped file is opened once per process and shared.
+    """
+    key = str(path)
+    if key not in _loaded:
+        try:
+            with open(header_path(Path(path)), 'r') as f:
+                header = json.load(f)
+            data = np.load(path, mmap_mode='r')
+            _loaded[key] = RGTable(data, header['inputs_hash'])
+        except (OSError, ValueError, KeyError):
+            _loaded[key] = None
+
+    table = _loaded[key]
+    if table is None or table.inputs_hash != rg_inputs_hash(rg):
+        return None
+    return table
+
+
+if __name__ == '__main__':
+    from rg_running import RGRunning
+
+    rg = RGRunning(use_table=False)
+    output = build_table(rg)
+    print(f"RG table written to {output} ({rg_inputs_hash(rg)[:12]})")
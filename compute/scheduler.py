@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Priority scheduling of notebook executions
+
+Work is submitted in one of two classes, each with its own concurrency
+limit:
+
+- interactive: POST /calculate/{id}, whose caller is waiting
+- background: warm-up and batch sweeps
+
+Interactive work never waits for background work. Background work only
+starts while no interactive work is queued, so a full-catalog sweep
+yields to users as soon as their requests pile up. Grants are first come
+first served within a class.
+
+Queue latency is recorded per class in compute_scheduler_wait_seconds.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from metrics import metrics
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+INTERACTIVE_SLOTS = int(os.environ.get('COMPUTE_INTERACTIVE_SLOTS', 4))
+BACKGROUND_SLOTS = int(os.environ.get('COMPUTE_BACKGROUND_SLOTS', 2))
+
+scheduler_wait = metrics.histogram(
+    'compute_scheduler_wait_seconds',
+    'Time calculations spent queued before starting, by priority class',
+    ('priority',)
+)
+
+
+class PriorityScheduler:
+    """Hands out execution slots per priority class"""
+
+    def __init__(self, interactive_slots: int = INTERACTIVE_SLOTS,
+                 background_slots: int = BACKGROUND_SLOTS):
+        self.limits = {INTERACTIVE: max(1, interactive_slots), BACKGROUND: max(1, background_slots)}
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self._waiting: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+
+    def queued(self, priority: str) -> int:
+        return len(self._waiting[priority])
+
+    def _can_start(self, priority: str) -> bool:
+        if self.running[priority] >= self.limits[priority]:
+            return False
+        # Background work yields while users are waiting
+        return priority == INTERACTIVE or not self._waiting[INTERACTIVE]
+
+    def _grant(self):
+        for priority in PRIORITIES:
+            waiting = self._waiting[priority]
+            while waiting and self._can_start(priority):
+                future = waiting.popleft()
+                if not future.done():
+                    self.running[priority] += 1
+                    future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE):
+        """Wait for a slot in the given class and hold it for the block"""
+        if priority not in self.limits:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+
+        start = time.perf_counter()
+        if self._can_start(priority) and not self._waiting[priority]:
+            self.running[priority] += 1
+        else:
+            future = asyncio.get_event_loop().create_future()
+            self._waiting[priority].append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted just as the waiter was cancelled; pass the slot on
+                    self.running[priority] -= 1
+                    self._grant()
+                else:
+                    if future in self._waiting[priority]:
+                        self._waiting[priority].remove(future)
+                    # A queued interactive request may have been holding background back
+                    self._grant()
+                raise
+        scheduler_wait.observe(time.perf_counter() - start, priority=priority)
+
+        try:
+            yield
+        finally:
+            self.running[priority] -= 1
+            self._grant()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {priority: {'running': self.running[priority], 'queued': self.queued(priority),
+                           'limit': self.limits[priority]}
+                for priority in PRIORITIES}
+
+
+scheduler = PriorityScheduler()
+
+metrics.gauge('compute_scheduler_tasks', 'Calculations by priority class and state', ('priority', 'state'),
+              callback=lambda: {(priority, state): value
+                                for priority, stats in scheduler.stats().items()
+                                for state, value in stats.items() if state != 'limit'})
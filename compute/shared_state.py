@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+State shared by the uvicorn workers of one host
+
+A single SQLite database in WAL mode (readers never block the writer)
+holds three tables:
+
+- results: the latest CalculationResult per constant, with a global
+  sequence number so each worker can pull what changed since its last
+  sync into its in-process results cache
+- events: an append-only log of calculation events; every worker tails
+  it and rebroadcasts other workers' events to its own WebSocket clients
+- claims: which worker is computing a constant right now, so the other
+  workers wait for its result instead of computing the same constant.
+  A claim is live while its holder keeps renewing it and, since the
+  database is local to the host, while the holder's process exists.
+
+Enabled with COMPUTE_SHARED_STATE=<path to the database file>. Without
+it the service keeps all state in process, as with a single worker.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from responses import dumps
+
+SHARED_STATE_PATH = os.environ.get('COMPUTE_SHARED_STATE')
+SYNC_INTERVAL = float(os.environ.get('COMPUTE_SHARED_SYNC_INTERVAL', 0.25))
+# A claim not renewed for this long is assumed to belong to a hung worker;
+# the holder renews it every CLAIM_TIMEOUT / 3 while it calculates
+CLAIM_TIMEOUT = float(os.environ.get('COMPUTE_SHARED_CLAIM_TIMEOUT', 60))
+# Events are only needed until every worker has polled them
+EVENT_RETENTION = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    constant_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_seq ON results (seq);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claims (
+    constant_id TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+);
+"""
+
+
+class SharedState:
+    """Cross-process results store, event log and work claims"""
+
+    def __init__(self, path: str, worker_id: Optional[str] = None,
+                 claim_timeout: float = CLAIM_TIMEOUT):
+        self.path = path
+        # '<pid>-<random>'; the pid lets other workers detect a crashed holder
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+        self.result_seq = 0
+        # Only events published after this worker started are delivered
+        self.event_seq = self._scalar('SELECT COALESCE(MAX(seq), 0) FROM events')
+
+    def _scalar(self, sql: str, params: Tuple = ()) -> Any:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Results
+
+    def put_result(self, constant_id: str, payload: Dict[str, Any]) -> int:
+        """Store a result and return its sequence number"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                seq = self._conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM results').fetchone()[0]
+                self._conn.execute(
+                    'INSERT INTO results (constant_id, payload, seq) VALUES (?, ?, ?) '
+                    'ON CONFLICT (constant_id) DO UPDATE SET payload = excluded.payload, seq = excluded.seq',
+                    (constant_id, dumps(payload).decode('utf-8'), seq)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return seq
+
+    def result_version(self, constant_id: str) -> int:
+        """Sequence number of the stored result, 0 if there is none"""
+        return self._scalar('SELECT seq FROM results WHERE constant_id = ?', (constant_id,)) or 0
+
+    def get_result(self, constant_id: str) -> Optional[Dict[str, Any]]:
+        payload = self._scalar('SELECT payload FROM results WHERE constant_id = ?', (constant_id,))
+        return json.loads(payload) if payload is not None else None
+
+    def changed_results(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Results stored (by any worker) since the previous call"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT constant_id, payload, seq FROM results WHERE seq > ? ORDER BY seq',
+                (self.result_seq,)
+            ).fetchall()
+        if rows:
+            self.result_seq = rows[-1][2]
+        return [(constant_id, json.loads(payload)) for constant_id, payload, _ in rows]
+
+    # Events
+
+    def publish(self, event: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO events (origin, payload, created) VALUES (?, ?, ?)',
+                (self.worker_id, dumps(event).decode('utf-8'), time.time())
+            )
+
+    def other_events(self) -> List[Dict[str, Any]]:
+        """Events published by other workers since the previous call"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, origin, payload FROM events WHERE seq > ? ORDER BY seq', (self.event_seq,)
+            ).fetchall()
+        if rows:
+            self.event_seq = rows[-1][0]
+        return [json.loads(payload) for _, origin, payload in rows if origin != self.worker_id]
+
+    def prune_events(self, retention: float = EVENT_RETENTION):
+        with self._lock:
+            self._conn.execute('DELETE FROM events WHERE created < ?', (time.time() - retention,))
+
+    # Claims
+
+    def _alive(self, worker: str, claimed_at: float, now: float) -> bool:
+        if now - claimed_at >= self.claim_timeout:
+            return False
+        pid = worker.split('-', 1)[0]
+        if not pid.isdigit():
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def claim(self, constant_id: str) -> bool:
+        """Take the right to compute a constant unless a live claim by another worker exists"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT worker, claimed_at FROM claims WHERE constant_id = ?', (constant_id,)
+                ).fetchone()
+                if row and row[0] != self.worker_id and self._alive(row[0], row[1], now):
+                    self._conn.execute('COMMIT')
+                    return False
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO claims (constant_id, worker, claimed_at) VALUES (?, ?, ?)',
+                    (constant_id, self.worker_id, now)
+                )
+                self._conn.execute('COMMIT')
+                return True
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def release(self, constant_id: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM claims WHERE constant_id = ? AND worker = ?',
+                               (constant_id, self.worker_id))
+
+    def renew(self, constant_id: str):
+        """Keep a claim alive while its calculation runs"""
+        with self._lock:
+            self._conn.execute('UPDATE claims SET claimed_at = ? WHERE constant_id = ? AND worker = ?',
+                               (time.time(), constant_id, self.worker_id))
+
+    def is_claimed(self, constant_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT worker, claimed_at FROM claims WHERE constant_id = ?', (constant_id,)
+            ).fetchone()
+        return row is not None and self._alive(row[0], row[1], time.time())
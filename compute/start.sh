@@ -10,5 +10,13 @@ else
     echo "Using system Python"
 fi
 
+# Several workers share results, events and work claims through one
+# SQLite database; a single worker keeps everything in process
+WORKERS=${WEB_CONCURRENCY:-1}
+if [ "$WORKERS" -gt 1 ] && [ -z "$COMPUTE_SHARED_STATE" ]; then
+    mkdir -p results
+    export COMPUTE_SHARED_STATE="$(pwd)/results/shared_state.db"
+fi
+
 # Start uvicorn
-python -m uvicorn main:app --host 0.0.0.0 --port ${PORT:-8001}
\ No newline at end of file
+python -m uvicorn main:app --host 0.0.0.0 --port ${PORT:-8001} --workers $WORKERS
\ No newline at end of file
@@ -7,19 +7,22 @@ import math
 from topological_constants import TopologicalConstants
 from rg_running import RGRunning
 from typing import Dict, Tuple
+from codata import load_codata
 
-# Experimental values (PDG 2024 / latest measurements)
+CODATA = load_codata()
+
+# Experimental values (CODATA 2022 where it lists them, PDG 2024 / latest measurements otherwise)
 EXPERIMENTAL_VALUES = {
     # Fundamental
-    'alpha': 1/137.035999084,
+    'alpha': CODATA.value('fine-structure constant'),
     'alpha_G': 5.906e-39,
     'sin2_theta_W': 0.23121,  # At M_Z
     
     # Masses (GeV unless noted)
-    'm_p': 0.938272088,  # Proton mass in GeV
-    'm_e': 0.00051099895,  # Electron mass in GeV
-    'm_mu': 0.1056583755,  # Muon mass in GeV
-    'm_tau': 1.77686,  # Tau mass in GeV
+    'm_p': CODATA.value('proton mass energy equivalent in MeV') / 1000,  # Proton mass in GeV
+    'm_e': CODATA.value('electron mass energy equivalent in MeV') / 1000,  # Electron mass in GeV
+    'm_mu': CODATA.value('muon mass energy equivalent in MeV') / 1000,  # Muon mass in GeV
+    'm_tau': CODATA.value('tau energy equivalent') / 1000,  # Tau mass in GeV
     'm_u': 0.00216e-3,  # Up quark in GeV (2.16 MeV)
     'm_c': 1.27,  # Charm quark
     'm_b': 4.18,  # Bottom quark
@@ -52,7 +55,7 @@ EXPERIMENTAL_VALUES = {
     'm_nu': 0.06e-9,  # Sum of neutrino masses in GeV (0.06 eV)
     
     # Electroweak
-    'g_f': 1.1663787e-5,  # Fermi constant in GeV^-2
+    'g_f': CODATA.value('Fermi coupling constant'),  # Fermi constant in GeV^-2
     'v_h': 246.22,  # Higgs VEV in GeV
 }
 
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the CODATA listing parser and its cached lookup table
+"""
+
+import numpy as np
+
+import codata
+
+LISTING = """\
+  Quantity                                                       Value                 Uncertainty           Unit
+-----------------------------------------------------------------------------------------------------------------------------
+alpha particle mass                                         6.644 657 3450 e-27      0.000 000 0021 e-27      kg
+atomic unit of action                                       1.054 571 817... e-34    (exact)                  J s
+Bohr magneton                                               9.274 010 0657 e-24      0.000 000 0029 e-24      J T^-1
+Bohr magneton in eV/T                                       5.788 381 7982 e-5       0.000 000 0018 e-5       eV T^-1
+inverse fine-structure constant                             137.035 999 177          0.000 000 021
+"""
+
+
+def test_listing_parses_spaced_digits_truncation_and_exponents():
+    """Grouped digits, '...' truncation, separate exponents and (exact) parse into floats"""
+    entries = {e.name: e for e in codata.parse_listing(LISTING)}
+    assert entries['alpha particle mass'] == ('alpha particle mass', 6.6446573450e-27, 2.1e-36, 'kg', False)
+    assert entries['atomic unit of action'] == ('atomic unit of action', 1.054571817e-34, 0.0, 'J s', True)
+    assert entries['inverse fine-structure constant'].value == 137.035999177
+    assert entries['inverse fine-structure constant'].unit == ''
+
+
+def test_table_is_cached_by_file_hash_and_supports_prefix_lookup(tmp_path):
+    """The parsed table is memory-mapped from its cache until the listing's hash changes"""
+    listing = tmp_path / 'test.txt'
+    cache = tmp_path / 'codata_test.npy'
+    listing.write_text(LISTING)
+
+    table = codata.load_codata('test', path=listing, cache=cache)
+    assert cache.exists() and len(table) == 5
+    assert table['Bohr magneton'].unit == 'J T^-1'
+    assert [e.name for e in table.lookup('bohr MAG')] == ['Bohr magneton', 'Bohr magneton in eV/T']
+    assert table.lookup('muon') == [] and table.get('muon mass') is None
+
+    # A fresh process maps the cached table instead of parsing
+    codata._loaded.clear()
+    cached = codata.load_codata('test', path=listing, cache=cache)
+    assert isinstance(cached.rows, np.memmap)
+    assert cached['alpha particle mass'] == table['alpha particle mass']
+
+    # Editing the listing changes its hash and forces a re-parse
+    listing.write_text(LISTING.replace('137.035 999 177', '137.035 999 084'))
+    assert codata.load_codata('test', path=listing, cache=cache).value('inverse fine-structure constant') == 137.035999084
+
+
+def test_catalog_references_resolve_in_the_2022_listing():
+    """Catalog constants measured by CODATA resolve to values in the catalog's units"""
+    table = codata.load_codata()
+    assert abs(codata.reference_value(table, 'alpha') * table.value('inverse fine-structure constant') - 1) < 1e-9
+    assert codata.reference_value(table, 'm_tau') == 1.77686
+    assert codata.reference_value(table, 'v_h') is None
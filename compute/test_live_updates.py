@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for WebSocket fan-out: bounded queues, overflow policies, coalescing
+"""
+
+import asyncio
+import json
+
+from live_updates import Broadcaster
+
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = []
+        self.closed_with = None
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_calculation_burst_is_coalesced():
+    """62 completions within the window reach the client as one batch frame"""
+    async def run():
+        broadcaster = Broadcaster(window=0.01)
+        socket = FakeSocket()
+        broadcaster.connect(socket)
+
+        for i in range(62):
+            broadcaster.publish({'type': 'calculation_complete', 'constant_id': f'c{i}'})
+        broadcaster.publish({'type': 'status', 'message': 'done'})
+        await asyncio.sleep(0.05)
+        return socket.frames
+
+    frames = asyncio.run(run())
+    assert [frame['type'] for frame in frames] == ['batch', 'status']
+    assert [event['constant_id'] for event in frames[0]['events']] == [f'c{i}' for i in range(62)]
+
+
+def test_slow_client_does_not_block_others():
+    """A slow client loses its oldest frames; a fast one receives everything"""
+    async def run():
+        broadcaster = Broadcaster(window=0.0, queue_size=4, policy='drop_oldest')
+        slow, fast = FakeSocket(delay=1.0), FakeSocket()
+        slow_connection = broadcaster.connect(slow)
+        broadcaster.connect(fast)
+
+        for i in range(20):
+            broadcaster.publish({'type': 'status', 'n': i})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        return slow_connection, fast.frames
+
+    slow_connection, fast_frames = asyncio.run(run())
+    assert [frame['n'] for frame in fast_frames] == list(range(20))
+    assert slow_connection.dropped > 0
+    assert json.loads(slow_connection.queue._queue[-1])['n'] == 19
+
+
+def test_disconnect_policy_closes_slow_client():
+    async def run():
+        broadcaster = Broadcaster(window=0.0, queue_size=2, policy='disconnect')
+        slow = FakeSocket(delay=1.0)
+        broadcaster.connect(slow)
+        for i in range(5):
+            broadcaster.publish({'type': 'status', 'n': i})
+        await asyncio.sleep(0.01)
+        broadcaster.publish({'type': 'status', 'n': 5})
+        return broadcaster, slow
+
+    broadcaster, slow = asyncio.run(run())
+    assert slow.closed_with == 1013
+    assert len(broadcaster) == 0
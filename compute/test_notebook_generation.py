@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental notebook generation (constants/scripts/generate_notebooks.py)
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import catalog_bundle
+
+pytest.importorskip('nbformat')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'constants' / 'scripts'))
+generate_notebooks = pytest.importorskip('generate_notebooks')
+
+MODULE = generate_notebooks.MODULE_NAME
+
+
+def write_constant(data_dir, constant_id, dependencies=(), **fields):
+    constant = {'id': constant_id, 'symbol': constant_id, 'name': constant_id,
+                'dependencies': list(dependencies), **fields}
+    (data_dir / f"{constant_id}.json").write_text(json.dumps(constant))
+
+
+def generate(data_dir, notebooks_dir, *args):
+    """Run the generator in-process and return its exit code and manifest"""
+    code = generate_notebooks.main(['--data-dir', str(data_dir), '--notebooks-dir', str(notebooks_dir),
+                                    '--jobs', '1', *args])
+    return code, json.loads((notebooks_dir / generate_notebooks.MANIFEST_NAME).read_text())
+
+
+def test_generation_skips_unchanged_and_regenerates_descendants(tmp_path):
+    """An unchanged catalog regenerates nothing; an edit regenerates the constant and its descendants"""
+    data_dir, notebooks_dir = tmp_path / 'data', tmp_path / 'notebooks'
+    data_dir.mkdir()
+    write_constant(data_dir, 'a', formula='2')
+    write_constant(data_dir, 'b', ['a'], formula='a * 3')
+    write_constant(data_dir, 'c', ['b'])
+    write_constant(data_dir, 'd')
+
+    code, manifest = generate(data_dir, notebooks_dir)
+    assert code == 0
+    assert manifest['generated'] == sorted(['a', 'b', 'c', 'd', MODULE])
+    assert sorted(manifest['hashes']) == ['a', 'b', 'c', 'd'] and manifest['module']
+    assert (notebooks_dir / 'c.ipynb').exists() and (notebooks_dir / MODULE).exists()
+
+    code, manifest = generate(data_dir, notebooks_dir)
+    assert code == 0 and manifest['generated'] == []
+    assert manifest['skipped'] == ['a', 'b', 'c', 'd']
+
+    write_constant(data_dir, 'a', formula='5')
+    _, manifest = generate(data_dir, notebooks_dir)
+    assert manifest['generated'] == sorted(['a', 'b', 'c', MODULE])
+    assert manifest['skipped'] == ['d']
+
+    _, manifest = generate(data_dir, notebooks_dir, '--force')
+    assert manifest['generated'] == sorted(['a', 'b', 'c', 'd', MODULE])
+
+
+def test_failed_notebooks_are_left_out_of_the_manifest_and_retried(tmp_path, monkeypatch):
+    """A notebook that failed has no hash, so the next run generates it again"""
+    data_dir, notebooks_dir = tmp_path / 'data', tmp_path / 'notebooks'
+    data_dir.mkdir()
+    write_constant(data_dir, 'a')
+    write_constant(data_dir, 'b', ['a'])
+
+    generate_notebook = generate_notebooks.generate_notebook
+
+    def failing(constant, catalog):
+        if constant['id'] == 'b':
+            raise RuntimeError('template error')
+        return generate_notebook(constant, catalog)
+
+    monkeypatch.setattr(generate_notebooks, 'generate_notebook', failing)
+    code, manifest = generate(data_dir, notebooks_dir)
+    assert code == 1
+    assert manifest['failed'] == {'b': 'template error'}
+    assert 'b' not in manifest['hashes'] and 'a' in manifest['hashes']
+
+    monkeypatch.setattr(generate_notebooks, 'generate_notebook', generate_notebook)
+    code, manifest = generate(data_dir, notebooks_dir)
+    assert code == 0 and manifest['generated'] == ['b'] and manifest['failed'] == {}
+    assert generate_notebooks.read_manifest(tmp_path / 'missing.json') == {}
+
+
+def test_catalog_module_matches_every_notebook(tmp_path):
+    """The whole-catalog module gives each notebook's result, so template drift fails here"""
+    catalog = generate_notebooks.load_catalog(catalog_bundle.default_data_dir())
+    path = tmp_path / MODULE
+    generate_notebooks.write_module(catalog, generate_notebooks.template_fingerprint(), path)
+
+    assert generate_notebooks.check_module(catalog, path) == {}
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Consistency checks for the RG running solvers
+"""
+
+import numpy as np
+from rg_running import RGRunning, CoupledRGSolver, ThresholdRunning
+
+
+def test_coupled_solver_boundary_conditions():
+    """At M_Z the coupled solution reproduces the input couplings and masses"""
+    solver = CoupledRGSolver().solve(mu_min=2.0, mu_max=1e16)
+    couplings = solver.couplings_at(solver.rg.M_Z)
+
+    assert np.allclose(couplings['g'], [solver.rg.g1_MZ, solver.rg.g2_MZ, solver.rg.g3_MZ])
+    assert np.allclose(couplings['y_u'], solver.yukawa.y_u)
+
+    masses = solver.running_masses(solver.rg.M_Z)
+    assert abs(masses['m_t'] - 246.22 / np.sqrt(2) * 0.994) < 1e-9
+
+
+def test_coupled_solver_matches_gauge_running():
+    """Gauge couplings agree with the standalone 2-loop gauge running, which shares its Yukawa terms"""
+    rg = RGRunning()
+    solver = CoupledRGSolver(rg).solve(mu_max=1e16)
+
+    for mu in [10.0, 1e3, 1e10, 1e16]:
+        g_coupled = solver.couplings_at(mu)['g']
+        g_gauge = rg.run_gauge_couplings(rg.M_Z, mu)
+        assert np.allclose(g_coupled, g_gauge, rtol=1e-5)
+
+
+def test_coupled_solver_quark_masses_run():
+    """QCD drives quark masses down with energy, leptons stay nearly flat"""
+    solver = CoupledRGSolver(loops=1).solve(mu_min=2.0, mu_max=1e16)
+    low = solver.running_masses(2.0)
+    high = solver.running_masses(1e16)
+
+    assert low['m_b'] > solver.running_masses(solver.rg.M_Z)['m_b'] > high['m_b']
+    assert abs(high['m_tau'] / low['m_tau'] - 1) < 0.1
+
+
+def test_threshold_running_segments():
+    """α_s runs through the c, b, t thresholds and is cached per boundary value"""
+    qcd = ThresholdRunning()
+    assert abs(qcd.alpha_s(qcd.M_Z) - 0.1181) < 1e-8
+    assert [s.n_f for s in qcd.segments] == [3, 4, 5, 6]
+    assert qcd.n_f(2.0) == 4 and qcd.n_f(1e3) == 6
+
+    # Asymptotic freedom across every segment, growing towards low scales
+    scales = [1.0, 1.5, 3.0, 10.0, 91.1876, 500.0, 1e10]
+    values = [qcd.alpha_s(mu) for mu in scales]
+    assert all(a > b for a, b in zip(values, values[1:]))
+    assert 0.3 < qcd.alpha_s(2.0) < 0.32
+
+    # Same inputs reuse the cached segments, a changed threshold rebuilds them
+    assert ThresholdRunning().segments is qcd.segments
+    qcd.thresholds['b'] = 4.5
+    assert ThresholdRunning().segments is not qcd.segments
+
+
+def test_rg_table_roundtrip(tmp_path):
+    """The memory-mapped table matches direct integration and is rejected on a hash mismatch"""
+    from rg_table import build_table, load_table
+
+    rg = RGRunning(use_table=False)
+    path = build_table(rg, tmp_path / 'table.npy', n_points=512)
+    table = load_table(rg, path)
+    assert table is not None and table.covers(1e10)
+
+    for mu in [200.0, 1e6, 1e16]:
+        assert np.allclose(table.gauge(mu), rg.run_gauge_couplings(rg.M_Z, mu), rtol=1e-5)
+        assert abs(table.value(mu, 'alpha_s') / rg.alpha_s(mu) - 1) < 1e-4
+
+    rg.alpha_s_MZ = 0.1179
+    assert load_table(rg, path) is None
+
+
+def test_plot_cache_eviction():
+    """Rendered plots are reused by key and evicted least-recently-used by size"""
+    from rg_plots import PlotCache, RenderedPlot, get_running_plot
+
+    cache = PlotCache(max_bytes=10)
+    cache.put('a', RenderedPlot(b'12345', 'image/png', '"a"'))
+    cache.put('b', RenderedPlot(b'12345', 'image/png', '"b"'))
+    cache.get('a')
+    cache.put('c', RenderedPlot(b'12345', 'image/png', '"c"'))
+    assert cache.get('b') is None and cache.get('a') is not None
+    assert cache.evictions == 1 and cache.size == 10
+
+    rg = RGRunning()
+    cache = PlotCache()
+    first = get_running_plot(rg, 100, 1e6, 'svg', cache=cache)
+    second = get_running_plot(rg, 100, 1e6, 'svg', cache=cache)
+    assert first is second and cache.hits == 1
+    assert first.content.lstrip().startswith(b'<?xml')
+
+
+def test_solver_presets_report_statistics():
+    """Every preset reaches the same couplings and reports its work"""
+    from rg_running import SOLVER_PRESETS, solver_settings
+
+    rg = RGRunning(use_table=False)
+    reference = rg.integrate_gauge_couplings(rg.M_Z, 1e16, preset='precise')
+
+    for preset in SOLVER_PRESETS:
+        result = rg.integrate_gauge_couplings(rg.M_Z, 1e16, preset=preset)
+        assert np.allclose(result.g, reference.g, rtol=1e-4)
+        assert result.stats['method'] == SOLVER_PRESETS[preset]['method']
+        assert result.stats['nfev'] > 0 and result.stats['n_steps'] > 0
+
+    fast = rg.integrate_gauge_couplings(rg.M_Z, 1e16, preset='fast')
+    assert fast.stats['nfev'] < reference.stats['nfev']
+    assert solver_settings('fast', method='dop853', rtol=1e-6)['method'] == 'DOP853'
+
+
+def test_alpha_s_rejects_non_perturbative_scales():
+    """Below about 0.6 GeV α_s exceeds 1 and the running reports that instead of diverging"""
+    import pytest
+
+    rg = RGRunning()
+    assert 0.7 < rg.alpha_s(0.7) < 0.75
+    with pytest.raises(ValueError, match='non-perturbative at 0.5 GeV'):
+        rg.alpha_s(0.5)
+    with pytest.raises(ValueError, match='non-perturbative'):
+        rg.get_couplings_at_scale(0.5)
+
+
+def test_low_scale_alpha_s_is_interpolated(monkeypatch):
+    """Between the perturbative limit and 1 GeV α_s comes from a cached continuation, not a new solve"""
+    import math
+    import rg_running
+    from scipy.integrate import solve_ivp
+
+    qcd = ThresholdRunning()
+    continuation = qcd.continuation
+    assert continuation is ThresholdRunning().continuation
+    assert 0.59 < qcd.M_Z * math.exp(continuation.t_lo) < 0.61
+
+    lowest = qcd.segments[0]
+    direct = solve_ivp(lambda t, y: [rg_running._alpha_s_derivative(y[0], 3, qcd.loops)],
+                       (lowest.t_lo, math.log(0.7 / qcd.M_Z)), [lowest(lowest.t_lo)],
+                       method='DOP853', rtol=1e-10, atol=1e-12).y[0, -1]
+
+    def no_solve(*args, **kwargs):
+        raise AssertionError("alpha_s integrated at a cached scale")
+
+    monkeypatch.setattr(rg_running, 'solve_ivp', no_solve)
+    assert abs(qcd.alpha_s(0.7) / direct - 1) < 1e-7
+    values = [qcd.alpha_s(mu) for mu in (0.95, 0.8, 0.65)]
+    assert all(a < b for a, b in zip(values, values[1:]))
+
+
+def test_yukawa_top_comes_from_coupled_running():
+    """y_t runs with the coupled gauge + Yukawa solution, also through the table"""
+    rg = RGRunning(use_table=False)
+    assert abs(rg.yukawa_top(rg.M_Z) - 0.994) < 1e-9
+    assert rg.yukawa_top(1e3) > rg.yukawa_top(1e10) > rg.yukawa_top(1e19)
+    assert rg.yukawa_top(0.5) == rg.yukawa_top(1.0)
+
+    table = RGRunning()
+    assert table.table is not None
+    for mu in [1e3, 1e10]:
+        assert abs(table.yukawa_top(mu) / rg.yukawa_top(mu) - 1) < 1e-4
+        assert abs(table.get_couplings_at_scale(mu)['y_top'] / rg.yukawa_top(mu) - 1) < 1e-4
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the priority scheduler: per-class limits and background yielding
+"""
+
+import asyncio
+
+from scheduler import BACKGROUND, INTERACTIVE, PriorityScheduler, scheduler_wait
+
+
+def test_background_work_yields_to_interactive():
+    """Queued interactive work starts before queued background work"""
+    async def run():
+        scheduler = PriorityScheduler(interactive_slots=1, background_slots=1)
+        order = []
+
+        async def job(name, priority, duration=0.02):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(duration)
+
+        # b1 holds the background slot, i1 the interactive one; b2 and i2 queue
+        tasks = [asyncio.ensure_future(job('b1', BACKGROUND)),
+                 asyncio.ensure_future(job('i1', INTERACTIVE, 0.05))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.ensure_future(job('b2', BACKGROUND)),
+                  asyncio.ensure_future(job('i2', INTERACTIVE))]
+        await asyncio.sleep(0.03)
+        # b1 is done, but b2 may not start while i2 is waiting
+        assert order == ['b1', 'i1']
+        assert scheduler.stats()[BACKGROUND] == {'running': 0, 'queued': 1, 'limit': 1}
+
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ['b1', 'i1', 'i2', 'b2']
+    assert scheduler_wait.count(priority=BACKGROUND) >= 2
+
+
+def test_cancelled_waiter_releases_its_place():
+    """A cancelled queued request neither holds a slot nor blocks background work"""
+    async def run():
+        scheduler = PriorityScheduler(interactive_slots=1, background_slots=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot(INTERACTIVE):
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+
+        async with scheduler.slot(BACKGROUND):
+            stats = scheduler.stats()
+        release.set()
+        await holder
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats[INTERACTIVE] == {'running': 1, 'queued': 0, 'limit': 1}
+    assert stats[BACKGROUND]['running'] == 1
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Tests for the compute service: catalog registry and HTTP endpoints
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import catalog_bundle
+import codata
+import http_cache
+import main
+import reference_store
+import responses
+from dependency_index import DependencyCycleError, DependencyIndex
+from registry import ConstantsRegistry
+
+# Cold-start budget for `import main` (cumulative, from python -X importtime)
+IMPORT_BUDGET_MS = float(os.environ.get('COMPUTE_IMPORT_BUDGET_MS', 1500))
+
+
+def write_constant(data_dir, constant_id, dependencies=(), **fields):
+    constant = {'id': constant_id, 'symbol': constant_id, 'name': constant_id,
+                'dependencies': list(dependencies), **fields}
+    path = data_dir / f"{constant_id}.json"
+    path.write_text(json.dumps(constant))
+    return path
+
+
+def make_result(constant_id, calculated_value=1.0):
+    return main.CalculationResult(
+        constant_id=constant_id, calculated_value=calculated_value, reference_value=None,
+        relative_error=None, unit='', formula='', calculation_steps=[],
+        timestamp='2024-01-01T00:00:00', status='completed')
+
+
+def test_registry_refreshes_only_changed_files(tmp_path):
+    """The catalog is parsed once and re-read per file when its mtime changes"""
+    write_constant(tmp_path, 'c_3')
+    write_constant(tmp_path, 'phi_0', ['c_3'])
+    write_constant(tmp_path, 'alpha', ['c_3', 'phi_0'])
+
+    registry = ConstantsRegistry(tmp_path)
+    assert len(registry) == 3
+    assert registry.topological_order == ['c_3', 'phi_0', 'alpha']
+    assert registry.dependencies('alpha') == ['c_3', 'phi_0']
+    generation = registry.generation
+
+    assert registry.refresh() is False
+    assert registry.generation == generation
+
+    path = write_constant(tmp_path, 'phi_0', [], unit='dimensionless')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    (tmp_path / 'alpha.json').unlink()
+
+    assert registry.refresh() is True
+    assert registry.generation == generation + 1
+    assert registry.get('phi_0')['unit'] == 'dimensionless'
+    assert 'alpha' not in registry
+
+
+def test_dependency_index_reports_closures_and_cycle_paths():
+    """Ancestors, descendants and order come from one index; cycles are named by path"""
+    index = DependencyIndex({
+        'c_3': {'dependencies': []},
+        'phi_0': {'dependencies': ['c_3', 'missing']},
+        'alpha': {'dependencies': ['c_3', 'phi_0', 'alpha']},
+        'a': {'dependencies': ['b']},
+        'b': {'dependencies': ['c']},
+        'c': {'dependencies': ['a']},
+    })
+    assert index.ancestors['alpha'] == {'c_3', 'phi_0'}
+    assert index.descendants['c_3'] == {'phi_0', 'alpha'}
+    assert index.topological_order[:3] == ['c_3', 'phi_0', 'alpha']
+    assert index.levels(['alpha', 'c_3']) == [['c_3'], ['alpha']]
+    assert index.cycles == [['a', 'b', 'c', 'a']]
+    with pytest.raises(DependencyCycleError, match='a -> b -> c -> a'):
+        index.levels(index.closure(['b']))
+
+
+def test_catalog_bundle_matches_json_and_detects_staleness(tmp_path):
+    """Consumers read the compiled bundle while it is current and the JSON files otherwise"""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    (tmp_path / 'results').mkdir()
+    write_constant(data_dir, 'c_3')
+    write_constant(data_dir, 'phi_0', ['c_3'])
+    write_constant(data_dir, 'alpha', ['c_3', 'phi_0'], unit='dimensionless')
+    (tmp_path / 'results' / 'alpha_result.json').write_text(json.dumps({'calculated_value': 0.0073}))
+
+    catalog_bundle.build_bundle(data_dir)
+    bundled = catalog_bundle.load_catalog(data_dir)
+    parsed = catalog_bundle.read_json_catalog(data_dir)
+    assert bundled.source == 'bundle' and parsed.source == 'json'
+    assert dict(bundled.constants) == parsed.constants
+    assert dict(bundled.results) == parsed.results == {'alpha': {'calculated_value': 0.0073}}
+    assert bundled.edges == parsed.edges == [('c_3', 'alpha'), ('phi_0', 'alpha'), ('c_3', 'phi_0')]
+    assert bundled.topological_order == ['c_3', 'phi_0', 'alpha']
+    assert ConstantsRegistry(data_dir).get('alpha')['unit'] == 'dimensionless'
+
+    write_constant(data_dir, 'alpha', ['c_3'], unit='1')
+    stale = catalog_bundle.load_catalog(data_dir)
+    assert stale.source == 'json' and stale.get('alpha')['unit'] == '1'
+
+
+def test_dag_served_from_registry():
+    """/dag is built from the in-memory catalog and reused until something changes"""
+    client = TestClient(main.app)
+
+    first = client.get('/dag').json()
+    assert first['is_acyclic'] is True
+    assert {node['id'] for node in first['nodes']} >= set(main.registry.constants)
+
+    start = time.perf_counter()
+    second = client.get('/dag').json()
+    assert second == first
+    assert main._dag_payload['key'] == (main.registry.generation, main.results_generation)
+    assert time.perf_counter() - start < 0.5
+
+
+def test_conditional_get_returns_304():
+    """A matching If-None-Match is answered with 304 and no body"""
+    client = TestClient(main.app)
+
+    first = client.get('/dag')
+    etag = first.headers['etag']
+    assert first.headers['cache-control'] == http_cache.CACHE_CONTROL
+
+    cached = client.get('/dag', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+    assert cached.headers['etag'] == etag
+
+    main.store_result('test_etag', make_result('test_etag', None))
+    try:
+        assert client.get('/dag', headers={'If-None-Match': etag}).status_code == 200
+    finally:
+        main.results_cache.pop('test_etag', None)
+
+
+def test_large_responses_are_compressed_once():
+    """Hot payloads are serialized and compressed once per ETag"""
+    client = TestClient(main.app)
+    headers = {'Accept-Encoding': 'gzip'}
+
+    first = client.get('/dag', headers=headers)
+    assert first.headers['content-encoding'] == 'gzip'
+    assert first.headers['etag'].endswith('-gzip"')
+    assert int(first.headers['content-length']) < len(first.content)
+
+    hits = responses.body_cache.hits
+    second = client.get('/dag', headers=headers)
+    assert second.json() == first.json()
+    assert responses.body_cache.hits == hits + 1
+
+    small = client.get('/', headers=headers)
+    assert 'content-encoding' not in small.headers
+
+
+def test_playground_compiles_formula_once():
+    """Repeated formulas are served from the compiled expression cache"""
+    client = TestClient(main.app)
+    body = {'formula': 'alpha * sqrt(E) + pi', 'parameters': {'alpha': 2.0, 'E': 4.0}}
+
+    first = client.post('/playground/run', json=body).json()
+    assert abs(first['result'] - (4.0 + 3.141592653589793)) < 1e-12
+    assert first['latex'] == main.expression_cache.get(body['formula'], body['parameters'])[0].latex
+
+    body['parameters']['alpha'] = 3.0
+    second = client.post('/playground/run', json=body).json()
+    assert second['timings']['cached'] is True
+    assert abs(second['result'] - (6.0 + 3.141592653589793)) < 1e-12
+
+    missing = client.post('/playground/run', json={'formula': 'x + y', 'parameters': {'x': 1.0}})
+    assert missing.status_code == 400
+
+
+def test_playground_evaluates_special_functions():
+    """SciPy special functions compile; symbolic sums fall back to evalf"""
+    client = TestClient(main.app)
+    zeta = client.post('/playground/run', json={'formula': 'zeta(3)', 'parameters': {}}).json()
+    assert abs(zeta['result'] - 1.2020569031595942) < 1e-12
+
+    basel = client.post('/playground/run', json={'formula': 'Sum(1/k**2, (k, 1, oo))', 'parameters': {}})
+    assert abs(basel.json()['result'] - 3.141592653589793 ** 2 / 6) < 1e-12
+
+    bessel = client.post('/playground/batch', json={
+        'formula': 'besselj(0, x)', 'parameters': {'x': [0.0, 1.0]}
+    }).json()
+    assert bessel['result'][0] == 1.0 and abs(bessel['result'][1] - 0.7651976865579666) < 1e-12
+
+    polylog = client.post('/playground/batch', json={
+        'formula': 'polylog(2, x)', 'parameters': {'x': [0.0, 1.0]}
+    }).json()
+    assert abs(polylog['result'][1] - 3.141592653589793 ** 2 / 6) < 1e-12
+
+
+def test_playground_batch_broadcasts_ranges():
+    """Arrays and ranges are evaluated in one call and returned column-wise"""
+    client = TestClient(main.app)
+    body = {
+        'formula': 'a * x**2 + b',
+        'parameters': {'x': {'start': 0, 'stop': 2, 'num': 5}, 'a': [1, 2, 3, 4, 5], 'b': 1.0}
+    }
+    data = client.post('/playground/batch', json=body).json()
+    assert data['shape'] == [5]
+    assert data['columns']['x'] == [0.0, 0.5, 1.0, 1.5, 2.0]
+    assert data['result'] == [1.0, 1.5, 4.0, 10.0, 21.0]
+
+    grid = client.post('/playground/batch', json={
+        'formula': 'x / y', 'grid': True, 'format': 'binary',
+        'parameters': {'x': [1, 2, 3], 'y': [1, 0]}
+    })
+    assert grid.headers['x-playground-shape'] == '3,2'
+    values = np.frombuffer(grid.content, dtype='<f8').reshape(3, 2)
+    assert values[2, 0] == 3.0 and np.isinf(values[0, 1])
+
+    too_many = client.post('/playground/batch', json={
+        'formula': 'x', 'parameters': {'x': {'start': 0, 'stop': 1, 'num': 10**7}}
+    })
+    assert too_many.status_code == 400
+
+
+def test_rg_running_below_the_table_with_default_solver():
+    """Scales below M_Z integrate with LSODA after the process-wide coupled Yukawa solution is built"""
+    client = TestClient(main.app)
+    for scale in (10, 2):
+        response = client.get(f'/api/theory/rg-running/{scale}')
+        assert response.status_code == 200, response.text
+        couplings = response.json()
+        assert couplings['scale'] == scale
+        assert couplings['y_top'] > 0.994 and couplings['g3'] > 1.2
+
+    # The coupled solution is solved once per process, not once per request
+    assert main.rg_model() is main.rg_model()
+    assert main.rg_model()._coupled is not None
+
+
+def test_batch_calculation_runs_levels_in_order_and_skips_cached_results(monkeypatch, tmp_path):
+    """Dependencies come in earlier levels; cached ones are served without running their notebooks"""
+    calls = []
+
+    async def fake_notebook(constant_id, notebook_path, parameters=None, priority='interactive'):
+        calls.append(constant_id)
+        result = make_result(constant_id, 0.0073)
+        main.store_result(constant_id, result)
+        return result
+
+    closure = main.registry.closure(['alpha'])
+    assert {'alpha', 'c_3', 'phi_0'} <= closure
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'constants' / 'notebooks').mkdir(parents=True)
+    for constant_id in closure:
+        (tmp_path / 'constants' / 'notebooks' / f"{constant_id}.ipynb").write_text('{}')
+    monkeypatch.setattr(main, 'calculate_notebook', fake_notebook)
+
+    for constant_id in closure - {'alpha'}:
+        main.store_result(constant_id, make_result(constant_id, 0.05))
+    client = TestClient(main.app)
+    try:
+        data = client.post('/calculate/batch', json={'constant_ids': ['alpha']}).json()
+        levels = data['levels']
+        assert levels[-1] == ['alpha']
+        assert {c for level in levels for c in level} == closure
+        assert calls == ['alpha']
+        assert all(data['results'][c]['cached'] for c in closure - {'alpha'})
+        assert data['results']['alpha']['cached'] is False
+        assert data['results']['alpha']['result']['calculated_value'] == 0.0073
+        assert data['summary']['total'] == len(closure) and data['summary']['computed'] == 1
+
+        assert client.post('/calculate/batch', json={'constant_ids': ['nope']}).status_code == 404
+    finally:
+        for constant_id in closure:
+            main.results_cache.pop(constant_id, None)
+
+
+def test_batch_and_single_calculations_agree(monkeypatch, tmp_path):
+    """A batch runs every notebook with the same parameters as a single calculation"""
+    calls = []
+
+    async def fake_notebook(constant_id, notebook_path, parameters=None, priority='interactive'):
+        calls.append((constant_id, parameters or {}))
+        result = make_result(constant_id, 1.0 + len(parameters or {}))
+        main.store_result(constant_id, result)
+        return result
+
+    closure = main.registry.closure(['alpha'])
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'constants' / 'notebooks').mkdir(parents=True)
+    for constant_id in closure:
+        (tmp_path / 'constants' / 'notebooks' / f"{constant_id}.ipynb").write_text('{}')
+    monkeypatch.setattr(main, 'calculate_notebook', fake_notebook)
+    client = TestClient(main.app)
+    try:
+        batch = client.post('/calculate/batch', json={'constant_ids': ['alpha'], 'force_recalculate': True}).json()
+        for constant_id in closure:
+            single = client.post(f'/calculate/{constant_id}', json={'constant_id': constant_id, 'force_recalculate': True}).json()
+            assert batch['results'][constant_id]['result']['calculated_value'] == single['calculated_value']
+        assert all(parameters == {} for _, parameters in calls)
+    finally:
+        for constant_id in closure:
+            main.results_cache.pop(constant_id, None)
+
+
+def test_warmup_runs_in_background_and_reports_progress(monkeypatch, tmp_path):
+    """Startup serves requests at once; a failing constant does not stop the warm-up"""
+    release = asyncio.Event()
+
+    async def fake_notebook(constant_id, notebook_path, parameters=None, priority='interactive'):
+        await release.wait()
+        if constant_id == 'phi_0':
+            raise RuntimeError('kernel died')
+        result = make_result(constant_id)
+        main.store_result(constant_id, result)
+        return result
+
+    constant_ids = list(main.registry)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'constants' / 'notebooks').mkdir(parents=True)
+    for constant_id in constant_ids:
+        (tmp_path / 'constants' / 'notebooks' / f"{constant_id}.ipynb").write_text('{}')
+    monkeypatch.setattr(main, 'calculate_notebook', fake_notebook)
+    monkeypatch.setattr(main, 'WARMUP_ENABLED', True)
+    monkeypatch.setattr(main, 'warmup', main.WarmupProgress())
+    try:
+        with TestClient(main.app) as client:
+            # Ready while the warm-up is still blocked, but not warm
+            assert client.get('/ready').json()['warmup']['state'] == 'running'
+            assert client.get('/ready?require_warm=true').status_code == 503
+            client.portal.call(release.set)
+            for _ in range(200):
+                progress = client.get('/ready').json()['warmup']
+                if progress['state'] != 'running':
+                    break
+                time.sleep(0.01)
+            assert progress['state'] == 'complete'
+            assert progress['planned'] == progress['total'] == len(constant_ids)
+            assert progress['errors'] == 1 and progress['computed'] == len(constant_ids) - 1
+            assert client.get('/ready?require_warm=true').status_code == 200
+    finally:
+        for constant_id in constant_ids:
+            main.results_cache.pop(constant_id, None)
+
+
+def test_reference_diff_recomputes_only_changed_references(monkeypatch, tmp_path):
+    """Switching releases re-grades the cached predictions without recalculating"""
+    (tmp_path / 'pdg_2022.json').write_text(json.dumps(
+        {'name': 'PDG 2022', 'values': {'m_w': {'value': 80.377}, 'm_z': {'value': 91.1876}}}))
+    (tmp_path / 'pdg_2024.json').write_text(json.dumps(
+        {'name': 'PDG 2024', 'values': {'m_w': {'value': 95.0}, 'm_z': {'value': 91.1876},
+                                        'v_h': {'value': 246.22}}}))
+    store = reference_store.load_reference_store(references_dir=tmp_path)
+    assert store.summary()['CODATA 2022'] == len(codata.REFERENCES)
+
+    changes = {c.constant_id: c for c in store.diff('PDG 2022', 'PDG 2024', {'m_w': 80.46, 'm_z': 91.75})}
+    assert set(changes) == {'m_w', 'v_h'}
+    assert changes['m_w'].old_status == 'validated' and changes['m_w'].new_status == 'speculative'
+    assert changes['v_h'].calculated is None and changes['v_h'].new_status == 'speculative'
+
+    monkeypatch.setattr(main, 'load_reference_store',
+                        lambda constants: reference_store.load_reference_store(constants, references_dir=tmp_path))
+    monkeypatch.setitem(main._reference_store, 'store', None)
+    main.store_result('m_w', make_result('m_w', 80.46))
+    client = TestClient(main.app)
+    try:
+        assert 'catalog' in client.get('/references').json()['releases']
+        diff = client.get('/references/diff', params={'old': 'catalog', 'new': 'PDG 2024'}).json()
+        m_w = next(c for c in diff['changes'] if c['constant_id'] == 'm_w')
+        assert m_w['old_reference'] == 80.379 and m_w['calculated'] == 80.46
+        assert m_w['status_changed'] and m_w['new_relative_error'] > reference_store.VALIDATED_DEVIATION
+        assert diff['status_changes'] >= 1
+        assert client.get('/references/diff', params={'old': 'catalog', 'new': 'PDG 1999'}).status_code == 404
+    finally:
+        main.results_cache.pop('m_w', None)
+        main._reference_store['store'] = None
+
+
+def test_batch_stream_emits_results_heartbeats_and_summary(monkeypatch):
+    """Results are streamed one per line, with heartbeats while a level is running"""
+    async def slow_batch(levels, force_recalculate=False, max_parallel=None, priority='background'):
+        for level, constant_ids in enumerate(levels):
+            await asyncio.sleep(0.05)
+            for constant_id in constant_ids:
+                yield {'constant_id': constant_id, 'level': level, 'cached': False,
+                       'elapsed_ms': 50.0, 'status': 'completed', 'result': None}
+
+    monkeypatch.setattr(main, 'run_batch', slow_batch)
+    monkeypatch.setattr(main, 'STREAM_HEARTBEAT', 0.01)
+    client = TestClient(main.app)
+
+    response = client.post('/calculate/batch/stream', json={'constant_ids': ['alpha']})
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.text.splitlines()]
+    types = [record['type'] for record in records]
+    assert types[0] == 'plan' and types[-1] == 'summary'
+    assert 'heartbeat' in types
+    assert [r['constant_id'] for r in records if r['type'] == 'result'][-1] == 'alpha'
+    assert records[-1]['total'] == records[0]['total']
+
+    sse = client.post('/calculate/batch/stream', json={'constant_ids': ['alpha']},
+                      headers={'Accept': 'text/event-stream'})
+    assert sse.headers['content-type'].startswith('text/event-stream')
+    assert sse.text.startswith('event: plan\ndata: {')
+    assert sse.text.rstrip().split('\n\n')[-1].startswith('event: summary')
+
+
+def test_metrics_endpoint_reports_route_latency_and_caches():
+    """/metrics is Prometheus text with per-route histograms and cache counters"""
+    client = TestClient(main.app)
+    hits = main.results_cache_hits.value()
+
+    main.store_result('test_metrics', make_result('test_metrics'))
+    try:
+        client.get('/calculate/test_metrics')
+        client.get('/calculate/test_metrics')
+    finally:
+        main.results_cache.pop('test_metrics', None)
+
+    response = client.get('/metrics')
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    text = response.text
+    assert main.results_cache_hits.value() == hits + 2
+    assert f'compute_results_cache_hits_total {int(hits + 2)}' in text
+    assert ('compute_http_request_duration_seconds_count'
+            '{method="GET",route="/calculate/{constant_id}",status="200"}') in text
+    assert 'compute_http_request_duration_seconds_bucket{method="GET",route="/calculate/{constant_id}",' \
+           'status="200",le="+Inf"}' in text
+    assert 'compute_notebooks_in_flight 0' in text
+    assert 'compute_websocket_connections 0' in text
+
+
+def test_profiled_request_returns_summary_and_artifact(monkeypatch, tmp_path):
+    """X-Profile runs the request under cProfile and keeps the stats as an artifact"""
+    monkeypatch.setattr(main.profiling, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(main.profiling, 'PROFILE_DIR', tmp_path)
+    client = TestClient(main.app)
+
+    assert 'x-profile-id' not in client.get('/dag', headers={'X-Profile': 'cprofile'}).headers
+
+    response = client.get('/api/theory/cascade/4', headers={'X-Profile': 'cprofile'})
+    assert response.status_code == 200
+    assert response.json()['n'] == 4
+    assert 'get_cascade_vev' in response.headers['x-profile-top']
+
+    profile_id = response.headers['x-profile-id']
+    summary = client.get(f'/profiles/{profile_id}')
+    assert summary.text.startswith('GET /api/theory/cascade/4 (cprofile)')
+    assert client.get(f'/profiles/{profile_id}', params={'format': 'pstats'}).status_code == 200
+    assert client.get('/profiles/..%2Fmain', params={'format': 'folded'}).status_code == 404
+
+    sampled = client.get('/api/theory/cascade/4', params={'profile': 'sample'})
+    assert (tmp_path / f"{sampled.headers['x-profile-id']}.folded").exists()
+
+
+def test_shared_state_dedupes_work_across_workers(monkeypatch, tmp_path):
+    """Workers see each other's results and events, and never compute a constant twice"""
+    path = str(tmp_path / 'shared.db')
+    worker_a = main.SharedState(path, worker_id='a', claim_timeout=5)
+    worker_b = main.SharedState(path, worker_id='b', claim_timeout=5)
+
+    assert worker_a.claim('alpha')
+    assert not worker_b.claim('alpha') and worker_b.is_claimed('alpha')
+    worker_a.publish({'type': 'calculation_complete', 'constant_id': 'c_3'})
+    assert worker_b.other_events() == [{'type': 'calculation_complete', 'constant_id': 'c_3'}]
+    assert worker_a.other_events() == []
+    # A claim held by a process that no longer exists is free to take
+    worker_a.release('alpha')
+    dead = main.SharedState(path, worker_id='999999999-dead', claim_timeout=5)
+    assert dead.claim('c_3') and not worker_b.is_claimed('c_3') and worker_b.claim('c_3')
+    dead.close()
+    assert worker_a.claim('alpha')
+
+    calls = []
+
+    async def fake_notebook(constant_id, notebook_path, parameters=None, priority='interactive'):
+        calls.append(constant_id)
+        await asyncio.sleep(0.05)
+        return make_result(constant_id)
+
+    async def finish_elsewhere():
+        # Worker a completes the constant it claimed
+        await asyncio.sleep(0.05)
+        worker_a.put_result('alpha', {**(await fake_notebook('alpha', None)).model_dump(), 'calculated_value': 2.0})
+        worker_a.release('alpha')
+
+    async def scenario():
+        finisher = asyncio.ensure_future(finish_elsewhere())
+        results = await asyncio.gather(
+            main.calculate_shared('phi_0', tmp_path),
+            main.calculate_shared('phi_0', tmp_path),
+            main.calculate_shared('alpha', tmp_path)
+        )
+        await finisher
+        return results
+
+    monkeypatch.setattr(main, 'shared_state', worker_b)
+    monkeypatch.setattr(main, 'SYNC_INTERVAL', 0.01)
+    monkeypatch.setattr(main, 'calculate_notebook', fake_notebook)
+    try:
+        first, second, alpha = asyncio.run(scenario())
+        assert first is second
+        assert alpha.calculated_value == 2.0
+        assert calls == ['phi_0', 'alpha']  # alpha only inside worker a
+        assert main.results_cache['alpha'].calculated_value == 2.0
+        assert [c for c, _ in worker_a.changed_results()] == ['alpha']
+    finally:
+        main.results_cache.pop('alpha', None)
+        worker_a.close()
+        worker_b.close()
+
+
+def test_overlapping_cprofile_requests_fall_back_to_sampling(monkeypatch, tmp_path):
+    """A second cProfile request while one is running is sampled instead of failing"""
+    monkeypatch.setattr(main.profiling, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(main.profiling, 'PROFILE_DIR', tmp_path)
+
+    async def slow_app(scope, receive, send):
+        await asyncio.sleep(0.05)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'{}'})
+
+    middleware = main.profiling.ProfilingMiddleware(slow_app)
+
+    async def request():
+        sent = []
+        scope = {'type': 'http', 'method': 'GET', 'path': '/calculate/x', 'query_string': b'',
+                 'headers': [(b'x-profile', b'cprofile')]}
+
+        async def send(message):
+            sent.append(message)
+        await middleware(scope, None, send)
+        return dict(sent[0]['headers'])[b'x-profile-mode']
+
+    async def both():
+        return await asyncio.gather(request(), request())
+
+    assert sorted(asyncio.run(both())) == [b'cprofile', b'sample']
+
+    main.profiling.prune_artifacts(limit=2)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_service_import_stays_within_budget():
+    """Importing the service defers papermill, sympy and scipy and stays within the budget"""
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('papermill', 'sympy', 'scipy') if m in sys.modules))")
+    run = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert run.returncode == 0, run.stderr
+    assert run.stdout.strip() == '[]'
+
+    # import time: self [us] | cumulative [us] | module
+    main_line = next(line for line in run.stderr.splitlines() if line.rstrip().endswith('| main'))
+    cumulative_ms = int(main_line.split('|')[1]) / 1000
+    assert cumulative_ms < IMPORT_BUDGET_MS, f"import main took {cumulative_ms:.0f} ms"
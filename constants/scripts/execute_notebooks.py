@@ -10,6 +10,10 @@ import subprocess
 import nbformat
 from nbconvert.preprocessors import ExecutePreprocessor
 
+sys.path.append(str(Path(__file__).parent.parent.parent / 'compute'))
+
+from catalog_bundle import load_catalog
+
 def execute_notebook(notebook_path):
     """Execute a single notebook and return success status."""
     try:
@@ -42,6 +46,10 @@ def main():
     notebooks = sorted(notebooks_dir.glob('*.ipynb'))
     notebooks = [nb for nb in notebooks if not nb.stem.endswith('_executed')]
     
+    # Dependencies before their dependents, from the catalog's dependency index
+    position = load_catalog(notebooks_dir.parent / 'data').index.position
+    notebooks.sort(key=lambda nb: (position.get(nb.stem, len(position)), nb.stem))
+    
     print(f"Found {len(notebooks)} notebooks to execute")
     
     results = {}
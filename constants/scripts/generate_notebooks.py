@@ -2,103 +2,88 @@
 """
 Generate fully self-contained Jupyter notebooks from JSON constant definitions.
 Updated with correct physics calculations and status categorization.
+
+Generation is incremental: each notebook's content hash covers its constant,
+the constant's transitive dependencies and the template version, and only
+notebooks whose hash changed (plus their dependents) are rewritten, in
+parallel processes. notebooks/manifest.json records the hashes and which
+notebooks were generated, skipped or failed. Pass --force to rewrite all.
+
+notebooks/catalog_values.py is generated alongside from the same per-constant
+code: it computes every constant once, in topological order, so batch jobs,
+tests and exporters can import VALUES instead of running 62 notebooks that
+each repeat their whole dependency chain. --check runs the calculation
+cells of every notebook and compares their results with the module's.
 """
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
 import json
+import math
 import os
 import sys
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import nbformat as nbf
-from nbformat.v4 import new_notebook, new_code_cell, new_markdown_cell
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / 'compute'))
 
-def load_constant(json_path):
-    """Load constant definition from JSON file"""
-    with open(json_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+from catalog_bundle import load_catalog
+from codata import load_codata
+from dependency_index import DependencyCycleError
+from lazy_imports import LazyModule
 
-def get_all_dependencies(constant_id, data_dir, visited=None):
-    """Recursively get all dependencies for a constant"""
-    if visited is None:
-        visited = set()
-    
-    if constant_id in visited:
-        return {}
-    
-    visited.add(constant_id)
-    dependencies = {}
-    
-    json_path = data_dir / f"{constant_id}.json"
-    if not json_path.exists():
-        return {}
-    
-    constant = load_constant(json_path)
-    
-    # Skip self-referential dependencies
-    if constant_id != 'm_planck' or 'm_planck' not in constant.get('dependencies', []):
-        dependencies[constant_id] = constant
-    
-    # Recursively get dependencies
-    for dep_id in constant.get('dependencies', []):
-        if dep_id == constant_id:
-            continue
-        if dep_id == 'm_planck' and constant_id != 'm_planck':
-            dep_path = data_dir / f"m_planck.json"
-            if dep_path.exists():
-                m_planck = load_constant(dep_path)
-                dependencies['m_planck'] = m_planck
-        else:
-            dep_dependencies = get_all_dependencies(dep_id, data_dir, visited)
-            dependencies.update(dep_dependencies)
-    
-    return dependencies
+# nbformat (with jsonschema) takes seconds to import; runs with nothing to
+# regenerate never load it
+nbf = LazyModule('nbformat')
+nbf_v4 = LazyModule('nbformat.v4')
 
-def topological_sort(dependencies):
-    """Sort dependencies in topological order"""
-    sorted_ids = []
-    visited = set()
-    temp_visited = set()
-    
-    # Define fundamental constants
-    fundamental = {'c_3', 'phi_0', 'm_planck', 'alpha'}
-    
-    def visit(const_id):
-        if const_id in temp_visited:
-            if const_id in fundamental:
-                return
-            raise ValueError(f"Circular dependency detected at {const_id}")
-        if const_id in visited:
-            return
-        
-        temp_visited.add(const_id)
-        const = dependencies.get(const_id, {})
-        
-        for dep_id in const.get('dependencies', []):
-            if dep_id == const_id:
-                continue
-            if const_id in fundamental and dep_id in fundamental:
-                continue
-            if dep_id in dependencies:
-                visit(dep_id)
-        
-        temp_visited.remove(const_id)
-        visited.add(const_id)
-        sorted_ids.append(const_id)
-    
-    # Process fundamental constants first
-    for const_id in fundamental:
-        if const_id in dependencies and const_id not in visited:
-            visited.add(const_id)
-            sorted_ids.insert(0, const_id)
-    
-    # Process remaining constants
-    for const_id in dependencies:
-        if const_id not in visited:
-            visit(const_id)
-    
-    return sorted_ids
+# Reference values are looked up in the CODATA listing, never copied by hand
+CODATA = load_codata()
+ALPHA_REFERENCE = f"1.0/{CODATA.value('inverse fine-structure constant')!r}"
+
+# Notebook name -> (CODATA quantity, factor to the notebook's unit, comment)
+CODATA_CONSTANTS = {
+    'c': ('speed of light in vacuum', 1.0, 'Speed of light in m/s'),
+    'hbar': ('reduced Planck constant', 1.0, 'Reduced Planck constant in J⋅s'),
+    'hbar_eV_s': ('reduced Planck constant in eV s', 1.0, 'Reduced Planck constant in eV⋅s'),
+    'hbar_GeV_s': ('reduced Planck constant in eV s', 1e-9, 'Reduced Planck constant in GeV⋅s'),
+    'G': ('Newtonian constant of gravitation', 1.0, 'Gravitational constant in m³/kg⋅s²'),
+    'e': ('elementary charge', 1.0, 'Elementary charge in C'),
+    'm_e_kg': ('electron mass', 1.0, 'Electron mass in kg'),
+    'k_B': ('Boltzmann constant', 1.0, 'Boltzmann constant in J/K'),
+    'G_F': ('Fermi coupling constant', 1.0, 'Fermi constant in GeV^-2'),
+}
+CODATA_CONVERSIONS = {
+    'GeV_to_kg': ('electron volt-kilogram relationship', 1e9, '1 GeV/c² in kg'),
+    'GeV_to_J': ('electron volt-joule relationship', 1e9, '1 GeV in J'),
+    'eV_to_J': ('electron volt-joule relationship', 1.0, '1 eV in J'),
+}
+
+# Bump when the notebook template changes in a way the source hash does not capture
+TEMPLATE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+# Importable module computing the whole catalog, next to the notebooks
+MODULE_NAME = 'catalog_values.py'
+
+def codata_literal(quantity, scale=1.0):
+    """Python literal of a CODATA value in the notebook's unit"""
+    return repr(float(format(CODATA.value(quantity) * scale, '.12g')))
+
+def codata_block():
+    """Physical constants and unit conversions cell code, from the CODATA table"""
+    lines = [f"# Physical constants (CODATA {CODATA.release} values)"]
+    for name, (quantity, scale, comment) in CODATA_CONSTANTS.items():
+        lines.append(f"{name} = {codata_literal(quantity, scale)}  # {comment}")
+    lines += ["", "# Unit conversions"]
+    for name, (quantity, scale, comment) in CODATA_CONVERSIONS.items():
+        lines.append(f"{name} = {codata_literal(quantity, scale)}  # {comment}")
+    lines.append("MeV_to_GeV = 0.001")
+    return '\n'.join(lines) + '\n'
 
 def clean_symbol(symbol):
     """Clean symbol for use as variable name"""
@@ -106,63 +91,22 @@ def clean_symbol(symbol):
     cleaned = re.sub(r'^(\d)', r'_\1', cleaned)
     return cleaned
 
-def generate_notebook(constant, data_dir):
-    """Generate a complete notebook for a constant"""
-    nb = new_notebook()
-    
-    # Title and description
-    title = f"# {constant['name']} ({constant['symbol']})"
-    description = [
-        title,
-        f"\n**Description:** {constant.get('description', '')}",
-        f"\n**Category:** {constant.get('category', 'unknown')}",
-        f"\n**Status:** {constant.get('status', 'speculative')}"
-    ]
-    
-    if constant.get('unit'):
-        description.append(f"\n**Unit:** {constant['unit']}")
-    
-    if constant.get('formula'):
-        description.append(f"\n**Formula:** `{constant['formula']}`")
-    
-    nb.cells.append(new_markdown_cell('\n'.join(description)))
-    
-    # Get all dependencies
-    all_deps = get_all_dependencies(constant['id'], data_dir)
-    
-    # Remove self from dependencies
-    all_deps.pop(constant['id'], None)
-    
-    # Sort dependencies
-    sorted_deps = []
-    if all_deps:
-        try:
-            sorted_deps = topological_sort(all_deps)
-        except ValueError as e:
-            print(f"Warning: {e}")
-            sorted_deps = list(all_deps.keys())
-    
-    # Imports and constants
-    imports = """import numpy as np
+def ordered_dependencies(const_id, catalog):
+    """Transitive dependencies of a constant in the catalog's global topological order"""
+    ancestors = catalog.index.ancestors.get(const_id, frozenset())
+    try:
+        return catalog.index.order(ancestors)
+    except DependencyCycleError as e:
+        print(f"Warning: {e}")
+        return sorted(ancestors)
+
+def prelude_code():
+    """Imports, physical constants and helper functions every calculation runs after"""
+    return """import numpy as np
 import math
 from scipy import constants as scipy_const
 
-# Physical constants (CODATA 2022 values)
-c = 299792458.0  # Speed of light in m/s
-hbar = 1.054571817e-34  # Reduced Planck constant in J⋅s
-hbar_eV_s = 6.582119569e-16  # Reduced Planck constant in eV⋅s
-hbar_GeV_s = 6.582119569e-25  # Reduced Planck constant in GeV⋅s
-G = 6.67430e-11  # Gravitational constant in m³/kg⋅s²
-e = 1.602176634e-19  # Elementary charge in C
-m_e_kg = 9.1093837015e-31  # Electron mass in kg
-k_B = 1.380649e-23  # Boltzmann constant in J/K
-
-# Unit conversions
-GeV_to_kg = 1.78266192e-27  # 1 GeV/c² in kg
-GeV_to_J = 1.602176634e-10  # 1 GeV in J
-eV_to_J = 1.602176634e-19  # 1 eV in J
-MeV_to_GeV = 0.001
-
+""" + codata_block() + """
 # Fundamental theory parameters
 c_3 = 0.039788735772973836  # Topological fixed point: 1/(8π)
 phi_0 = 0.053171  # Fundamental VEV
@@ -172,7 +116,6 @@ M_Pl = 1.2209e19  # Planck mass in GeV
 M_Z = 91.1876  # Z boson mass in GeV
 M_W = 80.379  # W boson mass in GeV
 v_H = 246.22  # Higgs VEV in GeV
-G_F = 1.1663787e-5  # Fermi constant in GeV^-2
 
 # Cosmological parameters
 H_0 = 2.195e-18  # Hubble constant in Hz (67.4 km/s/Mpc)
@@ -195,21 +138,52 @@ def correction_vev_backreaction_plus():
     return 1 + 2 * phi_0
 
 # RG running helpers
-def alpha_s_MSbar(mu_GeV, n_f=5, Lambda_QCD_GeV=0.332):
+QUARK_THRESHOLDS_GEV = {'c': 1.27, 'b': 4.18, 't': 172.76}  # MS-bar masses
+
+def active_flavours(mu_GeV):
+    \"\"\"Number of active quark flavours at scale mu\"\"\"
+    return 3 + sum(1 for m in QUARK_THRESHOLDS_GEV.values() if mu_GeV > m)
+
+def _alpha_s_2loop(mu_GeV, n_f, Lambda_GeV):
+    b0 = (33 - 2*n_f) / (12*np.pi)
+    b1 = (153 - 19*n_f) / (24*np.pi**2)
+    L = np.log(mu_GeV**2 / Lambda_GeV**2)
+    return 1 / (b0 * L) * (1 - b1 * np.log(L) / (b0**2 * L))
+
+def lambda_qcd_matched(n_f, Lambda_5_GeV=0.332):
+    \"\"\"
+    Lambda for n_f flavours that keeps alpha_s continuous at the c, b, t
+    thresholds, given Lambda for n_f = 5
+    \"\"\"
+    Lambda = Lambda_5_GeV
+    step = 1 if n_f > 5 else -1
+    for k in range(5, n_f, step):
+        m = QUARK_THRESHOLDS_GEV['t' if step > 0 else ('b' if k == 5 else 'c')]
+        target = _alpha_s_2loop(m, k, Lambda)
+        # alpha_s(m) grows with Lambda; bisect in log Lambda
+        lo, hi = np.log(1e-6), np.log(m / 2)
+        for _ in range(100):
+            mid = 0.5 * (lo + hi)
+            if _alpha_s_2loop(m, k + step, np.exp(mid)) < target:
+                lo = mid
+            else:
+                hi = mid
+        Lambda = np.exp(0.5 * (lo + hi))
+    return Lambda
+
+def alpha_s_MSbar(mu_GeV, n_f=None, Lambda_QCD_GeV=0.332):
     \"\"\"
     Calculate alpha_s at scale mu using 2-loop RG running.
     mu_GeV: Energy scale in GeV
-    n_f: Number of active quark flavors
-    Lambda_QCD_GeV: QCD scale in GeV
+    n_f: Number of active quark flavors. By default it follows the c, b, t
+        thresholds, with Lambda_QCD_GeV taken as the n_f = 5 value and
+        matched across each threshold
+    Lambda_QCD_GeV: QCD scale in GeV for n_f flavours (n_f = 5 by default)
     \"\"\"
-    b0 = (33 - 2*n_f) / (12*np.pi)
-    b1 = (153 - 19*n_f) / (24*np.pi**2)
-    
-    L = np.log(mu_GeV**2 / Lambda_QCD_GeV**2)
-    
-    # 2-loop formula
-    alpha_s = 1 / (b0 * L) * (1 - b1 * np.log(L) / (b0**2 * L))
-    return alpha_s / (4*np.pi)
+    if n_f is None:
+        n_f = active_flavours(mu_GeV)
+        Lambda_QCD_GeV = lambda_qcd_matched(n_f, Lambda_QCD_GeV)
+    return _alpha_s_2loop(mu_GeV, n_f, Lambda_QCD_GeV) / (4*np.pi)
 
 def sin2_theta_W_MSbar():
     \"\"\"Calculate sin²θ_W using the standard relation\"\"\"
@@ -225,137 +199,123 @@ def gamma_cascade(n):
     \"\"\"E8 cascade attenuation function\"\"\"
     return 0.834 + 0.108*n + 0.0105*n**2
 """
+
+def dependency_code(dep):
+    """Code storing the value of a dependency in calculated_values"""
+    dep_id = dep['id']
+    dep_code = [f"# {dep['name']} ({dep['symbol']})"]
     
-    nb.cells.append(new_code_cell(imports))
+    # Handle special calculations based on ID
+    if dep_id == 'alpha':
+        dep_code.append("# Fine structure constant from cubic equation")
+        dep_code.append("A = 1.0 / (256 * np.pi**3)")
+        dep_code.append("kappa = (41.0 / (20 * np.pi)) * np.log(1.0 / phi_0)")
+        dep_code.append("coefficients = [1, -A, 0, -A * c_3**2 * kappa]")
+        dep_code.append("roots = np.roots(coefficients)")
+        dep_code.append("physical_root = None")
+        dep_code.append("for root in roots:")
+        dep_code.append("    if np.isreal(root) and root.real > 0 and root.real < 0.01:")
+        dep_code.append("        physical_root = root.real")
+        dep_code.append("        break")
+        dep_code.append(f"calculated_values['alpha'] = physical_root if physical_root else {ALPHA_REFERENCE}")
     
-    # Add dependency calculations
-    if sorted_deps:
-        nb.cells.append(new_markdown_cell("## Required Constants\n\nCalculating all dependencies first:"))
-        
-        dep_code = ["# Calculate all required constants"]
-        dep_code.append("calculated_values = {}\n")
-        
-        for dep_id in sorted_deps:
-            dep = all_deps[dep_id]
-            
-            dep_code.append(f"# {dep['name']} ({dep['symbol']})")
-            
-            # Handle special calculations based on ID
-            if dep_id == 'alpha':
-                dep_code.append("# Fine structure constant from cubic equation")
-                dep_code.append("A = 1.0 / (256 * np.pi**3)")
-                dep_code.append("kappa = (41.0 / (20 * np.pi)) * np.log(1.0 / phi_0)")
-                dep_code.append("coefficients = [1, -A, 0, -A * c_3**2 * kappa]")
-                dep_code.append("roots = np.roots(coefficients)")
-                dep_code.append("physical_root = None")
-                dep_code.append("for root in roots:")
-                dep_code.append("    if np.isreal(root) and root.real > 0 and root.real < 0.01:")
-                dep_code.append("        physical_root = root.real")
-                dep_code.append("        break")
-                dep_code.append("calculated_values['alpha'] = physical_root if physical_root else 1.0/137.035999084")
-            
-            elif dep_id == 'phi_0':
-                dep_code.append("calculated_values['phi_0'] = 0.053171")
-            
-            elif dep_id == 'c_3':
-                dep_code.append("calculated_values['c_3'] = 1.0 / (8 * np.pi)")
-            
-            elif dep_id == 'm_planck':
-                dep_code.append("calculated_values['m_planck'] = 1.2209e19  # GeV")
-            
-            elif dep_id == 'alpha_s':
-                dep_code.append("# Strong coupling at M_Z using 2-loop RG")
-                dep_code.append("calculated_values['alpha_s'] = alpha_s_MSbar(M_Z, n_f=5, Lambda_QCD_GeV=0.332)")
-            
-            elif dep_id == 'sin2_theta_w':
-                dep_code.append("# Weinberg angle from W and Z masses")
-                dep_code.append("calculated_values['sin2_theta_w'] = sin2_theta_W_MSbar()")
-            
-            elif dep_id == 'g_1':
-                dep_code.append("# U(1) gauge coupling")
-                dep_code.append("sin2_theta_w = calculated_values.get('sin2_theta_w', sin2_theta_W_MSbar())")
-                dep_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
-                dep_code.append("calculated_values['g_1'] = np.sqrt(4*np.pi*alpha / (1 - sin2_theta_w))")
-            
-            elif dep_id == 'g_2':
-                dep_code.append("# SU(2) gauge coupling")
-                dep_code.append("sin2_theta_w = calculated_values.get('sin2_theta_w', sin2_theta_W_MSbar())")
-                dep_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
-                dep_code.append("calculated_values['g_2'] = np.sqrt(4*np.pi*alpha / sin2_theta_w)")
-            
-            elif dep_id == 'lambda_qcd':
-                dep_code.append("calculated_values['lambda_qcd'] = 332  # MeV, MS-bar scheme")
-            
-            elif dep_id == 'v_h' or dep_id == 'v_H':
-                dep_code.append("calculated_values['v_h'] = 246.22  # GeV")
-                dep_code.append("calculated_values['v_H'] = 246.22  # GeV")
-            
-            elif dep_id == 'm_e':
-                dep_code.append("# Electron mass")
-                dep_code.append("v_H = calculated_values.get('v_h', 246.22)")
-                dep_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
-                dep_code.append("phi_0 = calculated_values.get('phi_0', 0.053171)")
-                dep_code.append("calculated_values['m_e'] = (v_H/np.sqrt(2))*alpha*phi_0**5*1e6")
-            
-            elif dep_id == 'gamma_function':
-                dep_code.append("# Gamma function is a function, not a constant")
-                dep_code.append("calculated_values['gamma_function'] = lambda n: 0.834 + 0.108*n + 0.0105*n**2")
-                dep_code.append("# Skip printing for lambda function")
-                continue
+    elif dep_id == 'phi_0':
+        dep_code.append("calculated_values['phi_0'] = 0.053171")
+    
+    elif dep_id == 'c_3':
+        dep_code.append("calculated_values['c_3'] = 1.0 / (8 * np.pi)")
+    
+    elif dep_id == 'm_planck':
+        dep_code.append("calculated_values['m_planck'] = 1.2209e19  # GeV")
+    
+    elif dep_id == 'alpha_s':
+        dep_code.append("# Strong coupling at M_Z using 2-loop RG")
+        dep_code.append("calculated_values['alpha_s'] = alpha_s_MSbar(M_Z, n_f=5, Lambda_QCD_GeV=0.332)")
+    
+    elif dep_id == 'sin2_theta_w':
+        dep_code.append("# Weinberg angle from W and Z masses")
+        dep_code.append("calculated_values['sin2_theta_w'] = sin2_theta_W_MSbar()")
+    
+    elif dep_id == 'g_1':
+        dep_code.append("# U(1) gauge coupling")
+        dep_code.append("sin2_theta_w = calculated_values.get('sin2_theta_w', sin2_theta_W_MSbar())")
+        dep_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
+        dep_code.append("calculated_values['g_1'] = np.sqrt(4*np.pi*alpha / (1 - sin2_theta_w))")
+    
+    elif dep_id == 'g_2':
+        dep_code.append("# SU(2) gauge coupling")
+        dep_code.append("sin2_theta_w = calculated_values.get('sin2_theta_w', sin2_theta_W_MSbar())")
+        dep_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
+        dep_code.append("calculated_values['g_2'] = np.sqrt(4*np.pi*alpha / sin2_theta_w)")
+    
+    elif dep_id == 'lambda_qcd':
+        dep_code.append("calculated_values['lambda_qcd'] = 332  # MeV, MS-bar scheme")
+    
+    elif dep_id == 'v_h' or dep_id == 'v_H':
+        dep_code.append("calculated_values['v_h'] = 246.22  # GeV")
+        dep_code.append("calculated_values['v_H'] = 246.22  # GeV")
+    
+    elif dep_id == 'm_e':
+        dep_code.append("# Electron mass")
+        dep_code.append("v_H = calculated_values.get('v_h', 246.22)")
+        dep_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
+        dep_code.append("phi_0 = calculated_values.get('phi_0', 0.053171)")
+        dep_code.append("calculated_values['m_e'] = (v_H/np.sqrt(2))*alpha*phi_0**5*1e6")
+    
+    elif dep_id == 'gamma_function':
+        dep_code.append("# Gamma function is a function, not a constant")
+        dep_code.append("calculated_values['gamma_function'] = lambda n: 0.834 + 0.108*n + 0.0105*n**2")
+        dep_code.append("# Skip printing for lambda function")
+    
+    elif dep_id == 'm_nu':
+        dep_code.append("# Light neutrino mass from seesaw mechanism")
+        dep_code.append("Y = 0.8  # Effective Yukawa coupling")
+        dep_code.append("n = 5  # Cascade level")
+        dep_code.append("gamma_func = calculated_values.get('gamma_function', lambda n: 0.834 + 0.108*n + 0.0105*n**2)")
+        dep_code.append("gamma_sum = sum(gamma_func(k) for k in range(n))")
+        dep_code.append("phi_5 = calculated_values['phi_0'] * np.exp(-gamma_sum)")
+        dep_code.append("v_h = calculated_values.get('v_h', 246.22)")
+        dep_code.append("M_Pl = calculated_values.get('m_planck', 1.2209e19)")
+        dep_code.append("calculated_values['m_nu'] = Y**2 * v_h**2 / (phi_5 * M_Pl) * 1e9  # Convert GeV to eV")
+    
+    else:
+        # Try to use formula if available
+        formula = dep.get('formula', '')
+        if formula:
+            # Simple formula parsing (extend as needed)
+            python_formula = formula
+            python_formula = python_formula.replace('^', '**')
+            python_formula = python_formula.replace('sqrt(', 'np.sqrt(')
+            python_formula = python_formula.replace('exp(', 'np.exp(')
+            python_formula = python_formula.replace('log(', 'np.log(')
+            python_formula = python_formula.replace('ln(', 'np.log(')
+            python_formula = python_formula.replace('pi', 'np.pi')
+            python_formula = python_formula.replace('sin(', 'np.sin(')
+            python_formula = python_formula.replace('cos(', 'np.cos(')
+            python_formula = python_formula.replace('arcsin(', 'np.arcsin(')
             
-            elif dep_id == 'm_nu':
-                dep_code.append("# Light neutrino mass from seesaw mechanism")
-                dep_code.append("Y = 0.8  # Effective Yukawa coupling")
-                dep_code.append("n = 5  # Cascade level")
-                dep_code.append("gamma_func = calculated_values.get('gamma_function', lambda n: 0.834 + 0.108*n + 0.0105*n**2)")
-                dep_code.append("gamma_sum = sum(gamma_func(k) for k in range(n))")
-                dep_code.append("phi_5 = calculated_values['phi_0'] * np.exp(-gamma_sum)")
-                dep_code.append("v_h = calculated_values.get('v_h', 246.22)")
-                dep_code.append("M_Pl = calculated_values.get('m_planck', 1.2209e19)")
-                dep_code.append("calculated_values['m_nu'] = Y**2 * v_h**2 / (phi_5 * M_Pl) * 1e9  # Convert GeV to eV")
+            # Replace references to other constants
+            python_formula = python_formula.replace('M_Z', "calculated_values.get('m_z', 91.1876)")
+            python_formula = python_formula.replace('M_W', "calculated_values.get('m_w', 80.379)")
+            python_formula = python_formula.replace('sin2_theta_w', "calculated_values.get('sin2_theta_w', 0.2230132)")
+            python_formula = python_formula.replace('v_H', "calculated_values.get('v_h', 246.22)")
+            python_formula = python_formula.replace('phi_0', "calculated_values.get('phi_0', 0.053171)")
+            python_formula = python_formula.replace('c_3', "calculated_values.get('c_3', 0.039788735772973836)")
+            python_formula = python_formula.replace('alpha', f"calculated_values.get('alpha', {ALPHA_REFERENCE})")
             
+            dep_code.append(f"calculated_values['{dep_id}'] = {python_formula}")
+        else:
+            # Use experimental value if available
+            if 'sources' in dep and dep['sources']:
+                exp_value = dep['sources'][0].get('value', 0)
+                dep_code.append(f"calculated_values['{dep_id}'] = {exp_value}")
             else:
-                # Try to use formula if available
-                formula = dep.get('formula', '')
-                if formula:
-                    # Simple formula parsing (extend as needed)
-                    python_formula = formula
-                    python_formula = python_formula.replace('^', '**')
-                    python_formula = python_formula.replace('sqrt(', 'np.sqrt(')
-                    python_formula = python_formula.replace('exp(', 'np.exp(')
-                    python_formula = python_formula.replace('log(', 'np.log(')
-                    python_formula = python_formula.replace('ln(', 'np.log(')
-                    python_formula = python_formula.replace('pi', 'np.pi')
-                    python_formula = python_formula.replace('sin(', 'np.sin(')
-                    python_formula = python_formula.replace('cos(', 'np.cos(')
-                    python_formula = python_formula.replace('arcsin(', 'np.arcsin(')
-                    
-                    # Replace references to other constants
-                    python_formula = python_formula.replace('M_Z', "calculated_values.get('m_z', 91.1876)")
-                    python_formula = python_formula.replace('M_W', "calculated_values.get('m_w', 80.379)")
-                    python_formula = python_formula.replace('sin2_theta_w', "calculated_values.get('sin2_theta_w', 0.2230132)")
-                    python_formula = python_formula.replace('v_H', "calculated_values.get('v_h', 246.22)")
-                    python_formula = python_formula.replace('phi_0', "calculated_values.get('phi_0', 0.053171)")
-                    python_formula = python_formula.replace('c_3', "calculated_values.get('c_3', 0.039788735772973836)")
-                    python_formula = python_formula.replace('alpha', "calculated_values.get('alpha', 1.0/137.035999084)")
-                    
-                    dep_code.append(f"calculated_values['{dep_id}'] = {python_formula}")
-                else:
-                    # Use experimental value if available
-                    if 'sources' in dep and dep['sources']:
-                        exp_value = dep['sources'][0].get('value', 0)
-                        dep_code.append(f"calculated_values['{dep_id}'] = {exp_value}")
-                    else:
-                        dep_code.append(f"calculated_values['{dep_id}'] = 0  # No formula available")
-            
-            dep_code.append(f"print(f\"{dep['symbol']} = {{calculated_values['{dep_id}']:.6e}}\")")
-            dep_code.append("")
-        
-        nb.cells.append(new_code_cell('\n'.join(dep_code)))
-    
-    # Main calculation
-    nb.cells.append(new_markdown_cell(f"## Calculate {constant['name']}"))
+                dep_code.append(f"calculated_values['{dep_id}'] = 0  # No formula available")
     
+    return dep_code
+
+def calculation_code(constant, sorted_deps):
+    """Code computing `result` for a constant, given its ordered dependencies"""
     main_code = [f"# Formula: {constant.get('formula', 'N/A')}"]
     main_code.append("")
     
@@ -375,13 +335,13 @@ def gamma_cascade(n):
         main_code.append("    if np.isreal(root) and root.real > 0 and root.real < 0.01:")
         main_code.append("        physical_root = root.real")
         main_code.append("        break")
-        main_code.append("result = physical_root if physical_root else 1.0/137.035999084")
+        main_code.append(f"result = physical_root if physical_root else {ALPHA_REFERENCE}")
         
     elif const_id == 'alpha_d':
         main_code.append("# Dark-electric fine structure constant")
         main_code.append("# α_D = (β_X² / α) * 0.001")
         main_code.append("beta_x = calculated_values.get('beta_x', calculated_values['phi_0']**2/(2*calculated_values['c_3']))")
-        main_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
+        main_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
         main_code.append("result = (beta_x**2 / alpha) * 0.001")
         
     elif const_id == 'alpha_s':
@@ -472,7 +432,7 @@ def gamma_cascade(n):
         main_code.append("    sin2_theta_w = calculated_values['sin2_theta_w']")
         main_code.append("else:")
         main_code.append("    sin2_theta_w = sin2_theta_W_MSbar()")
-        main_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
+        main_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
         main_code.append("result = np.sqrt(4*np.pi*alpha / (1 - sin2_theta_w))")
         
     elif const_id == 'g_2':
@@ -481,7 +441,7 @@ def gamma_cascade(n):
         main_code.append("    sin2_theta_w = calculated_values['sin2_theta_w']")
         main_code.append("else:")
         main_code.append("    sin2_theta_w = sin2_theta_W_MSbar()")
-        main_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
+        main_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
         main_code.append("result = np.sqrt(4*np.pi*alpha / sin2_theta_w)")
         
     elif const_id == 'n_s':
@@ -544,7 +504,7 @@ def gamma_cascade(n):
         main_code.append("# Vacuum impedance from electromagnetic coupling")
         main_code.append("# Z₀ = √(μ₀/ε₀) = 4π × (ħ/e²) × c")
         main_code.append("# From α = e²/(4πε₀ħc), we get Z₀ = 4π/(αc) × (ħc/e²) = 4π/α × 30 Ω")
-        main_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
+        main_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
         main_code.append("# Correct formula: Z₀ = μ₀c = 120π Ω")
         main_code.append("result = 120 * np.pi  # Exact value in Ohms")
         
@@ -562,8 +522,8 @@ def gamma_cascade(n):
     elif const_id == 'delta_m_n_p':
         main_code.append("# Neutron-Proton Mass Difference via electromagnetic splitting")
         main_code.append("# Δm_np = α * m_p * φ₀ with QCD corrections")
-        main_code.append("alpha = calculated_values.get('alpha', 1.0/137.035999084)")
-        main_code.append("m_p = 938.272  # MeV")
+        main_code.append(f"alpha = calculated_values.get('alpha', {ALPHA_REFERENCE})")
+        main_code.append(f"m_p = {codata_literal('proton mass energy equivalent in MeV')}  # MeV")
         main_code.append("phi_0 = calculated_values.get('phi_0', 0.053171)")
         main_code.append("# QCD correction factor")
         main_code.append("f_QCD = 3.4  # From lattice QCD")
@@ -641,7 +601,7 @@ def gamma_cascade(n):
     elif const_id == 'y_e':
         main_code.append("# Electron Yukawa coupling")
         main_code.append("# y_e = m_e / (v_H/√2)")
-        main_code.append("m_e = 0.51099895  # MeV")
+        main_code.append(f"m_e = {codata_literal('electron mass energy equivalent in MeV')}  # MeV")
         main_code.append("v_H = 246.22  # GeV")
         main_code.append("result = (m_e / 1000) / (v_H / np.sqrt(2))  # Convert MeV to GeV")
         
@@ -707,6 +667,59 @@ def gamma_cascade(n):
             main_code.append("# No formula available, using placeholder")
             main_code.append("result = 0")
     
+    return main_code
+
+def generate_notebook(constant, catalog):
+    """Generate a complete notebook for a constant"""
+    new_code_cell, new_markdown_cell = nbf_v4.new_code_cell, nbf_v4.new_markdown_cell
+    nb = nbf_v4.new_notebook()
+    
+    # Title and description
+    title = f"# {constant['name']} ({constant['symbol']})"
+    description = [
+        title,
+        f"\n**Description:** {constant.get('description', '')}",
+        f"\n**Category:** {constant.get('category', 'unknown')}",
+        f"\n**Status:** {constant.get('status', 'speculative')}"
+    ]
+    
+    if constant.get('unit'):
+        description.append(f"\n**Unit:** {constant['unit']}")
+    
+    if constant.get('formula'):
+        description.append(f"\n**Formula:** `{constant['formula']}`")
+    
+    nb.cells.append(new_markdown_cell('\n'.join(description)))
+    
+    # Transitive dependencies in the catalog's global topological order
+    sorted_deps = ordered_dependencies(constant['id'], catalog)
+    all_deps = {dep_id: catalog.get(dep_id) for dep_id in sorted_deps}
+    
+    # Imports and constants
+    nb.cells.append(new_code_cell(prelude_code()))
+    
+    # Add dependency calculations
+    if sorted_deps:
+        nb.cells.append(new_markdown_cell("## Required Constants\n\nCalculating all dependencies first:"))
+        
+        dep_code = ["# Calculate all required constants"]
+        dep_code.append("calculated_values = {}\n")
+        
+        for dep_id in sorted_deps:
+            dep = all_deps[dep_id]
+            dep_code.extend(dependency_code(dep))
+            if dep_id == 'gamma_function':
+                # A function: nothing to print
+                continue
+            dep_code.append(f"print(f\"{dep['symbol']} = {{calculated_values['{dep_id}']:.6e}}\")")
+            dep_code.append("")
+        
+        nb.cells.append(new_code_cell('\n'.join(dep_code)))
+    
+    # Main calculation
+    nb.cells.append(new_markdown_cell(f"## Calculate {constant['name']}"))
+    
+    main_code = calculation_code(constant, sorted_deps)
     main_code.append("")
     main_code.append(f"print(f'{constant['symbol']} = {{result:.10e}} {constant.get('unit', 'dimensionless')}')")
     
@@ -797,42 +810,241 @@ def gamma_cascade(n):
     
     return nb
 
-def main():
-    """Generate notebooks for all constants"""
+def function_code(name, body, returns=None):
+    """A module-level function of calculated_values around notebook cell code"""
+    lines = [f"def {name}(calculated_values):"]
+    lines += [f"    {line}" if line.strip() else "" for line in body]
+    if returns:
+        lines.append(f"    return {returns}")
+    return lines
+
+def catalog_module(catalog, template):
+    """
+    Source of a module computing every constant of the catalog once, in
+    topological order, from the same code as the notebooks
+    """
+    steps, functions = [], []
+    for const_id in catalog.index.topological_order:
+        constant = catalog.get(const_id)
+        sorted_deps = ordered_dependencies(const_id, catalog)
+        name = clean_symbol(const_id)
+        # Dependency code only ever runs in a dependent's notebook
+        dependency = None
+        if catalog.index.dependents.get(const_id):
+            dependency = f"_dependency_{name}"
+            functions += function_code(dependency, dependency_code(constant)) + ["", ""]
+        functions += function_code(f"_calculate_{name}", calculation_code(constant, sorted_deps),
+                                   returns="result") + ["", ""]
+        steps.append(f"    ({const_id!r}, {tuple(sorted_deps)!r}, {dependency}, _calculate_{name}),")
+
+    return f'''"""
+Every constant of the catalog, each computed once in topological order
+
+Generated by constants/scripts/generate_notebooks.py (template {template})
+from the same code as the notebooks; do not edit.
+
+    from catalog_values import VALUES     # constant id -> notebook result
+"""
+{prelude_code()}
+
+''' + '\n'.join(functions) + f'''# (constant id, its dependencies in order, code of its value as a
+# dependency or None if nothing depends on it, code of its notebook result)
+STEPS = [
+{chr(10).join(steps)}
+]
+
+
+def compute_catalog():
+    """
+    Notebook result of every constant. As in its notebook, a constant sees
+    the values of its own dependencies only, each computed once by its
+    dependency code.
+    """
+    provided = {{}}
+    results = {{}}
+    for const_id, dependencies, dependency, calculation in STEPS:
+        calculated_values = {{}}
+        for dep_id in dependencies:
+            calculated_values.update(provided[dep_id])
+        results[const_id] = calculation(dict(calculated_values))
+        if dependency is not None:
+            own = dict(calculated_values)
+            dependency(own)
+            provided[const_id] = {{key: own[key] for key in own.keys() - calculated_values.keys()}}
+    return results
+
+
+VALUES = compute_catalog()
+'''
+
+def write_module(catalog, template, path):
+    """Write the catalog module atomically, after checking that it compiles"""
+    source = catalog_module(catalog, template)
+    compile(source, str(path), 'exec')
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(source, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def notebook_result(nb):
+    """`result` of a notebook, running its code cells up to the export"""
+    namespace = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cell in [c for c in nb.cells if c.cell_type == 'code'][:-1]:
+            exec(cell.source, namespace)
+    return namespace['result']
+
+def check_module(catalog, path):
+    """Constants whose module value differs from their notebook's: id -> message"""
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    mismatches = {}
+    for const_id in catalog.index.topological_order:
+        try:
+            expected = notebook_result(generate_notebook(catalog.get(const_id), catalog))
+        except Exception as e:
+            mismatches[const_id] = f"notebook failed: {e}"
+            continue
+        actual = module.VALUES[const_id]
+        if not (actual == expected or math.isclose(actual, expected, rel_tol=1e-12)):
+            mismatches[const_id] = f"module {actual!r} != notebook {expected!r}"
+    return mismatches
+
+def template_fingerprint():
+    """Template version: TEMPLATE_VERSION, this generator's source and the CODATA listing"""
+    digest = hashlib.sha256(f"{TEMPLATE_VERSION}:{CODATA.source_hash}:".encode())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+def content_hash(const_id, catalog, template):
+    """Hash of everything a notebook is generated from"""
+    digest = hashlib.sha256(template.encode())
+    for dep_id in sorted(catalog.index.ancestors.get(const_id, frozenset())) + [const_id]:
+        digest.update(json.dumps(catalog.get(dep_id), sort_keys=True, ensure_ascii=False).encode())
+    return digest.hexdigest()[:16]
+
+def read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Catalog of a generator process, loaded once by init_worker
+_worker_catalog = None
+
+def init_worker(data_dir):
+    global _worker_catalog
+    _worker_catalog = load_catalog(data_dir)
+
+def generate_one(task):
+    """Generate and atomically save one notebook; returns (id, error or None)"""
+    const_id, output_path = task
+    try:
+        nb = generate_notebook(_worker_catalog.get(const_id), _worker_catalog)
+        tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            nbf.write(nb, f)
+        os.replace(tmp_path, output_path)
+        return const_id, None
+    except Exception as e:
+        return const_id, str(e)
+
+def main(argv=None):
+    """Generate notebooks for the constants whose inputs changed"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='regenerate every notebook')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='generator processes')
+    parser.add_argument('--data-dir', type=Path, default=Path(__file__).parent.parent / 'data',
+                        help='constant definitions to read')
+    parser.add_argument('--notebooks-dir', type=Path, default=Path(__file__).parent.parent / 'notebooks',
+                        help='where notebooks, the manifest and the module are written')
+    parser.add_argument('--check', action='store_true',
+                        help=f'check every value of {MODULE_NAME} against its notebook')
+    args = parser.parse_args(argv)
+    
     # Setup paths
-    script_dir = Path(__file__).parent
-    data_dir = script_dir.parent / 'data'
-    notebooks_dir = script_dir.parent / 'notebooks'
+    data_dir = args.data_dir
+    notebooks_dir = args.notebooks_dir
     
     # Create notebooks directory
-    notebooks_dir.mkdir(exist_ok=True)
+    notebooks_dir.mkdir(parents=True, exist_ok=True)
     
-    # Get all constant JSON files
-    json_files = sorted(data_dir.glob('*.json'))
+    # All constant definitions, from the compiled bundle when it is current
+    catalog = load_catalog(data_dir)
     
-    print(f"Generating notebooks for {len(json_files)} constants...")
+    template = template_fingerprint()
+    hashes = {const_id: content_hash(const_id, catalog, template) for const_id in catalog}
+    manifest_path = notebooks_dir / MANIFEST_NAME
+    previous_manifest = {} if args.force else read_manifest(manifest_path)
+    previous = previous_manifest.get('hashes', {})
     
-    for json_file in json_files:
-        constant = load_constant(json_file)
-        const_id = constant['id']
-        
-        print(f"  Generating notebook for {const_id}...")
+    changed = {const_id for const_id in catalog
+               if previous.get(const_id) != hashes[const_id]
+               or not (notebooks_dir / f"{const_id}.ipynb").exists()}
+    # A dependency's hash is part of its dependents' hashes; regenerate them explicitly anyway
+    for const_id in list(changed):
+        changed |= catalog.index.descendants.get(const_id, frozenset())
+    skipped = sorted(set(catalog) - changed)
+    
+    print(f"Generating notebooks for {len(changed)} of {len(catalog)} constants "
+          f"({len(skipped)} unchanged)...")
+    
+    errors = {}
+    if changed:
+        tasks = [(const_id, notebooks_dir / f"{const_id}.ipynb") for const_id in sorted(changed)]
+        jobs = max(1, min(args.jobs, len(tasks)))
+        if jobs == 1:
+            init_worker(data_dir)
+            results = [generate_one(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(data_dir,)) as pool:
+                results = list(pool.map(generate_one, tasks))
         
+        for const_id, error in results:
+            if error is None:
+                print(f"  ✓ {const_id}")
+            else:
+                print(f"  ✗ {const_id}: {error}")
+                errors[const_id] = error
+    
+    # The whole-catalog module depends on every notebook's inputs
+    module_path = notebooks_dir / MODULE_NAME
+    module_hash = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()[:16]
+    if previous_manifest.get('module') != module_hash or not module_path.exists():
+        changed.add(MODULE_NAME)
         try:
-            # Generate notebook
-            nb = generate_notebook(constant, data_dir)
-            
-            # Save notebook
-            output_path = notebooks_dir / f"{const_id}.ipynb"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                nbf.write(nb, f)
-            
-            print(f"    ✓ Saved to {output_path}")
-            
+            write_module(catalog, template, module_path)
+            print(f"  ✓ {MODULE_NAME}")
         except Exception as e:
-            print(f"    ✗ Error: {e}")
+            print(f"  ✗ {MODULE_NAME}: {e}")
+            errors[MODULE_NAME] = str(e)
+    
+    if args.check and MODULE_NAME not in errors:
+        mismatches = check_module(catalog, module_path)
+        for const_id, message in sorted(mismatches.items()):
+            print(f"  ✗ {const_id}: {message}")
+        print(f"Checked {MODULE_NAME} against {len(catalog)} notebooks: {len(mismatches)} mismatches")
+        if mismatches:
+            errors['check'] = mismatches
+    
+    # Failed notebooks get no hash, so the next run retries them
+    manifest = {
+        'template': template,
+        'hashes': {const_id: h for const_id, h in sorted(hashes.items()) if const_id not in errors},
+        'module': None if MODULE_NAME in errors else module_hash,
+        'generated': sorted(changed - set(errors)),
+        'skipped': skipped,
+        'failed': errors
+    }
+    tmp_path = manifest_path.with_name(f".{MANIFEST_NAME}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
     
-    print("\nNotebook generation complete!")
+    print(f"\nNotebook generation complete! Manifest written to {manifest_path}")
+    return 1 if errors else 0
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
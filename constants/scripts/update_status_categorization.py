@@ -8,21 +8,21 @@ Status levels:
 """
 
 import json
+import sys
 from pathlib import Path
 import math
 
-def calculate_deviation(calculated, experimental):
-    """Calculate relative deviation between values."""
-    if experimental == 0:
-        return float('inf') if calculated != 0 else 0
-    return abs((calculated - experimental) / experimental)
+sys.path.append(str(Path(__file__).parent.parent.parent / 'compute'))
+
+from catalog_bundle import build_bundle, load_catalog
+from reference_store import CORE_CONSTANTS, accuracy_status
 
 def determine_status(constant_data, result_data=None):
     """Determine status based on accuracy criteria."""
     const_id = constant_data['id']
     
     # Core topological constants
-    if const_id in ['c_3', 'phi_0', 'alpha']:
+    if const_id in CORE_CONSTANTS:
         return 'core'
     
     # Check if we have experimental values to compare
@@ -44,19 +44,10 @@ def determine_status(constant_data, result_data=None):
     if result_data and 'value' in result_data:
         calculated = result_data['value']
     
-    if calculated is None:
-        return 'speculative'
-    
-    # Calculate deviation
+    # Validated if within 10%, the same rule the reference diff applies
     try:
-        deviation = calculate_deviation(calculated, experimental)
-        
-        # Validated if within 10% (0.10)
-        if deviation <= 0.10:
-            return 'validated'
-        else:
-            return 'speculative'
-    except:
+        return accuracy_status(const_id, float(calculated), float(experimental))
+    except (TypeError, ValueError):
         return 'speculative'
 
 def categorize_constant(constant_data):
@@ -88,12 +79,8 @@ def categorize_constant(constant_data):
     # Default category
     return constant_data.get('category', 'derived')
 
-def update_constant_file(json_path, results_dir):
+def update_constant_file(json_path, data, results_dir):
     """Update a single constant JSON file with status and category."""
-    # Load constant data
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    
     const_id = data['id']
     
     # Try to load result data
@@ -128,10 +115,10 @@ def main():
     data_dir = script_dir.parent / 'data'
     results_dir = script_dir.parent / 'results'
     
-    # Get all JSON files
-    json_files = sorted(data_dir.glob('*.json'))
+    # All definitions, from the compiled bundle when it is current
+    catalog = load_catalog(data_dir)
     
-    print(f"Updating {len(json_files)} constant files with status categorization...")
+    print(f"Updating {len(catalog)} constant files with status categorization...")
     print("=" * 60)
     
     # Track statistics
@@ -143,8 +130,9 @@ def main():
     
     category_stats = {}
     
-    for json_path in json_files:
-        const_id, status, category = update_constant_file(json_path, results_dir)
+    for file_name, const_id in sorted(catalog.files.items()):
+        data = dict(catalog.get(const_id))
+        const_id, status, category = update_constant_file(data_dir / file_name, data, results_dir)
         
         # Update statistics
         stats[status].append(const_id)
@@ -181,7 +169,7 @@ def main():
     
     # Save summary report
     report = {
-        'total': len(json_files),
+        'total': len(catalog),
         'status_counts': {
             'core': len(stats['core']),
             'validated': len(stats['validated']),
@@ -197,6 +185,9 @@ def main():
         json.dump(report, f, indent=2)
     
     print(f"\nDetailed report saved to: {report_path}")
+    
+    # The definitions changed; recompile the bundle so consumers stay on the fast path
+    print(f"Catalog bundle rebuilt: {build_bundle(data_dir)}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
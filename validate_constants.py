@@ -2,15 +2,24 @@
 """
 Validate calculated constants against experimental values
 """
-import json
 import math
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent / 'compute'))
+
+from catalog_bundle import load_catalog
+from codata import REFERENCES, load_codata, reference_value
+
+# Loaded once, from the compiled bundle when it is current
+catalog = load_catalog(Path(__file__).parent / 'constants' / 'data')
+
 def load_constant(constant_id):
-    """Load constant data from JSON"""
-    path = Path(f"constants/data/{constant_id}.json")
-    with open(path, 'r') as f:
-        return json.load(f)
+    """Load constant data from the catalog"""
+    constant = catalog.get(constant_id)
+    if constant is None:
+        raise FileNotFoundError(f"No constant '{constant_id}' in constants/data")
+    return constant
 
 def calculate_value(constant_id):
     """Calculate constant value based on formula"""
@@ -77,6 +86,19 @@ def main():
         except Exception as e:
             print(f"\n❌ Error validating {const_id}: {e}")
     
+    # Reference values copied into the JSON sources must match the CODATA listing
+    codata = load_codata()
+    print("\n" + "=" * 50)
+    print(f"CODATA {codata.release} references")
+    for const_id in sorted(REFERENCES):
+        constant = catalog.get(const_id)
+        if constant is None:
+            continue
+        expected = reference_value(codata, const_id)
+        for source in constant.get('sources', []):
+            if source.get('name', '').startswith('CODATA') and not math.isclose(source['value'], expected, rel_tol=1e-9):
+                print(f"  ⚠️  {const_id}: source '{source['name']}' has {source['value']}, CODATA lists {expected}")
+    
     print("\n" + "=" * 50)
     print("Note: Full calculations with dependencies require the compute service")
 